@@ -3,7 +3,7 @@
 """
 import json
 import os
-from lib.utils import json_response, get_db_cursor, get_db_connection
+from lib.utils import json_response, db_cursor
 
 
 def handler(request):
@@ -49,23 +49,22 @@ def handler(request):
 def handle_get_codes():
     """获取所有注册码"""
     try:
-        cursor = get_db_cursor()
-        cursor.execute("""
-            SELECT 
-                rc.id,
-                rc.code,
-                rc.is_active,
-                rc.unlimited_use,
-                rc.used_at,
-                rc.used_by_user_id,
-                u.username as used_by_username
-            FROM registration_codes rc
-            LEFT JOIN users u ON rc.used_by_user_id = u.id
-            ORDER BY rc.code ASC
-        """)
-        
-        codes = cursor.fetchall()
-        cursor.close()
+        with db_cursor() as cursor:
+            cursor.execute("""
+                SELECT 
+                    rc.id,
+                    rc.code,
+                    rc.is_active,
+                    rc.unlimited_use,
+                    rc.used_at,
+                    rc.used_by_user_id,
+                    u.username as used_by_username
+                FROM registration_codes rc
+                LEFT JOIN users u ON rc.used_by_user_id = u.id
+                ORDER BY rc.code ASC
+            """)
+            
+            codes = cursor.fetchall()
         
         # 转换数据格式
         codes_list = []
@@ -113,25 +112,22 @@ def handle_create_code(request):
         if not code:
             return json_response({'success': False, 'message': '注册码不能为空'}, 400)
         
-        cursor = get_db_cursor()
-        conn = get_db_connection()
-        
-        # 检查注册码是否已存在
-        cursor.execute("SELECT id FROM registration_codes WHERE code = %s", (code,))
-        if cursor.fetchone():
-            cursor.close()
-            return json_response({'success': False, 'message': '注册码已存在'}, 400)
-        
-        # 创建注册码
-        cursor.execute("""
-            INSERT INTO registration_codes (code, unlimited_use, is_active)
-            VALUES (%s, %s, %s)
-            RETURNING id, code, unlimited_use, is_active
-        """, (code, unlimited_use, is_active))
-        
-        new_code = cursor.fetchone()
-        conn.commit()
-        cursor.close()
+        with db_cursor() as cursor:
+            # 检查注册码是否已存在
+            cursor.execute("SELECT id FROM registration_codes WHERE code = %s", (code,))
+            if cursor.fetchone():
+                return json_response({'success': False, 'message': '注册码已存在'}, 400)
+            
+            # 创建注册码
+            cursor.execute("""
+                INSERT INTO registration_codes (code, unlimited_use, is_active)
+                VALUES (%s, %s, %s)
+                RETURNING id, code, unlimited_use, is_active
+            """, (code, unlimited_use, is_active))
+            
+            new_code = cursor.fetchone()
+            
+            cursor.connection.commit()
         
         return json_response({
             'success': True,
@@ -144,8 +140,7 @@ def handle_create_code(request):
         })
         
     except Exception as e:
-        conn = get_db_connection()
-        conn.rollback()
+        # 未提交的事务在连接归还连接池时自动回滚
         return json_response({'success': False, 'message': str(e)}, 500)
 
 
@@ -174,25 +169,21 @@ def handle_delete_code(request):
         if not code_id:
             return json_response({'success': False, 'message': '注册码ID不能为空'}, 400)
         
-        cursor = get_db_cursor()
-        conn = get_db_connection()
-        
-        # 检查注册码是否存在
-        cursor.execute("SELECT id FROM registration_codes WHERE id = %s", (code_id,))
-        if not cursor.fetchone():
-            cursor.close()
-            return json_response({'success': False, 'message': '注册码不存在'}, 404)
-        
-        # 删除注册码
-        cursor.execute("DELETE FROM registration_codes WHERE id = %s", (code_id,))
-        conn.commit()
-        cursor.close()
+        with db_cursor() as cursor:
+            # 检查注册码是否存在
+            cursor.execute("SELECT id FROM registration_codes WHERE id = %s", (code_id,))
+            if not cursor.fetchone():
+                return json_response({'success': False, 'message': '注册码不存在'}, 404)
+            
+            # 删除注册码
+            cursor.execute("DELETE FROM registration_codes WHERE id = %s", (code_id,))
+            
+            cursor.connection.commit()
         
         return json_response({'success': True, 'message': '注册码已删除'})
         
     except Exception as e:
-        conn = get_db_connection()
-        conn.rollback()
+        # 未提交的事务在连接归还连接池时自动回滚
         return json_response({'success': False, 'message': str(e)}, 500)
 
 
@@ -220,24 +211,20 @@ def handle_update_code(request):
         if is_active is None:
             return json_response({'success': False, 'message': 'is_active参数不能为空'}, 400)
         
-        cursor = get_db_cursor()
-        conn = get_db_connection()
-        
-        # 更新注册码状态
-        cursor.execute("""
-            UPDATE registration_codes
-            SET is_active = %s
-            WHERE id = %s
-            RETURNING id, code, is_active
-        """, (is_active, code_id))
-        
-        updated_code = cursor.fetchone()
-        if not updated_code:
-            cursor.close()
-            return json_response({'success': False, 'message': '注册码不存在'}, 404)
-        
-        conn.commit()
-        cursor.close()
+        with db_cursor() as cursor:
+            # 更新注册码状态
+            cursor.execute("""
+                UPDATE registration_codes
+                SET is_active = %s
+                WHERE id = %s
+                RETURNING id, code, is_active
+            """, (is_active, code_id))
+            
+            updated_code = cursor.fetchone()
+            if not updated_code:
+                return json_response({'success': False, 'message': '注册码不存在'}, 404)
+            
+            cursor.connection.commit()
         
         return json_response({
             'success': True,
@@ -249,7 +236,6 @@ def handle_update_code(request):
         })
         
     except Exception as e:
-        conn = get_db_connection()
-        conn.rollback()
+        # 未提交的事务在连接归还连接池时自动回滚
         return json_response({'success': False, 'message': str(e)}, 500)
 
@@ -3,7 +3,7 @@
 """
 import json
 import os
-from lib.utils import json_response, get_db_cursor
+from lib.utils import json_response, db_cursor
 
 
 def handler(request):
@@ -43,20 +43,19 @@ def handler(request):
             return json_response({'success': False, 'message': '管理员密码错误'}, 401)
         
         # 获取所有用户信息
-        cursor = get_db_cursor()
-        cursor.execute("""
-            SELECT 
-                id,
-                username,
-                is_active,
-                created_at,
-                last_login
-            FROM users
-            ORDER BY created_at DESC
-        """)
-        
-        users = cursor.fetchall()
-        cursor.close()
+        with db_cursor() as cursor:
+            cursor.execute("""
+                SELECT 
+                    id,
+                    username,
+                    is_active,
+                    created_at,
+                    last_login
+                FROM users
+                ORDER BY created_at DESC
+            """)
+            
+            users = cursor.fetchall()
         
         # 转换UUID为字符串，处理时间格式
         users_list = []
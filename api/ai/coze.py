@@ -4,7 +4,78 @@ Coze API代理 - 后端调用，使用环境变量
 import os
 import json
 import requests
-from lib.utils import json_response
+from lib import http_client
+from lib.utils import StreamingResponse, json_response, sse_event
+
+# 流式响应的读取超时是两个数据块之间的最长间隔，不是整个回复的总时长
+COZE_TIMEOUT = (http_client.HTTP_CONNECT_TIMEOUT, 60)
+
+def iter_coze_events(response):
+    """解析 Coze 的 SSE 响应，逐个产生 (event, data)；data 为解析后的 JSON（无法解析时为原始字符串）"""
+    event = None
+    # chunk_size=None：每个事件一到达就解析，不等凑满默认的 512 字节
+    for line in response.iter_lines(chunk_size=None):
+        if not line:
+            event = None
+            continue
+        line_str = line.decode('utf-8')
+        if line_str.startswith('event:'):
+            event = line_str[6:].strip()
+        elif line_str.startswith('data:'):
+            raw = line_str[5:].strip()
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = raw
+            yield event, data
+            if event == 'done':
+                return
+
+def _error_message(event, data):
+    """从 conversation.chat.failed / error 事件中取出错误信息"""
+    if isinstance(data, dict):
+        last_error = data.get('last_error') or {}
+        return last_error.get('msg') or data.get('msg') or f'Coze对话失败: {event}'
+    return f'Coze对话失败: {event}'
+
+def collect_answer(response):
+    """读完整个事件流，返回 {'content', 'conversation_id', 'error'}"""
+    deltas = []
+    completed = None
+    conversation_id = None
+    error = None
+    for event, data in iter_coze_events(response):
+        if not isinstance(data, dict):
+            continue
+        conversation_id = data.get('conversation_id') or conversation_id
+        if data.get('type') == 'answer':
+            if event == 'conversation.message.delta':
+                deltas.append(data.get('content') or '')
+            elif event == 'conversation.message.completed':
+                completed = data.get('content') or ''
+        if event in ('conversation.chat.failed', 'error'):
+            error = _error_message(event, data)
+    content = completed if completed is not None else ''.join(deltas)
+    return {'content': content, 'conversation_id': conversation_id, 'error': error}
+
+def relay_stream(response, conversation_id=None):
+    """把回答的增量（conversation.message.delta）实时转发给前端，最后发送带 conversation_id 的 done 事件"""
+    try:
+        for event, data in iter_coze_events(response):
+            if not isinstance(data, dict):
+                continue
+            conversation_id = data.get('conversation_id') or conversation_id
+            if event == 'conversation.message.delta' and data.get('type') == 'answer':
+                yield sse_event({'content': data.get('content') or ''}, event='delta')
+            elif event in ('conversation.chat.failed', 'error'):
+                yield sse_event({'message': _error_message(event, data)}, event='error')
+                return
+        yield sse_event({'conversation_id': conversation_id}, event='done')
+    except requests.exceptions.RequestException as e:
+        # 响应头已经发出，只能通过 error 事件通知前端
+        yield sse_event({'message': f'Coze API请求失败: {str(e)}'}, event='error')
+    finally:
+        response.close()
 
 def handler(request):
     """代理Coze API调用"""
@@ -68,6 +139,7 @@ def handler(request):
         prompt = data.get('prompt', '') or data.get('content', '') or data.get('message', '') or ''
         user_id = data.get('user_id', '')
         conversation_id = data.get('conversation_id', '')
+        stream = bool(data.get('stream'))
         
         if not prompt:
             return json_response({'success': False, 'message': '请提供prompt'}, 400)
@@ -101,53 +173,37 @@ def handler(request):
         if conversation_id:
             payload['conversation_id'] = conversation_id
         
-        response = requests.post(url, headers=headers, json=payload, stream=True)
+        response = http_client.post(url, headers=headers, json=payload, stream=True, timeout=COZE_TIMEOUT)
         
-        if response.status_code != 200:
+        # 出错时 Coze 返回 JSON 而不是事件流（鉴权失败等情况状态码也可能是 200）
+        is_json = response.headers.get('content-type', '').startswith('application/json')
+        if response.status_code != 200 or is_json:
             try:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                error_data = response.json() if is_json else {}
                 error_msg = error_data.get('msg') or error_data.get('message') or f'Coze API错误: {response.status_code}'
             except:
                 error_msg = f'Coze API错误: {response.status_code}'
+            response.close()
             return json_response({
                 'success': False,
                 'message': error_msg
-            }, response.status_code)
-        
-        # 返回流式响应
-        def generate():
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8')
-                    if line_str.startswith('data:'):
-                        yield f"data: {line_str[5:].strip()}\n\n"
-                    elif line_str.startswith('event:'):
-                        yield f"event: {line_str[6:].strip()}\n\n"
+            }, response.status_code if response.status_code != 200 else 502)
         
-        # 对于Vercel，我们需要返回完整的响应
-        # 这里简化处理，返回非流式响应
-        full_content = ''
-        conversation_id_result = None
+        if stream:
+            return StreamingResponse(relay_stream(response, conversation_id))
         
-        for line in response.iter_lines():
-            if line:
-                line_str = line.decode('utf-8')
-                if line_str.startswith('data:'):
-                    try:
-                        data = json.loads(line_str[5:].strip())
-                        if data.get('type') == 'answer' and data.get('content'):
-                            full_content = data.get('content', '')
-                        if data.get('conversation_id'):
-                            conversation_id_result = data.get('conversation_id')
-                        if data.get('type') == 'done':
-                            break
-                    except:
-                        pass
+        # 非流式：读完整个事件流后一次性返回
+        try:
+            answer = collect_answer(response)
+        finally:
+            response.close()
+        if answer['error']:
+            return json_response({'success': False, 'message': answer['error']}, 502)
         
         return json_response({
             'success': True,
-            'content': full_content,
-            'conversation_id': conversation_id_result
+            'content': answer['content'],
+            'conversation_id': answer['conversation_id']
         }, 200)
         
     except requests.exceptions.RequestException as e:
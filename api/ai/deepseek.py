@@ -2,9 +2,91 @@
 DeepSeek API代理 - 后端调用，使用环境变量
 """
 import os
+import re
 import json
+import unicodedata
 import requests
-from lib.utils import json_response
+from lib import http_client
+from lib.cache import TTLCache
+from lib.utils import StreamingResponse, json_response, sse_event
+
+# 连接超时使用共享客户端的默认值，读取超时覆盖模型生成完整回复的时间
+DEEPSEEK_TIMEOUT = (http_client.HTTP_CONNECT_TIMEOUT, 30)
+# 流式模式下读取超时是两个数据块之间的最长间隔
+DEEPSEEK_STREAM_TIMEOUT = (http_client.HTTP_CONNECT_TIMEOUT, 60)
+
+DEFAULT_TEMPERATURE = 1.3
+TEMPERATURE_BUCKET = 0.1  # 温度差在一个桶内的请求共用缓存
+
+# 提示词 -> 回复缓存：情景对话等模块会对相同提示词反复请求
+PROMPT_CACHE_TTL = int(os.environ.get('DEEPSEEK_CACHE_TTL', 6 * 60 * 60))
+PROMPT_CACHE_SIZE = int(os.environ.get('DEEPSEEK_CACHE_SIZE', 512))
+_prompt_cache = TTLCache(maxsize=PROMPT_CACHE_SIZE, ttl=PROMPT_CACHE_TTL)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_prompt(prompt):
+    """规范化提示词：统一 Unicode 组合形式，合并连续空白"""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', prompt)).strip()
+
+def prompt_cache_key(model, prompt, temperature):
+    """缓存键：模型 + 规范化的提示词 + 温度桶"""
+    bucket = round(round(temperature / TEMPERATURE_BUCKET) * TEMPERATURE_BUCKET, 2)
+    return model, normalize_prompt(prompt), bucket
+
+def prompt_cache_stats():
+    return _prompt_cache.stats()
+
+def cached_stream(content):
+    """把缓存的回复按 DeepSeek 流式格式一次性发给前端"""
+    chunk = {'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': 'stop'}], 'cached': True}
+    yield sse_event(chunk)
+    yield b'data: [DONE]\n\n'
+
+def relay_stream(response, cache_key=None):
+    """逐条转发 DeepSeek 的 SSE 数据块（OpenAI 兼容格式），直到 data: [DONE]
+
+    给出 cache_key 时同时拼接增量内容，完整收到 [DONE] 后写入提示词缓存。
+    """
+    parts = []
+    try:
+        # chunk_size=None：收到多少数据就处理多少，默认的 512 字节会把几个小事件攒在一起才转发
+        for line in response.iter_lines(chunk_size=None):
+            # 跳过事件之间的空行和 keep-alive 注释行
+            if not line.startswith(b'data:'):
+                continue
+            yield line + b'\n\n'
+            raw = line[5:].strip()
+            if raw == b'[DONE]':
+                if cache_key is not None and parts:
+                    _prompt_cache.set(cache_key, ''.join(parts))
+                break
+            if cache_key is not None:
+                try:
+                    delta = json.loads(raw)['choices'][0].get('delta', {})
+                    parts.append(delta.get('content') or '')
+                except (ValueError, KeyError, IndexError):
+                    cache_key = None  # 无法完整拼出回复，不缓存
+    except requests.exceptions.RequestException as e:
+        # 响应头已经发出，只能通过 error 事件通知前端
+        yield sse_event({'message': f'DeepSeek API请求失败: {str(e)}'}, event='error')
+    finally:
+        response.close()
+
+def error_response(response):
+    """把 DeepSeek 的错误响应转换为接口的错误返回"""
+    try:
+        error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+        error_msg = error_data.get('error', {}).get('message') if isinstance(error_data.get('error'), dict) else str(error_data.get('error', ''))
+        if not error_msg:
+            error_msg = f'DeepSeek API错误: {response.status_code}'
+    except:
+        error_msg = f'DeepSeek API错误: {response.status_code}'
+    response.close()
+    return json_response({
+        'success': False,
+        'message': error_msg
+    }, response.status_code)
 
 def handler(request):
     """代理DeepSeek API调用"""
@@ -67,6 +149,13 @@ def handler(request):
         
         prompt = data.get('prompt', '') or data.get('content', '') or ''
         model = data.get('model', 'deepseek-chat')
+        stream = bool(data.get('stream'))
+        # 传入 cache: false 时跳过缓存（例如需要重新生成不同的回复）
+        use_cache = data.get('cache', True) is not False
+        try:
+            temperature = min(2.0, max(0.0, float(data.get('temperature', DEFAULT_TEMPERATURE))))
+        except (TypeError, ValueError):
+            temperature = DEFAULT_TEMPERATURE
         
         if not prompt:
             return json_response({'success': False, 'message': '请提供prompt'}, 400)
@@ -77,6 +166,12 @@ def handler(request):
         if not api_key:
             return json_response({'success': False, 'message': 'DeepSeek API未配置'}, 400)
         
+        cache_key = prompt_cache_key(model, prompt, temperature) if use_cache else None
+        if stream and cache_key is not None:
+            cached = _prompt_cache.get(cache_key)
+            if cached is not None:
+                return StreamingResponse(cached_stream(cached))
+        
         # 调用DeepSeek API
         url = 'https://api.deepseek.com/v1/chat/completions'
         headers = {
@@ -90,32 +185,39 @@ def handler(request):
                 'role': 'user',
                 'content': prompt
             }],
-            'temperature': 1.3,
-            'stream': False
+            'temperature': temperature,
+            'stream': stream
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        if stream:
+            response = http_client.post(url, headers=headers, json=payload, stream=True, timeout=DEEPSEEK_STREAM_TIMEOUT)
+            if response.status_code != 200:
+                return error_response(response)
+            return StreamingResponse(relay_stream(response, cache_key))
         
-        if response.status_code != 200:
-            try:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
-                error_msg = error_data.get('error', {}).get('message') if isinstance(error_data.get('error'), dict) else str(error_data.get('error', ''))
-                if not error_msg:
-                    error_msg = f'DeepSeek API错误: {response.status_code}'
-            except:
-                error_msg = f'DeepSeek API错误: {response.status_code}'
-            return json_response({
-                'success': False,
-                'message': error_msg
-            }, response.status_code)
+        def load():
+            response = http_client.post(url, headers=headers, json=payload, timeout=DEEPSEEK_TIMEOUT)
+            if response.status_code != 200:
+                return error_response(response)
+            result = response.json()
+            return result.get('choices', [{}])[0].get('message', {}).get('content', '')
         
-        result = response.json()
-        content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        if cache_key is None:
+            result, source = load(), 'loaded'
+        else:
+            # 相同提示词的并发请求只调用一次上游；只缓存成功的回复
+            result, source = _prompt_cache.get_or_load(
+                cache_key, load, cache_if=lambda value: isinstance(value, str) and value != '', with_source=True)
+        if not isinstance(result, str):
+            return result
         
-        return json_response({
-            'success': True,
-            'content': content
-        }, 200)
+        body = {'success': True, 'content': result}
+        # cached：回复来自缓存；coalesced：等待了同一提示词的另一个请求的上游调用
+        if source == 'cache':
+            body['cached'] = True
+        elif source == 'coalesced':
+            body['coalesced'] = True
+        return json_response(body, 200)
         
     except requests.exceptions.RequestException as e:
         return json_response({
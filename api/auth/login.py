@@ -2,14 +2,8 @@
 用户登录API - 使用 PostgreSQL
 """
 import json
-import os
-import jwt
-import bcrypt
-from lib.utils import json_response, get_db_cursor, get_db_connection
-
-JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
-
-JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
+from lib.passwords import PasswordHasherBusy, check_password
+from lib.utils import ApiResponse, json_response, db_cursor, issue_token
 
 def handler(request):
     # 获取请求方法
@@ -46,41 +40,33 @@ def handler(request):
             return json_response({'success': False, 'message': '请填写用户名和密码'}, 400)
         
         # 查询用户
-        cursor = get_db_cursor()
-        cursor.execute("""
-            SELECT id, username, password_hash 
-            FROM users 
-            WHERE username = %s AND is_active = TRUE
-        """, (username,))
-        
-        user = cursor.fetchone()
+        with db_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, username, password_hash 
+                FROM users 
+                WHERE username = %s AND is_active = TRUE
+            """, (username,))
+            
+            user = cursor.fetchone()
         
         if not user:
-            cursor.close()
             return json_response({'success': False, 'message': '用户名或密码错误'}, 401)
         
-        # 验证密码
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-            cursor.close()
+        # 验证密码（在密码哈希进程池中执行，不占用数据库连接）
+        if not check_password(password, user['password_hash']):
             return json_response({'success': False, 'message': '用户名或密码错误'}, 401)
         
         # 更新最后登录时间
-        conn = get_db_connection()
-        cursor.execute("""
-            UPDATE users 
-            SET last_login = CURRENT_TIMESTAMP 
-            WHERE id = %s
-        """, (user['id'],))
-        conn.commit()
+        with db_cursor() as cursor:
+            cursor.execute("""
+                UPDATE users 
+                SET last_login = CURRENT_TIMESTAMP 
+                WHERE id = %s
+            """, (user['id'],))
+            cursor.connection.commit()
         
         # 生成JWT Token
-        token = jwt.encode(
-            {'user_id': str(user['id'])},
-            JWT_SECRET,
-            algorithm='HS256'
-        )
-        
-        cursor.close()
+        token = issue_token(user['id'])
         
         return json_response({
             'success': True,
@@ -88,5 +74,7 @@ def handler(request):
             'user': {'id': str(user['id']), 'username': user['username']}
         })
         
+    except PasswordHasherBusy as e:
+        return ApiResponse({'success': False, 'message': str(e)}, 429, headers={'Retry-After': str(e.retry_after)})
     except Exception as e:
         return json_response({'success': False, 'message': str(e)}, 500)
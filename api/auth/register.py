@@ -2,12 +2,9 @@
 用户注册API - 使用 PostgreSQL
 """
 import json
-import os
-import jwt
-import bcrypt
-from lib.utils import json_response, get_db_cursor, get_db_connection
-
-JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
+import psycopg2
+from lib.passwords import PasswordHasherBusy, hash_password
+from lib.utils import ApiResponse, json_response, db_cursor, issue_token
 
 def handler(request):
     # 获取请求方法
@@ -44,61 +41,58 @@ def handler(request):
         if not username or not password or not reg_code:
             return json_response({'success': False, 'message': '请填写所有字段'}, 400)
         
-        cursor = get_db_cursor()
-        conn = get_db_connection()
-        
-        # 验证注册码
-        cursor.execute("""
-            SELECT id, unlimited_use, used_at 
-            FROM registration_codes 
-            WHERE code = %s AND is_active = TRUE
-        """, (reg_code,))
-        
-        code_record = cursor.fetchone()
-        
-        if not code_record:
-            cursor.close()
-            return json_response({'success': False, 'message': '注册码无效'}, 400)
-        
-        # 检查注册码是否已使用（仅限单次使用的注册码）
-        if not code_record['unlimited_use'] and code_record['used_at']:
-            cursor.close()
-            return json_response({'success': False, 'message': '注册码已使用'}, 400)
-        
-        # 检查用户名是否存在
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        if cursor.fetchone():
-            cursor.close()
-            return json_response({'success': False, 'message': '用户名已存在'}, 400)
-        
-        # 创建用户
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        cursor.execute("""
-            INSERT INTO users (username, password_hash) 
-            VALUES (%s, %s) 
-            RETURNING id, username
-        """, (username, password_hash))
-        
-        user = cursor.fetchone()
-        
-        # 标记注册码为已使用（仅限单次使用的注册码）
-        if not code_record['unlimited_use']:
+        with db_cursor() as cursor:
+            # 验证注册码
             cursor.execute("""
-                UPDATE registration_codes 
-                SET used_at = CURRENT_TIMESTAMP, used_by_user_id = %s 
-                WHERE id = %s
-            """, (user['id'], code_record['id']))
-        
-        conn.commit()
+                SELECT id, unlimited_use, used_at 
+                FROM registration_codes 
+                WHERE code = %s AND is_active = TRUE
+            """, (reg_code,))
+            
+            code_record = cursor.fetchone()
+            
+            if not code_record:
+                return json_response({'success': False, 'message': '注册码无效'}, 400)
+            
+            # 检查注册码是否已使用（仅限单次使用的注册码）
+            if not code_record['unlimited_use'] and code_record['used_at']:
+                return json_response({'success': False, 'message': '注册码已使用'}, 400)
+            
+            # 检查用户名是否存在
+            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+            if cursor.fetchone():
+                return json_response({'success': False, 'message': '用户名已存在'}, 400)
+        
+        # 计算密码哈希（在密码哈希进程池中执行，不占用数据库连接）
+        password_hash = hash_password(password)
+        
+        with db_cursor() as cursor:
+            # 创建用户（哈希期间可能有同名用户注册，由唯一约束兜底）
+            try:
+                cursor.execute("""
+                    INSERT INTO users (username, password_hash) 
+                    VALUES (%s, %s) 
+                    RETURNING id, username
+                """, (username, password_hash))
+            except psycopg2.errors.UniqueViolation:
+                return json_response({'success': False, 'message': '用户名已存在'}, 400)
+            
+            user = cursor.fetchone()
+            
+            # 标记注册码为已使用（仅限单次使用的注册码；哈希期间可能已被他人使用）
+            if not code_record['unlimited_use']:
+                cursor.execute("""
+                    UPDATE registration_codes 
+                    SET used_at = CURRENT_TIMESTAMP, used_by_user_id = %s 
+                    WHERE id = %s AND used_at IS NULL
+                """, (user['id'], code_record['id']))
+                if cursor.rowcount == 0:
+                    return json_response({'success': False, 'message': '注册码已使用'}, 400)
+            
+            cursor.connection.commit()
         
         # 生成JWT Token
-        token = jwt.encode(
-            {'user_id': str(user['id'])},
-            JWT_SECRET,
-            algorithm='HS256'
-        )
-        
-        cursor.close()
+        token = issue_token(user['id'])
         
         return json_response({
             'success': True,
@@ -106,7 +100,8 @@ def handler(request):
             'user': {'id': str(user['id']), 'username': user['username']}
         })
         
+    except PasswordHasherBusy as e:
+        return ApiResponse({'success': False, 'message': str(e)}, 429, headers={'Retry-After': str(e.retry_after)})
     except Exception as e:
-        conn = get_db_connection()
-        conn.rollback()
+        # 未提交的事务在连接归还连接池时自动回滚
         return json_response({'success': False, 'message': str(e)}, 500)
@@ -0,0 +1 @@
+# Dictionary API package
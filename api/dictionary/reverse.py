@@ -0,0 +1,51 @@
+"""
+汉法反查API - 在释义文本的汉字 n-gram 倒排索引（lib/reverse_index）中查找中文词语
+
+GET /api/dictionary/reverse?q=丰富&pos=noun&limit=10&offset=0
+- q 中的汉字按二元切分（单个汉字按一元），释义中覆盖的 n-gram 越多、释义越短排名越靠前，例句排在释义之后
+- pos：词性分类（noun、verb ...）或词性缩写（n. m.、v. t. ...）
+- data.matches 为紧凑格式的词条，另含 match（命中的那条释义原文）；data.total 为匹配的词条总数
+"""
+import time
+from lib.utils import ApiResponse, int_arg, json_response
+from lib.dictionary import get_dictionary, compact_entry
+from lib.reverse_index import query_grams
+
+MAX_LIMIT = 50
+# 词典数据只在重新部署时变化，允许浏览器和 CDN 缓存查询结果
+CACHE_HEADERS = {'Cache-Control': 'public, max-age=3600'}
+
+
+def handler(request):
+    method = (getattr(request, 'method', None) or 'GET').upper()
+    if method == 'OPTIONS':
+        return json_response({}, 200)
+    if method != 'GET':
+        return json_response({'success': False, 'message': 'Method not allowed'}, 405)
+
+    if isinstance(request, dict):
+        args = request.get('queryStringParameters') or {}
+    else:
+        args = getattr(request, 'args', None) or {}
+    query = (args.get('q') or '').strip()
+    pos = (args.get('pos') or '').strip() or None
+    limit = int_arg(args, 'limit', 10, 1, MAX_LIMIT)
+    offset = int_arg(args, 'offset', 0, 0, 100000)
+
+    if not query_grams(query):
+        return json_response({'success': False, 'message': '查询参数 q 中没有汉字'}, 400)
+
+    started = time.perf_counter()
+    index = get_dictionary()
+    results, total = index.reverse(query, pos=pos, limit=limit, offset=offset)
+
+    return ApiResponse({
+        'success': True,
+        'data': {
+            'matches': [{**compact_entry(entry), 'match': text} for entry, text in results],
+            'total': total,
+        },
+        'meta': {
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+    }, 200, headers=CACHE_HEADERS)
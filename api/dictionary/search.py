@@ -0,0 +1,91 @@
+"""
+词典查询API - 使用服务器端的内存索引（lib/dictionary）查询单词
+
+GET /api/dictionary/search?q=abon&pos=noun&mode=all&limit=10&offset=0
+- mode=exact：只做精确匹配；mode=prefix：只做前缀匹配；默认两者都返回
+- pos：词性分类（noun、verb ...）或词性缩写（n. m.、v. t. ...）；只传 pos 时按字母顺序列出该词性的词条
+- data.exact 为完整词条（含释义和例句），data.matches 为紧凑格式的前缀匹配结果
+- 查询忽略重音和大小写（eleve 可以找到 élève）：没有完全相同的词时 exact 取折叠键相同的第一个词条，
+  data.folded 为 true，其余同折叠键的词条出现在 matches 中
+- 变化形式（suis、allions、chevaux）：data.inflections 为按原形分组的词形还原结果
+  [{lemma, tags: [...], labels: [中文说明]}]，没有完全相同的词时 exact 取第一个原形的词条，data.lemmatized 为 true
+- 仍然没有匹配时（offset=0），data.suggestions 为编辑距离 2 以内的拼写纠错候选（紧凑格式，距离近的在前）
+"""
+import time
+from lib.utils import ApiResponse, int_arg, json_response
+from lib.dictionary import get_dictionary, compact_entry
+from lib.inflection import describe_tags
+
+MAX_LIMIT = 50
+SUGGESTION_LIMIT = 5
+MODES = ('all', 'exact', 'prefix')
+# 词典数据只在重新部署时变化，允许浏览器和 CDN 缓存查询结果
+CACHE_HEADERS = {'Cache-Control': 'public, max-age=3600'}
+
+
+def _inflection_groups(analyses):
+    """[(原形词条, [标签, ...])] -> data.inflections"""
+    return [{'lemma': entry['word'], 'tags': tags, 'labels': [describe_tags(t) for t in tags]}
+            for entry, tags in analyses]
+
+
+def handler(request):
+    method = (getattr(request, 'method', None) or 'GET').upper()
+    if method == 'OPTIONS':
+        return json_response({}, 200)
+    if method != 'GET':
+        return json_response({'success': False, 'message': 'Method not allowed'}, 405)
+
+    if isinstance(request, dict):
+        args = request.get('queryStringParameters') or {}
+    else:
+        args = getattr(request, 'args', None) or {}
+    query = (args.get('q') or '').strip()
+    pos = (args.get('pos') or '').strip() or None
+    mode = args.get('mode') or 'all'
+    limit = int_arg(args, 'limit', 10, 1, MAX_LIMIT)
+    offset = int_arg(args, 'offset', 0, 0, 100000)
+
+    if mode not in MODES:
+        return json_response({'success': False, 'message': f'无效的 mode: {mode}'}, 400)
+    if not query and not pos:
+        return json_response({'success': False, 'message': '缺少查询参数 q 或 pos'}, 400)
+
+    started = time.perf_counter()
+    index = get_dictionary()
+    exact = None
+    folded = False
+    lemmatized = False
+    analyses = []
+    if query and mode != 'prefix':
+        exact = index.lookup(query, pos=pos)
+        analyses = [(entry, tags) for entry, tags in index.lemmas(query)
+                    if not pos or index.lookup(entry['word'], pos=pos)]
+        if exact is None and analyses:
+            exact, lemmatized = analyses[0][0], True
+        if exact is None:
+            candidates = index.lookup_folded(query, pos=pos)
+            if candidates:
+                exact, folded = candidates[0], True
+    matches = []
+    if mode != 'exact':
+        matches = [compact_entry(entry) for entry in index.prefix(query, pos=pos, limit=limit, offset=offset)]
+    suggestions = []
+    if query and mode != 'prefix' and exact is None and offset == 0:
+        suggestions = [compact_entry(entry) for entry in index.suggest(query, pos=pos, limit=SUGGESTION_LIMIT)]
+
+    return ApiResponse({
+        'success': True,
+        'data': {
+            'exact': exact,
+            'folded': folded,
+            'lemmatized': lemmatized,
+            'inflections': _inflection_groups(analyses),
+            'matches': matches,
+            'suggestions': suggestions,
+        },
+        'meta': {
+            'total': len(index),
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+    }, 200, headers=CACHE_HEADERS)
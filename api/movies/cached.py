@@ -1,9 +1,60 @@
 """
 电影缓存API - 返回数据库中缓存的电影列表
 支持分页、筛选和排序
+
+分页方式：
+- 游标分页（推荐）：传入上一页返回的 nextCursor 作为 cursor 参数，
+  按 (rating, year, id) 做 keyset 查询，任意深度的页面耗时都相同（仅 API，前端目前只取第一页）
+- 页码分页（兼容旧客户端）：page/limit，使用 OFFSET
+总数按 (type, category, min_rating) 缓存在进程内（min_rating 取一位小数，缓存条数有上限），
+缓存表被 update_movies_cache 重写（max(updated_at) 变化）后才重新 COUNT。
 """
 import json
-from lib.utils import json_response, get_db_cursor
+import base64
+from lib.cache import TTLCache
+from lib.utils import int_arg, json_response, db_cursor
+
+# 排序键：与 idx_cached_movies_keyset 索引一致（year 为空时视为 0，排在最后）
+SORT_KEY_SQL = 'rating, COALESCE(year, 0), id'
+ORDER_CLAUSE = 'rating DESC, COALESCE(year, 0) DESC, id DESC'
+
+# 总数缓存：{(type, category, min_rating): (table_version, total)}；
+# 键来自查询参数，用 LRU 限制条数，避免任意 min_rating 让缓存无限增长
+_totals_cache = TTLCache(maxsize=256, ttl=24 * 60 * 60)
+
+def invalidate_totals_cache():
+    """清空总数缓存（缓存表重写后调用）"""
+    _totals_cache.clear()
+
+def encode_cursor(row):
+    """将一行的排序键编码为不透明的游标"""
+    key = [str(row['rating']), row.get('year') or 0, row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """解析游标，返回 (rating, year, id)；无效时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rating, year, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return str(float(rating)), int(year), int(row_id)
+    except Exception:
+        raise ValueError('无效的分页游标')
+
+def get_cached_total(cur, cache_key, where_clause, params):
+    """获取总数，表未变化时直接使用缓存"""
+    cur.execute("SELECT MAX(updated_at) AS version FROM cached_movies")
+    version = cur.fetchone()['version']
+    cached = _totals_cache.get(cache_key)
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    cur.execute(f"""
+    SELECT COUNT(*) FROM cached_movies
+    WHERE {where_clause}
+    """, params)
+    total = cur.fetchone()['count']
+    _totals_cache.set(cache_key, (version, total))
+    return total
 
 def handler(request):
     """处理电影缓存API请求"""
@@ -34,11 +85,18 @@ def handler(request):
             return json_response({'success': False, 'message': 'Method not allowed'}, 405)
         
         # 解析查询参数
-        page = int(query_params.get('page', 1))
-        limit = min(int(query_params.get('limit', 25)), 100)  # 最多100条
+        page = int_arg(query_params, 'page', 1, 1, 1000000)
+        limit = int_arg(query_params, 'limit', 25, 1, 100)  # 最多100条
         movie_type = query_params.get('type', 'mixed')  # movie, tv, mixed
         category = query_params.get('category', 'all')  # recent, classic, all
-        min_rating = float(query_params.get('min_rating', 7.5))
+        # 评分为 0~10，取一位小数（也是总数缓存键的一部分）
+        min_rating = max(0.0, min(10.0, round(float(query_params.get('min_rating', 7.5)), 1)))
+        cursor = query_params.get('cursor', '')
+        
+        try:
+            after_key = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return json_response({'success': False, 'message': str(e)}, 400)
         
         # 构建SQL查询
         where_conditions = ['rating >= %s']
@@ -49,7 +107,7 @@ def handler(request):
             where_conditions.append('type = %s')
             params.append(movie_type)
         
-        # 分类筛选
+        # 分类筛选（分类已作为过滤条件，排序中无需再按分类字段排序）
         if category == 'recent':
             where_conditions.append('is_recent = TRUE')
         elif category == 'classic':
@@ -57,27 +115,17 @@ def handler(request):
         
         where_clause = ' AND '.join(where_conditions)
         
-        # 排序逻辑
-        order_by = []
-        if category == 'recent':
-            order_by.append('is_recent DESC')
-        elif category == 'classic':
-            order_by.append('is_classic DESC')
-        order_by.extend(['rating DESC', 'year DESC NULLS LAST'])
-        order_clause = ', '.join(order_by)
-        
-        # 计算总数
-        count_sql = f"""
-        SELECT COUNT(*) FROM cached_movies
-        WHERE {where_clause}
-        """
-        
-        cur = get_db_cursor()
-        cur.execute(count_sql, params)
-        total = cur.fetchone()['count']
+        # 分页条件：有游标时使用 keyset，否则兼容 OFFSET
+        page_conditions = list(where_conditions)
+        page_params = list(params)
+        if after_key:
+            page_conditions.append(f'({SORT_KEY_SQL}) < (%s::numeric, %s, %s)')
+            page_params.extend(after_key)
+            offset = 0
+        else:
+            offset = (page - 1) * limit
         
-        # 分页查询
-        offset = (page - 1) * limit
+        # 多取一条用于判断是否还有下一页
         query_sql = f"""
         SELECT 
             id, tmdb_id, type, title, original_title, year, release_date,
@@ -86,19 +134,20 @@ def handler(request):
             director, genres, runtime, seasons, episodes, media_info,
             is_recent, is_classic
         FROM cached_movies
-        WHERE {where_clause}
-        ORDER BY {order_clause}
+        WHERE {' AND '.join(page_conditions)}
+        ORDER BY {ORDER_CLAUSE}
         LIMIT %s OFFSET %s
         """
         
-        cur.execute(query_sql, params + [limit, offset])
-        rows = cur.fetchall()
+        with db_cursor() as cur:
+            cur.execute(query_sql, page_params + [limit + 1, offset])
+            rows = cur.fetchall()
+            
+            total = get_cached_total(cur, (movie_type, category, min_rating), where_clause, params)
         
-        # 关闭游标和连接
-        conn = cur.connection
-        cur.close()
-        if conn and not conn.closed:
-            conn.close()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]) if has_more and rows else None
         
         # 转换为前端需要的格式
         movies = []
@@ -144,7 +193,9 @@ def handler(request):
                     'page': page,
                     'limit': limit,
                     'total': total,
-                    'totalPages': total_pages
+                    'totalPages': total_pages,
+                    'hasMore': has_more,
+                    'nextCursor': next_cursor
                 }
             }
         })
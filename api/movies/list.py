@@ -3,10 +3,103 @@
 """
 import json
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from lib import http_client
 from lib.utils import json_response
+from lib.cache import TTLCache
+from lib.rate_limit import get_limiter, parse_retry_after
 
 TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
+TMDB_RATE_LIMIT = float(os.environ.get('TMDB_RATE_LIMIT', 20))  # 每秒请求数
+DETAIL_WORKERS = 8
+
+# 进程内缓存：discover 列表变化较快，详情信息基本不变
+DISCOVER_CACHE_TTL = 10 * 60
+DETAIL_CACHE_TTL = 24 * 60 * 60
+_discover_cache = TTLCache(maxsize=256, ttl=DISCOVER_CACHE_TTL)
+_detail_cache = TTLCache(maxsize=4096, ttl=DETAIL_CACHE_TTL)
+
+# 详情请求共享线程池与 TMDB 限流器（与电影缓存更新任务共用配额）
+_detail_executor = ThreadPoolExecutor(max_workers=DETAIL_WORKERS)
+_tmdb_limiter = get_limiter('tmdb', TMDB_RATE_LIMIT)
+# 429 后最多重试一次；Retry-After 超过 http_client.BACKOFF_MAX 时不等待，直接返回（用户请求不宜久等）
+TMDB_429_RETRIES = 1
+
+def tmdb_get(url, params, timeout):
+    """经过共享限流器请求 TMDB，返回 requests.Response
+
+    429 时按 Retry-After 暂停共享限流器（与 update_movies_cache 相同），
+    并发获取详情的其他线程也会一起等待，不再继续请求 TMDB。
+    """
+    for attempt in range(TMDB_429_RETRIES + 1):
+        _tmdb_limiter.acquire()
+        # 429 由这里暂停限流器处理，连接错误和 5xx 交给 http_client 重试
+        response = http_client.get(url, params=params, timeout=timeout, upstream='tmdb',
+                                   retry_on_status=http_client.RETRY_STATUSES - {429})
+        if response.status_code != 429:
+            return response
+        wait = parse_retry_after(response.headers.get('Retry-After'), default=2 ** attempt)
+        _tmdb_limiter.pause(wait)
+        if attempt >= TMDB_429_RETRIES or wait > http_client.BACKOFF_MAX:
+            return response
+
+def fetch_discover(content_type, params):
+    """获取 discover 列表，返回 (data, status_code)；成功结果缓存 DISCOVER_CACHE_TTL 秒"""
+    cache_key = (content_type, tuple(sorted((k, str(v)) for k, v in params.items() if k != 'api_key')))
+    data = _discover_cache.get(cache_key)
+    if data is not None:
+        return data, 200
+    
+    response = tmdb_get(f'https://api.themoviedb.org/3/discover/{content_type}', params, timeout=10)
+    if not response.ok:
+        return None, response.status_code
+    data = response.json()
+    _discover_cache.set(cache_key, data)
+    return data, 200
+
+def fetch_details(content_type, item_id):
+    """获取单个影视的详细信息（导演、类型、评语等），失败返回 None；成功结果缓存 DETAIL_CACHE_TTL 秒"""
+    cache_key = (content_type, item_id)
+    details = _detail_cache.get(cache_key)
+    if details is not None:
+        return details
+    
+    try:
+        detail_url = f'https://api.themoviedb.org/3/{content_type}/{item_id}'
+        detail_params = {
+            'api_key': TMDB_API_KEY,
+            'language': 'fr-FR',
+            'append_to_response': 'credits'
+        }
+        detail_response = tmdb_get(detail_url, detail_params, timeout=5)
+        if not detail_response.ok:
+            return None
+        detail_data = detail_response.json()
+    except Exception:
+        # 如果获取详情失败，继续使用基础数据
+        return None
+    
+    details = {
+        'tagline': detail_data.get('tagline', ''),
+        'runtime': detail_data.get('runtime', 0),
+        'genres': detail_data.get('genres', []),
+        'number_of_seasons': detail_data.get('number_of_seasons', 0),
+        'number_of_episodes': detail_data.get('number_of_episodes', 0),
+        'created_by': detail_data.get('created_by', [])
+    }
+    
+    # 提取导演/创作者
+    if content_type == 'movie' and detail_data.get('credits', {}).get('crew'):
+        director = next((c['name'] for c in detail_data['credits']['crew'] if c.get('job') == 'Director'), '')
+        if director:
+            details['director'] = director
+    elif content_type == 'tv' and detail_data.get('created_by'):
+        creator = detail_data['created_by'][0]['name'] if detail_data['created_by'] else ''
+        if creator:
+            details['creator'] = creator
+    
+    _detail_cache.set(cache_key, details)
+    return details
 
 def handler(request):
     # 获取请求方法（兼容不同的 request 对象格式）
@@ -89,8 +182,6 @@ def handler(request):
                 content_type = content_type_param
         
         # 服务器代理TMDB API
-        url = f'https://api.themoviedb.org/3/discover/{content_type}'
-        
         # 根据类型和category设置不同的参数
         if content_type == 'movie':
             params = {
@@ -123,56 +214,20 @@ def handler(request):
                 params['first_air_date.lte'] = f'{current_year - 5}-12-31'
                 params['vote_count.gte'] = 100  # 经典剧集需要更多评分
         
-        response = requests.get(url, params=params, timeout=10)
+        data, status_code = fetch_discover(content_type, params)
         
-        if response.ok:
-            data = response.json()
+        if data is not None:
             # 处理数据，添加poster完整URL和media_type
-            # 增加返回数量，确保有足够的数据
-            results = data.get('results', [])[:30]
+            # 增加返回数量，确保有足够的数据；复制条目，避免修改缓存中的对象
+            results = [dict(item) for item in data.get('results', [])[:30]]
+            
+            # 并发获取每个项目的详细信息（包括导演、类型、评语等），受共享限流器约束
+            all_details = _detail_executor.map(lambda item: fetch_details(content_type, item['id']), results)
             
-            # 为每个项目获取详细信息（包括导演、类型、评语等）
             detailed_results = []
-            import time
-            for idx, item in enumerate(results):
-                try:
-                    # 获取详细信息（所有项目都获取）
-                    detail_url = f'https://api.themoviedb.org/3/{content_type}/{item["id"]}'
-                    detail_params = {
-                        'api_key': TMDB_API_KEY,
-                        'language': 'fr-FR',
-                        'append_to_response': 'credits'
-                    }
-                    detail_response = requests.get(detail_url, params=detail_params, timeout=5)
-                    
-                    if detail_response.ok:
-                        detail_data = detail_response.json()
-                        # 合并详细信息
-                        item.update({
-                            'tagline': detail_data.get('tagline', ''),
-                            'runtime': detail_data.get('runtime', 0),
-                            'genres': detail_data.get('genres', []),
-                            'number_of_seasons': detail_data.get('number_of_seasons', 0),
-                            'number_of_episodes': detail_data.get('number_of_episodes', 0),
-                            'created_by': detail_data.get('created_by', [])
-                        })
-                        
-                        # 提取导演/创作者
-                        if content_type == 'movie' and detail_data.get('credits', {}).get('crew'):
-                            director = next((c['name'] for c in detail_data['credits']['crew'] if c.get('job') == 'Director'), '')
-                            if director:
-                                item['director'] = director
-                        elif content_type == 'tv' and detail_data.get('created_by'):
-                            creator = detail_data['created_by'][0]['name'] if detail_data['created_by'] else ''
-                            if creator:
-                                item['creator'] = creator
-                    
-                    # 避免API限流，稍微延迟
-                    if idx < len(results) - 1:
-                        time.sleep(0.1)
-                except Exception as e:
-                    # 如果获取详情失败，继续使用基础数据
-                    pass
+            for item, details in zip(results, all_details):
+                if details:
+                    item.update(details)
                 
                 # 处理poster路径
                 if item.get('poster_path'):
@@ -186,7 +241,7 @@ def handler(request):
                 'data': detailed_results
             })
         else:
-            return json_response({'success': False, 'message': f'TMDB API错误: {response.status_code}'}, 500)
+            return json_response({'success': False, 'message': f'TMDB API错误: {status_code}'}, 500)
             
     except Exception as e:
         return json_response({'success': False, 'message': str(e)}, 500)
@@ -2,11 +2,42 @@
 TMDB API代理 - 直接代理TMDB API请求
 """
 import os
-import requests
-from lib.utils import json_response
+import re
+from lib import http_client
+from lib.utils import ApiResponse, json_response
+from lib.cache import TTLCache
 
 TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
 
+# 按端点类型设置缓存时间（秒）：列表类结果变化快，单个影视详情基本不变
+CACHE_TTL_RULES = [
+    (re.compile(r'^/(discover|search|trending)/'), 10 * 60),
+    (re.compile(r'^/(movie|tv)/\d+(/|$)'), 24 * 60 * 60),
+    (re.compile(r'^/genre/'), 24 * 60 * 60),
+]
+DEFAULT_CACHE_TTL = 30 * 60
+
+_response_cache = TTLCache(maxsize=1024, ttl=DEFAULT_CACHE_TTL)
+
+def cache_ttl_for(endpoint):
+    """返回端点对应的缓存时间"""
+    for pattern, ttl in CACHE_TTL_RULES:
+        if pattern.match(endpoint):
+            return ttl
+    return DEFAULT_CACHE_TTL
+
+def cache_key_for(endpoint, params):
+    """缓存键：规范化的端点路径 + 排序后的查询参数（不含 api_key）"""
+    normalized = '/' + endpoint.strip('/')
+    query = tuple(sorted((k, str(v)) for k, v in params.items() if k != 'api_key'))
+    return normalized, query
+
+def fetch_tmdb(url, params):
+    """调用TMDB API，返回 (status_code, body_bytes)"""
+    print(f"DEBUG: Calling TMDB API: {url} with params keys: {list(params.keys())}")
+    response = http_client.get(url, params=params, timeout=10, upstream='tmdb')
+    return response.status_code, response.content
+
 def handler(request):
     try:
         if isinstance(request, dict):
@@ -99,21 +130,25 @@ def handler(request):
         params = {'api_key': TMDB_API_KEY, 'language': 'fr-FR'}
         params.update(query_params)
         
-        print(f"DEBUG: Calling TMDB API: {url} with params keys: {list(params.keys())}")
-        
-        # 调用TMDB API
-        response = requests.get(url, params=params, timeout=10)
+        # 调用TMDB API：成功响应按端点类型缓存，并发的相同请求只向上游发起一次
+        status_code, body = _response_cache.get_or_load(
+            cache_key_for(endpoint, params),
+            lambda: fetch_tmdb(url, params),
+            ttl=cache_ttl_for(endpoint),
+            cache_if=lambda result: 200 <= result[0] < 300
+        )
         
-        if response.ok:
-            return json_response(response.json())
+        if 200 <= status_code < 300:
+            # 直接透传TMDB返回的JSON，不再解析和重新序列化
+            return ApiResponse(body=body)
         else:
-            error_text = response.text[:200] if response.text else 'No error text'
-            print(f"ERROR: TMDB API returned {response.status_code}: {error_text}")
+            error_text = body[:200].decode('utf-8', errors='replace') if body else 'No error text'
+            print(f"ERROR: TMDB API returned {status_code}: {error_text}")
             return json_response({
                 'success': False, 
-                'message': f'TMDB API错误: {response.status_code}',
+                'message': f'TMDB API错误: {status_code}',
                 'tmdb_error': error_text
-            }, response.status_code)
+            }, status_code)
             
     except Exception as e:
         import traceback
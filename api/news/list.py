@@ -1,83 +1,165 @@
 """
-新闻列表API - 代理RSS源
+新闻列表API - 从内存中的新闻缓存返回结果
+
+新闻由后台线程定期抓取（复用 scripts/server/update_data.parse_rss），请求只读内存，
+从不等待上游 RSS 源：数据过期时返回旧数据并在后台触发一次刷新（stale-while-revalidate）。
+进程刚启动、内存为空时先用 update_data 生成的 public/data/news.json 兜底。
 """
 import json
-import requests
-import xml.etree.ElementTree as ET
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from lib.utils import json_response
+from scripts.server.update_data import NEWS_SOURCES, DATA_DIR, parse_rss, date_parser
+
+# 新闻过期时间（秒）：超过后下一次请求会触发后台刷新；后台线程也按这个间隔轮询
+NEWS_REFRESH_INTERVAL = int(os.environ.get('NEWS_REFRESH_INTERVAL', 600))
+NEWS_LIMIT = 10           # 接口最多返回的条数
+NEWS_PER_SOURCE = 3       # 每个源最多保留的条数
+
+_fetch_executor = ThreadPoolExecutor(max_workers=len(NEWS_SOURCES))
+
+_store_lock = threading.Lock()
+_store = {
+    'items': [],
+    'sources': [],
+    'updated_at': None,   # 最近一次成功刷新的时间（UNIX 时间戳）
+}
+_refreshing = threading.Event()
+_poller_started = False
+
+
+def _timestamp(item):
+    try:
+        return date_parser.parse(item.get('pubDate', '')).timestamp()
+    except Exception:
+        return 0.0
+
+
+def _fetch_source(source):
+    """抓取单个源，返回 (新闻列表, 源信息)"""
+    started = time.monotonic()
+    items = parse_rss(source['url'], source['name'])[:NEWS_PER_SOURCE]
+    return items, {
+        'source': source['name'],
+        'ok': bool(items),
+        'count': len(items),
+        'elapsedMs': round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+def refresh_news():
+    """并发抓取所有新闻源并替换内存中的新闻；全部失败时保留旧数据"""
+    results = list(_fetch_executor.map(_fetch_source, NEWS_SOURCES))
+    items = [item for source_items, _ in results for item in source_items]
+    sources = [meta for _, meta in results]
+    if not items:
+        print("新闻刷新失败：所有源都没有返回数据，继续使用旧数据")
+        with _store_lock:
+            _store['sources'] = sources
+        return False
+    items.sort(key=_timestamp, reverse=True)
+    with _store_lock:
+        _store['items'] = items
+        _store['sources'] = sources
+        _store['updated_at'] = time.time()
+    return True
+
+
+def _refresh_in_background():
+    """触发一次后台刷新；已有刷新在进行时直接返回"""
+    with _store_lock:
+        if _refreshing.is_set():
+            return
+        _refreshing.set()
+
+    def run():
+        try:
+            refresh_news()
+        except Exception as e:
+            print(f"新闻刷新出错: {e}")
+        finally:
+            _refreshing.clear()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _load_snapshot():
+    """从 update_data 生成的 news.json 加载数据，作为进程启动时的兜底"""
+    try:
+        with open(DATA_DIR / 'news.json', encoding='utf-8') as f:
+            data = json.load(f)
+        items = data.get('news') or []
+        if not items:
+            return
+        updated_at = datetime.fromisoformat(data['updated_at'].replace('Z', '+00:00')).timestamp()
+    except Exception:
+        return
+    with _store_lock:
+        if _store['updated_at'] is None:
+            _store['items'] = items
+            _store['updated_at'] = updated_at
+
+
+def get_news():
+    """返回 (新闻列表, 元信息)；数据过期或为空时触发后台刷新，但不等待"""
+    with _store_lock:
+        items = _store['items']
+        sources = _store['sources']
+        updated_at = _store['updated_at']
+    age = time.time() - updated_at if updated_at is not None else None
+    stale = age is None or age > NEWS_REFRESH_INTERVAL
+    if stale:
+        _refresh_in_background()
+    return items, {
+        'updatedAt': datetime.fromtimestamp(updated_at).isoformat() if updated_at is not None else None,
+        'ageSeconds': round(age, 1) if age is not None else None,
+        'stale': stale,
+        'refreshing': _refreshing.is_set(),
+        'sources': sources,
+    }
+
+
+def start_news_poller():
+    """启动后台轮询线程：立即刷新一次，之后每 NEWS_REFRESH_INTERVAL 秒刷新"""
+    global _poller_started
+    with _store_lock:
+        if _poller_started:
+            return
+        _poller_started = True
+
+    def poll():
+        while True:
+            _refresh_in_background()
+            time.sleep(NEWS_REFRESH_INTERVAL)
+
+    threading.Thread(target=poll, daemon=True).start()
+    print(f"✓ 新闻后台刷新任务已启动（每{NEWS_REFRESH_INTERVAL}秒刷新一次）")
+
+
+_load_snapshot()
 
-NEWS_SOURCES = [
-    'https://www.france24.com/fr/rss',
-    'https://www.lemonde.fr/rss/une.xml',
-    'https://www.franceinfo.fr/rss',
-    'https://www.20minutes.fr/rss/une.xml',
-    'https://www.rfi.fr/fr/rss'
-]
 
 def handler(request):
     # 获取请求方法（兼容不同的 request 对象格式）
     method = getattr(request, 'method', None) or getattr(request, 'httpMethod', None) or 'GET'
     method = method.upper()
-    
+
     # 处理 CORS 预检请求
     if method == 'OPTIONS':
         return json_response({}, 200)
-    
+
     if method != 'GET':
         return json_response({'success': False, 'message': 'Method not allowed'}, 405)
-    
+
     try:
-        all_news = []
-        
-        for rss_url in NEWS_SOURCES[:3]:  # 限制3个源
-            try:
-                # 服务器可以访问外网
-                response = requests.get(rss_url, timeout=10, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                if response.ok:
-                    root = ET.fromstring(response.content)
-                    items = root.findall('.//item')[:3]  # 每个源3条
-                    
-                    for item in items:
-                        title = item.find('title')
-                        link = item.find('link')
-                        desc = item.find('description')
-                        pub_date = item.find('pubDate')
-                        
-                        if title is not None and link is not None:
-                            # 清理描述中的HTML标签
-                            description = (desc.text or '').replace('<[^>]*>', '')[:200] if desc is not None else ''
-                            
-                            all_news.append({
-                                'title': title.text or '',
-                                'link': link.text or '',
-                                'description': description,
-                                'source': rss_url.split('/')[2].replace('www.', '').split('.')[0],
-                                'pubDate': pub_date.text if pub_date is not None else datetime.now().isoformat(),
-                                'formattedDate': format_date(pub_date.text if pub_date is not None else datetime.now().isoformat())
-                            })
-            except Exception as e:
-                print(f"Error fetching {rss_url}: {e}")
-                continue
-        
+        items, meta = get_news()
         return json_response({
             'success': True,
-            'data': all_news[:10]  # 最多10条
+            'data': items[:NEWS_LIMIT],
+            'meta': meta
         })
-        
     except Exception as e:
         return json_response({'success': False, 'message': str(e)}, 500)
-
-def format_date(date_str):
-    """格式化日期"""
-    try:
-        from dateutil import parser
-        dt = parser.parse(date_str)
-        return dt.strftime('%Y-%m-%d %H:%M')
-    except:
-        return date_str
-
-
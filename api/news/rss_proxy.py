@@ -4,6 +4,7 @@ RSS代理API - 后端代理RSS请求，解决CORS问题
 import os
 import json
 import requests
+from lib import http_client
 from lib.utils import json_response
 
 def handler(request):
@@ -59,7 +60,7 @@ def handler(request):
             'Accept': 'application/rss+xml, application/xml, text/xml, */*'
         }
         
-        response = requests.get(rss_url, headers=headers, timeout=10)
+        response = http_client.get(rss_url, headers=headers, timeout=10)
         
         if response.status_code != 200:
             return json_response({
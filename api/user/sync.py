@@ -1,10 +1,309 @@
 """
 用户数据同步API - 获取用户的AI聊天记录和收藏夹
+
+增量同步：GET 带上次返回的 cursor（?since=...）时只返回之后修改过的行，
+以及 deleted 中的删除记录（墓碑）；不带 since 时返回全部数据。
+POST 的 deleted 字段用于上报删除，服务器删除对应行并记录墓碑。
 """
 import os
 import json
+import hashlib
 import jwt
-from lib.utils import get_db_connection, verify_token
+from datetime import datetime, timedelta, timezone
+from psycopg2.extras import execute_values
+from lib.utils import ApiResponse, db_connection, json_response, verify_token
+
+# 支持删除同步的数据类型（与 sync_tombstones.kind 对应）
+SYNC_KINDS = {
+    'dict_favorites': ('dict_favorites', 'word'),
+    'expression_favorites': ('expression_favorites', 'expression_id'),
+    'vocab_progress': ('vocab_progress', 'word'),
+}
+# 游标回退的时间：覆盖游标生成时尚未提交的并发事务，重复返回的行由客户端按键合并
+CURSOR_OVERLAP = timedelta(seconds=5)
+# 单次上传最多处理的聊天消息数（客户端只保留最近 50 条）
+CHAT_UPLOAD_LIMIT = 50
+# 全量同步返回的最近聊天消息数
+CHAT_SYNC_LIMIT = 100
+
+def parse_timestamp(value):
+    """解析客户端时间（毫秒/秒时间戳或 ISO 字符串），返回带时区的 datetime；无法解析时返回 None"""
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000 if value > 1e10 else value, tz=timezone.utc)
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (ValueError, OverflowError, OSError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def get_since(request):
+    """读取 since 游标；缺失或无效时返回 None（全量同步）"""
+    if isinstance(request, dict):
+        args = request.get('queryStringParameters') or {}
+    else:
+        args = getattr(request, 'args', None) or {}
+    value = args.get('since')
+    if not value:
+        return None
+    dt = parse_timestamp(value)
+    return dt - CURSOR_OVERLAP if dt else None
+
+def load_tombstones(cursor, user_id, kind):
+    """返回该类型的墓碑 {item_key: deleted_at}"""
+    cursor.execute("""
+        SELECT item_key, deleted_at FROM sync_tombstones
+        WHERE user_id = %s AND kind = %s
+    """, (user_id, kind))
+    return dict(cursor.fetchall())
+
+def deleted_after(tombstones, key, client_time):
+    """条目是否在客户端修改之后被删除（其他设备上传的旧数据不能让已删除的条目复活）"""
+    deleted_at = tombstones.get(key)
+    return deleted_at is not None and (client_time is None or client_time <= deleted_at)
+
+def clear_tombstones(cursor, user_id, kind, keys):
+    """重新添加的条目删除对应墓碑"""
+    if keys:
+        cursor.execute("""
+            DELETE FROM sync_tombstones
+            WHERE user_id = %s AND kind = %s AND item_key = ANY(%s)
+        """, (user_id, kind, list(keys)))
+
+def chat_message_rows(user_id, messages):
+    """把客户端上传的聊天消息转换为待插入的行 (user_id, client_id, role, content, 客户端时间)
+
+    客户端为每条消息生成 id；旧版本留下的没有 id 的消息按角色和内容生成确定的 id，
+    同一批中重复的角色和内容（"ok"、"继续"）按出现顺序追加 -2、-3 ...（与 init.sql 中回填旧记录的规则一致），
+    重复上传同一条消息不会产生新行。
+    """
+    rows = []
+    occurrences = {}
+    for msg in messages[-CHAT_UPLOAD_LIMIT:]:
+        if not isinstance(msg, dict) or 'role' not in msg or 'content' not in msg:
+            continue
+        role, content = str(msg['role']), str(msg['content'])
+        client_id = msg.get('id')
+        if client_id in (None, ''):
+            digest = hashlib.md5(f"{role}:{content}".encode('utf-8')).hexdigest()
+            rn = occurrences[digest] = occurrences.get(digest, 0) + 1
+            client_id = f'legacy-{digest}' + (f'-{rn}' if rn > 1 else '')
+        created_at = parse_timestamp(msg.get('createdAt') or msg.get('created_at'))
+        rows.append((user_id, str(client_id), role, content, created_at))
+    return rows
+
+# 插入未见过的消息；created_at 取客户端时间（不晚于服务器时间，缺失时为服务器时间），
+# 早于清理水位线（chat_history_trims，trim_chat_history 删除过的最新消息时间）的消息不再插入，
+# 客户端本地仍保留的已清理消息重新上传时不会复活
+CHAT_INSERT_SQL = """
+    INSERT INTO ai_chat_history (user_id, client_id, role, content, created_at)
+    SELECT v.user_id, v.client_id, v.role, v.content, v.created_at
+    FROM (VALUES %s) AS v (user_id, client_id, role, content, created_at)
+    WHERE v.created_at > COALESCE(
+        (SELECT trimmed_through FROM chat_history_trims t WHERE t.user_id = v.user_id),
+        '-infinity'::timestamptz
+    )
+    ON CONFLICT (user_id, client_id) DO NOTHING
+"""
+
+def append_chat_messages(cursor, user_id, messages):
+    """只追加服务器上还没有的消息：一条 INSERT ... ON CONFLICT DO NOTHING，返回新增条数"""
+    rows = chat_message_rows(user_id, messages)
+    if not rows:
+        return 0
+    # LEAST 忽略 NULL：没有客户端时间时取 clock_timestamp()，逐行取值，同一批消息保持上传时的先后顺序
+    execute_values(cursor, CHAT_INSERT_SQL, rows,
+                   template='(%s::uuid, %s, %s, %s, LEAST(%s::timestamptz, clock_timestamp()))',
+                   page_size=CHAT_UPLOAD_LIMIT)
+    return cursor.rowcount
+
+def apply_deletions(cursor, user_id, deleted):
+    """删除客户端上报的条目并记录墓碑"""
+    for kind, keys in deleted.items():
+        if kind not in SYNC_KINDS or not isinstance(keys, list):
+            continue
+        keys = [str(k) for k in keys if k not in (None, '')]
+        if not keys:
+            continue
+        table, key_column = SYNC_KINDS[kind]
+        cursor.execute(
+            f"DELETE FROM {table} WHERE user_id = %s AND {key_column} = ANY(%s)",
+            (user_id, keys)
+        )
+        cursor.execute("""
+            INSERT INTO sync_tombstones (user_id, kind, item_key)
+            SELECT %s, %s, unnest(%s::text[])
+            ON CONFLICT (user_id, kind, item_key)
+            DO UPDATE SET deleted_at = CURRENT_TIMESTAMP
+        """, (user_id, kind, keys))
+
+# 批量 UPSERT：内容没变时不更新 updated_at，增量同步不会重复返回未修改的行
+EXPRESSION_UPSERT_SQL = """
+    INSERT INTO expression_favorites (user_id, expression_id, expression_data)
+    VALUES %s
+    ON CONFLICT (user_id, expression_id)
+    DO UPDATE SET expression_data = EXCLUDED.expression_data, updated_at = CURRENT_TIMESTAMP
+    WHERE expression_favorites.expression_data IS DISTINCT FROM EXCLUDED.expression_data
+"""
+DICT_UPSERT_SQL = """
+    INSERT INTO dict_favorites (user_id, word, phonetic, pos)
+    VALUES %s
+    ON CONFLICT (user_id, word)
+    DO UPDATE SET phonetic = EXCLUDED.phonetic, pos = EXCLUDED.pos, updated_at = CURRENT_TIMESTAMP
+    WHERE (dict_favorites.phonetic, dict_favorites.pos) IS DISTINCT FROM (EXCLUDED.phonetic, EXCLUDED.pos)
+"""
+# 客户端没有上传 lastReview 时 last_review 为 NULL，保留已保存的值（不能用当前时间，否则每次上传都算修改）
+VOCAB_UPSERT_SQL = """
+    INSERT INTO vocab_progress (user_id, word, quality, count, last_review)
+    VALUES %s
+    ON CONFLICT (user_id, word)
+    DO UPDATE SET
+        quality = EXCLUDED.quality,
+        count = EXCLUDED.count,
+        last_review = COALESCE(EXCLUDED.last_review, vocab_progress.last_review),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (vocab_progress.quality, vocab_progress.count, vocab_progress.last_review)
+        IS DISTINCT FROM (EXCLUDED.quality, EXCLUDED.count,
+                          COALESCE(EXCLUDED.last_review, vocab_progress.last_review))
+"""
+UPSERT_PAGE_SIZE = 1000
+
+def normalize_expression_favorites(items):
+    """语用收藏 -> {expression_id: (客户端时间, (expression_id, expression_data))}"""
+    rows = {}
+    for fav in items:
+        if isinstance(fav, dict) and fav.get('id'):
+            expr_id = str(fav['id'])
+            rows[expr_id] = (parse_timestamp(fav.get('favoritedAt')), (expr_id, json.dumps(fav)))
+    return rows
+
+def normalize_dict_favorites(items):
+    """词典收藏 -> {word: (客户端时间, (word, phonetic, pos))}"""
+    rows = {}
+    for fav in items:
+        if isinstance(fav, dict) and fav.get('word'):
+            word = fav['word']
+            pos = fav.get('pos', {})
+            pos = pos if isinstance(pos, str) else json.dumps(pos)
+            rows[word] = (parse_timestamp(fav.get('addedAt')), (word, fav.get('phonetic', ''), pos))
+    return rows
+
+def normalize_vocab_progress(data):
+    """背单词进度（字典格式 {word: {quality, count, lastReview}} 或数组格式）
+    -> {word: (客户端时间, (word, quality, count, last_review))}"""
+    if isinstance(data, dict):
+        entries = data.items()
+    else:
+        entries = ((item.get('word'), item) for item in data if isinstance(item, dict))
+    rows = {}
+    for word, progress in entries:
+        if not word or not isinstance(progress, dict):
+            continue
+        last_review = parse_timestamp(progress.get('lastReview') or progress.get('last_review'))
+        rows[word] = (last_review, (word, progress.get('quality', 0), progress.get('count', 0), last_review))
+    return rows
+
+def filter_tombstoned(cursor, user_id, kind, rows):
+    """去掉删除时间晚于客户端修改时间的条目，清除重新添加的条目的墓碑，返回待写入的行"""
+    tombstones = load_tombstones(cursor, user_id, kind)
+    if not tombstones:
+        return [row for _, row in rows.values()]
+    kept, revived = [], []
+    for key, (client_time, row) in rows.items():
+        if deleted_after(tombstones, key, client_time):
+            continue
+        if key in tombstones:
+            revived.append(key)
+        kept.append(row)
+    clear_tombstones(cursor, user_id, kind, revived)
+    return kept
+
+def _upsert(cursor, sql, user_id, rows, template):
+    if rows:
+        execute_values(cursor, sql, [(user_id,) + row for row in rows],
+                       template=template, page_size=UPSERT_PAGE_SIZE)
+    return len(rows)
+
+def upsert_expression_favorites(cursor, user_id, items):
+    rows = filter_tombstoned(cursor, user_id, 'expression_favorites', normalize_expression_favorites(items))
+    return _upsert(cursor, EXPRESSION_UPSERT_SQL, user_id, rows, '(%s, %s, %s::jsonb)')
+
+def upsert_dict_favorites(cursor, user_id, items):
+    rows = filter_tombstoned(cursor, user_id, 'dict_favorites', normalize_dict_favorites(items))
+    return _upsert(cursor, DICT_UPSERT_SQL, user_id, rows, '(%s, %s, %s, %s::jsonb)')
+
+def upsert_vocab_progress(cursor, user_id, data):
+    rows = filter_tombstoned(cursor, user_id, 'vocab_progress', normalize_vocab_progress(data))
+    return _upsert(cursor, VOCAB_UPSERT_SQL, user_id, rows, '(%s, %s, %s, %s, %s)')
+
+def _sync_document_sql(incremental):
+    """生成同步文档查询：一次往返由 PostgreSQL 组装整个响应 JSON（::text 避免驱动再解析一遍）
+
+    - cursor 为事务开始时间 now()，下次同步只取之后修改过的行
+    - 聊天记录只追加，按写入服务器的时间 synced_at 增量获取（created_at 是客户端时间，可能早于上次同步）；
+      取最近的 chat_limit 条后按 created_at 正序返回
+    - 删除记录（墓碑）全量同步也返回：本地可能还留着在其他设备上删除的条目
+    """
+    changed = ' AND updated_at > %(since)s' if incremental else ''
+    chat_since = ' AND synced_at > %(since)s' if incremental else ''
+    tombstone_since = ' AND deleted_at > %(since)s' if incremental else ''
+    deleted = ', '.join(f"""
+                '{kind}', COALESCE((
+                    SELECT json_agg(item_key) FROM sync_tombstones
+                    WHERE user_id = %(user_id)s AND kind = '{kind}'{tombstone_since}
+                ), '[]'::json)""" for kind in SYNC_KINDS)
+    return f"""
+        SELECT json_build_object(
+            'success', TRUE,
+            'data', json_build_object(
+                'chat_history', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'id', client_id, 'role', role, 'content', content, 'created_at', created_at
+                    ) ORDER BY created_at)
+                    FROM (
+                        SELECT client_id, role, content, created_at
+                        FROM ai_chat_history
+                        WHERE user_id = %(user_id)s{chat_since}
+                        ORDER BY created_at DESC
+                        LIMIT %(chat_limit)s
+                    ) recent
+                ), '[]'::json),
+                'expression_favorites', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'expression_data', COALESCE(expression_data, '{{}}'::jsonb),
+                        'favorited_at', favorited_at
+                    ) ORDER BY favorited_at DESC)
+                    FROM expression_favorites
+                    WHERE user_id = %(user_id)s{changed}
+                ), '[]'::json),
+                'dict_favorites', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'word', word,
+                        'phonetic', phonetic,
+                        'pos', CASE WHEN jsonb_typeof(pos) = 'object' THEN pos ELSE '{{}}'::jsonb END,
+                        'added_at', added_at
+                    ) ORDER BY added_at DESC)
+                    FROM dict_favorites
+                    WHERE user_id = %(user_id)s{changed}
+                ), '[]'::json),
+                'vocab_progress', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'word', word, 'quality', quality, 'count', count, 'last_review', last_review
+                    ) ORDER BY last_review DESC NULLS LAST)
+                    FROM vocab_progress
+                    WHERE user_id = %(user_id)s{changed}
+                ), '[]'::json),
+                'deleted', json_build_object({deleted}
+                )
+            ),
+            'cursor', now(),
+            'full', {'FALSE' if incremental else 'TRUE'}
+        )::text
+    """
+
+FULL_SYNC_DOCUMENT_SQL = _sync_document_sql(incremental=False)
+SYNC_DOCUMENT_SQL = _sync_document_sql(incremental=True)
 
 def handler(request):
     if request.method == 'GET':
@@ -12,154 +311,52 @@ def handler(request):
     elif request.method == 'POST':
         return handle_post_sync(request)
     else:
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': False,
-                'message': 'Method not allowed'
-            })
-        }
+        return json_response({
+            'success': False,
+            'message': 'Method not allowed'
+        }, 405)
 
 def handle_get_sync(request):
     
     # 验证JWT token
     user_id = verify_user(request)
     if not user_id:
-        return {
-            'statusCode': 401,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': False,
-                'message': '未授权，请先登录'
-            })
-        }
+        return json_response({
+            'success': False,
+            'message': '未授权，请先登录'
+        }, 401)
     
+    since = get_since(request)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 获取AI聊天记录（按时间顺序）
-        cursor.execute("""
-            SELECT role, content, created_at
-            FROM ai_chat_history
-            WHERE user_id = %s
-            ORDER BY created_at ASC
-            LIMIT 100
-        """, (user_id,))
-        chat_records = []
-        for row in cursor.fetchall():
-            chat_records.append({
-                'role': row[0],
-                'content': row[1],
-                'created_at': row[2].isoformat() if row[2] else None
-            })
-        
-        # 获取语用收藏夹
-        cursor.execute("""
-            SELECT expression_data, favorited_at
-            FROM expression_favorites
-            WHERE user_id = %s
-            ORDER BY favorited_at DESC
-        """, (user_id,))
-        expression_favorites = []
-        for row in cursor.fetchall():
-            expr_data = row[0] if isinstance(row[0], dict) else json.loads(row[0]) if row[0] else {}
-            expression_favorites.append({
-                'expression_data': expr_data,
-                'favorited_at': row[1].isoformat() if row[1] else None
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SYNC_DOCUMENT_SQL if since else FULL_SYNC_DOCUMENT_SQL, {
+                'user_id': user_id,
+                'since': since,
+                'chat_limit': CHAT_SYNC_LIMIT,
             })
+            document = cursor.fetchone()[0]
+            cursor.close()
         
-        # 获取词典收藏夹
-        cursor.execute("""
-            SELECT word, phonetic, pos, added_at
-            FROM dict_favorites
-            WHERE user_id = %s
-            ORDER BY added_at DESC
-        """, (user_id,))
-        dict_favorites = []
-        for row in cursor.fetchall():
-            # 处理pos字段：可能是dict、str、list或None
-            pos_data = row[2]
-            if pos_data is None:
-                pos_data = {}
-            elif isinstance(pos_data, dict):
-                pos_data = pos_data
-            elif isinstance(pos_data, str):
-                try:
-                    pos_data = json.loads(pos_data)
-                except:
-                    pos_data = {}
-            elif isinstance(pos_data, list):
-                # 如果是列表，转换为字典格式
-                pos_data = {}
-            else:
-                pos_data = {}
-            
-            dict_favorites.append({
-                'word': row[0],
-                'phonetic': row[1],
-                'pos': pos_data,
-                'added_at': row[3].isoformat() if row[3] else None
-            })
-        
-        # 获取背单词进度
-        cursor.execute("""
-            SELECT word, quality, count, last_review
-            FROM vocab_progress
-            WHERE user_id = %s
-            ORDER BY last_review DESC
-        """, (user_id,))
-        vocab_progress = []
-        for row in cursor.fetchall():
-            vocab_progress.append({
-                'word': row[0],
-                'quality': row[1],
-                'count': row[2],
-                'last_review': row[3].isoformat() if row[3] else None
-            })
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': True,
-                'data': {
-                    'chat_history': chat_records,
-                    'expression_favorites': expression_favorites,
-                    'dict_favorites': dict_favorites,
-                    'vocab_progress': vocab_progress
-                }
-            })
-        }
+        # 数据库返回的已经是完整的响应 JSON，直接作为响应体
+        return ApiResponse(body=document)
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': False,
-                'message': f'服务器错误: {str(e)}'
-            })
-        }
+        return json_response({
+            'success': False,
+            'message': f'服务器错误: {str(e)}'
+        }, 500)
 
 def handle_post_sync(request):
     """处理数据上传（从本地到数据库）"""
     # 验证JWT token
     user_id = verify_user(request)
     if not user_id:
-        return {
-            'statusCode': 401,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': False,
-                'message': '未授权，请先登录'
-            })
-        }
+        return json_response({
+            'success': False,
+            'message': '未授权，请先登录'
+        }, 401)
     
     try:
         # 解析请求体
@@ -170,138 +367,42 @@ def handle_post_sync(request):
             except:
                 body = {}
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 上传AI聊天记录
-        if 'chat_history' in body and isinstance(body['chat_history'], list):
-            chat_messages = body['chat_history']
-            # 先删除用户的所有旧记录（简单策略：全量替换）
-            cursor.execute("DELETE FROM ai_chat_history WHERE user_id = %s", (user_id,))
-            # 插入新记录
-            for msg in chat_messages[-50:]:  # 限制最多50条
-                if isinstance(msg, dict) and 'role' in msg and 'content' in msg:
-                    cursor.execute("""
-                        INSERT INTO ai_chat_history (user_id, role, content)
-                        VALUES (%s, %s, %s)
-                    """, (user_id, msg['role'], msg['content']))
-        
-        # 上传语用收藏夹
-        if 'expression_favorites' in body and isinstance(body['expression_favorites'], list):
-            expr_favorites = body['expression_favorites']
-            for fav in expr_favorites:
-                if isinstance(fav, dict) and fav.get('id'):
-                    expr_id = str(fav.get('id', ''))
-                    expr_data = json.dumps(fav) if not isinstance(fav, str) else fav
-                    # 使用 ON CONFLICT 避免重复
-                    cursor.execute("""
-                        INSERT INTO expression_favorites (user_id, expression_data, expression_id)
-                        VALUES (%s, %s, %s)
-                        ON CONFLICT (user_id, expression_id) 
-                        DO UPDATE SET expression_data = EXCLUDED.expression_data
-                    """, (user_id, expr_data, expr_id))
-        
-        # 上传词典收藏夹
-        if 'dict_favorites' in body and isinstance(body['dict_favorites'], list):
-            dict_favorites = body['dict_favorites']
-            for fav in dict_favorites:
-                if isinstance(fav, dict) and fav.get('word'):
-                    word = fav['word']
-                    phonetic = fav.get('phonetic', '')
-                    pos = json.dumps(fav.get('pos', {})) if not isinstance(fav.get('pos'), str) else fav.get('pos', '{}')
-                    # 使用 ON CONFLICT 避免重复
-                    cursor.execute("""
-                        INSERT INTO dict_favorites (user_id, word, phonetic, pos)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (user_id, word) 
-                        DO UPDATE SET phonetic = EXCLUDED.phonetic, pos = EXCLUDED.pos
-                    """, (user_id, word, phonetic, pos))
-        
-        # 上传背单词进度
-        if 'vocab_progress' in body and isinstance(body['vocab_progress'], (dict, list)):
-            vocab_data = body['vocab_progress']
-            # 支持字典格式 {word: {quality, count, lastReview}}
-            if isinstance(vocab_data, dict):
-                for word, progress in vocab_data.items():
-                    if isinstance(progress, dict) and word:
-                        quality = progress.get('quality', 0)
-                        count = progress.get('count', 0)
-                        last_review = progress.get('lastReview') or progress.get('last_review')
-                        # 转换时间戳为datetime
-                        from datetime import datetime
-                        if last_review:
-                            if isinstance(last_review, (int, float)):
-                                last_review_dt = datetime.fromtimestamp(last_review / 1000 if last_review > 1e10 else last_review)
-                            else:
-                                try:
-                                    last_review_dt = datetime.fromisoformat(str(last_review).replace('Z', '+00:00'))
-                                except:
-                                    last_review_dt = datetime.now()
-                        else:
-                            last_review_dt = datetime.now()
-                        
-                        cursor.execute("""
-                            INSERT INTO vocab_progress (user_id, word, quality, count, last_review)
-                            VALUES (%s, %s, %s, %s, %s)
-                            ON CONFLICT (user_id, word) 
-                            DO UPDATE SET 
-                                quality = EXCLUDED.quality,
-                                count = EXCLUDED.count,
-                                last_review = EXCLUDED.last_review
-                        """, (user_id, word, quality, count, last_review_dt))
-            # 支持数组格式
-            elif isinstance(vocab_data, list):
-                for item in vocab_data:
-                    if isinstance(item, dict) and item.get('word'):
-                        word = item['word']
-                        quality = item.get('quality', 0)
-                        count = item.get('count', 0)
-                        last_review = item.get('last_review') or item.get('lastReview')
-                        from datetime import datetime
-                        if last_review:
-                            if isinstance(last_review, (int, float)):
-                                last_review_dt = datetime.fromtimestamp(last_review / 1000 if last_review > 1e10 else last_review)
-                            else:
-                                try:
-                                    last_review_dt = datetime.fromisoformat(str(last_review).replace('Z', '+00:00'))
-                                except:
-                                    last_review_dt = datetime.now()
-                        else:
-                            last_review_dt = datetime.now()
-                        
-                        cursor.execute("""
-                            INSERT INTO vocab_progress (user_id, word, quality, count, last_review)
-                            VALUES (%s, %s, %s, %s, %s)
-                            ON CONFLICT (user_id, word) 
-                            DO UPDATE SET 
-                                quality = EXCLUDED.quality,
-                                count = EXCLUDED.count,
-                                last_review = EXCLUDED.last_review
-                        """, (user_id, word, quality, count, last_review_dt))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # 先处理删除，再处理上传的数据
+            if isinstance(body.get('deleted'), dict):
+                apply_deletions(cursor, user_id, body['deleted'])
+            
+            # 上传AI聊天记录
+            # 只追加未见过的消息（按客户端消息 ID 去重），旧记录由后台任务清理
+            if 'chat_history' in body and isinstance(body['chat_history'], list):
+                append_chat_messages(cursor, user_id, body['chat_history'])
+            
+            # 收藏夹和背单词进度：每个集合一次遍历完成解析，一条多行 UPSERT 写入
+            if isinstance(body.get('expression_favorites'), list):
+                upsert_expression_favorites(cursor, user_id, body['expression_favorites'])
+            
+            if isinstance(body.get('dict_favorites'), list):
+                upsert_dict_favorites(cursor, user_id, body['dict_favorites'])
+            
+            if isinstance(body.get('vocab_progress'), (dict, list)):
+                upsert_vocab_progress(cursor, user_id, body['vocab_progress'])
+            
+            conn.commit()
+            cursor.close()
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': True,
-                'message': '数据上传成功'
-            })
-        }
+        return json_response({
+            'success': True,
+            'message': '数据上传成功'
+        }, 200)
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': False,
-                'message': f'上传失败: {str(e)}'
-            })
-        }
+        return json_response({
+            'success': False,
+            'message': f'上传失败: {str(e)}'
+        }, 500)
 
 def verify_user(request):
     """验证用户身份，返回user_id或None"""
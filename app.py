@@ -2,13 +2,14 @@
 Flask后端应用 - 用于国内服务器部署
 将Vercel Serverless Functions转换为Flask应用
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
 import json
 import threading
 import time
 from dotenv import load_dotenv
+from lib.utils import ApiResponse, StreamingResponse, CORS_HEADERS, dumps_json, json_response
 
 # 加载环境变量
 load_dotenv()
@@ -64,6 +65,8 @@ try:
     except ImportError as dict_error:
         print(f"警告: 无法导入 dictionary.history: {dict_error}")
         dict_handler = None
+    from api.dictionary.search import handler as dict_search_handler
+    from api.dictionary.reverse import handler as dict_reverse_handler
     from api.config import handler as config_handler
     from api.ai.coze import handler as coze_handler
     from api.ai.deepseek import handler as deepseek_handler
@@ -86,6 +89,7 @@ except ImportError as import_error:
         return placeholder_handler
     placeholder_handler = create_placeholder_handler(error_msg)
     login_handler = register_handler = news_handler = movies_handler = dict_handler = config_handler = placeholder_handler
+    dict_search_handler = dict_reverse_handler = placeholder_handler
     coze_handler = deepseek_handler = placeholder_handler
     admin_users_handler = placeholder_handler
 
@@ -121,37 +125,53 @@ class VercelRequest:
         """提供queryStringParameters属性，用于获取URL参数"""
         return dict(self.args)
 
+def _header_value(headers, name):
+    """大小写不敏感地读取响应头"""
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return ''
+
+def to_flask_response(result):
+    """将处理函数的返回值直接写入 Flask Response（只序列化一次）
+    
+    支持 ApiResponse、StreamingResponse（SSE，边产生边发送）、Vercel 格式字典
+    {'statusCode', 'headers', 'body'} 和普通字典。
+    """
+    if isinstance(result, ApiResponse):
+        response = Response(result.get_body(), status=result.status_code)
+        response.headers.update(result.headers)
+    elif isinstance(result, StreamingResponse):
+        response = Response(result.chunks, status=result.status_code)
+        response.headers.update(result.headers)
+    elif isinstance(result, dict) and 'statusCode' in result:
+        # Vercel格式：body 已是 JSON 字符串时直接透传，不再解析后重新序列化
+        body = result.get('body', '{}')
+        status_code = result.get('statusCode', 200)
+        if isinstance(body, (str, bytes)):
+            if 'json' not in _header_value(result.get('headers'), 'Content-Type'):
+                try:
+                    json.loads(body)
+                except json.JSONDecodeError:
+                    # 如果body不是有效的JSON，包装为JSON消息
+                    body = dumps_json({'message': body, 'raw_body': body})
+        else:
+            body = dumps_json(body)
+        response = Response(body, status=status_code, mimetype='application/json')
+    elif isinstance(result, dict):
+        response = Response(dumps_json(result), status=200, mimetype='application/json')
+    else:
+        return result
+    response.headers.update(CORS_HEADERS)
+    return response
+
 def adapt_handler(handler_func):
     """适配Vercel handler为Flask路由"""
     def wrapper():
         try:
             vercel_request = VercelRequest(request)
-            result = handler_func(vercel_request)
-            
-            # 如果返回的是字典，转换为Flask响应
-            if isinstance(result, dict) and 'statusCode' in result:
-                # 安全地解析JSON body
-                body = result.get('body', '{}')
-                if isinstance(body, str):
-                    try:
-                        body_data = json.loads(body)
-                    except json.JSONDecodeError:
-                        # 如果body不是有效的JSON，直接使用字符串
-                        body_data = {'message': body, 'raw_body': body}
-                else:
-                    body_data = body
-                status_code = result.get('statusCode', 200)
-                response = jsonify(body_data)
-                response.headers['Access-Control-Allow-Origin'] = '*'
-                response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-                response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-                return response, status_code
-            elif isinstance(result, dict):
-                response = jsonify(result)
-                response.headers['Access-Control-Allow-Origin'] = '*'
-                return response, 200
-            else:
-                return result
+            return to_flask_response(handler_func(vercel_request))
         except json.JSONDecodeError as e:
             error_response = {
                 'success': False,
@@ -159,10 +179,7 @@ def adapt_handler(handler_func):
                 'type': 'json_error',
                 'error_code': 'JSON_DECODE_ERROR'
             }
-            response = jsonify(error_response)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Content-Type'] = 'application/json'
-            return response, 400
+            return to_flask_response(json_response(error_response, 400))
         except Exception as e:
             import traceback
             error_msg = str(e)
@@ -177,12 +194,7 @@ def adapt_handler(handler_func):
                 'type': error_type,
                 'error_code': 'ADAPTER_EXCEPTION'
             }
-            response = jsonify(error_response)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Content-Type'] = 'application/json'
-            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-            return response, 500
+            return to_flask_response(json_response(error_response, 500))
     wrapper.__name__ = handler_func.__name__
     return wrapper
 
@@ -223,30 +235,7 @@ def movies_cached():
     if request.method == 'OPTIONS':
         return '', 200
     from api.movies.cached import handler as cached_handler
-    result = cached_handler(request)
-    
-    # 处理响应
-    if isinstance(result, dict) and 'statusCode' in result:
-        body = result.get('body', '{}')
-        if isinstance(body, str):
-            try:
-                body_data = json.loads(body)
-            except:
-                body_data = {'message': body}
-        else:
-            body_data = body
-        status_code = result.get('statusCode', 200)
-        response = jsonify(body_data)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        return response, status_code
-    elif isinstance(result, dict):
-        response = jsonify(result)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response, 200
-    else:
-        return result
+    return to_flask_response(cached_handler(request))
 
 @app.route('/api/movies/tmdb/<path:endpoint>', methods=['GET', 'OPTIONS'])
 def movies_tmdb(endpoint):
@@ -290,32 +279,7 @@ def movies_tmdb(endpoint):
         wrapped_request = RequestWrapper(vercel_request, full_endpoint)
         
         # 直接调用handler并处理响应
-        result = tmdb_handler(wrapped_request)
-        
-        # 处理handler返回的响应
-        if isinstance(result, dict) and 'statusCode' in result:
-            # Vercel格式响应
-            body = result.get('body', '{}')
-            if isinstance(body, str):
-                try:
-                    body_data = json.loads(body)
-                except json.JSONDecodeError:
-                    body_data = {'message': body, 'raw_body': body}
-            else:
-                body_data = body
-            status_code = result.get('statusCode', 200)
-            response = jsonify(body_data)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-            return response, status_code
-        elif isinstance(result, dict):
-            # 直接字典响应
-            response = jsonify(result)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response, 200
-        else:
-            return result
+        return to_flask_response(tmdb_handler(wrapped_request))
     except Exception as e:
         import traceback
         error_msg = str(e)
@@ -343,6 +307,18 @@ def dictionary_history():
         return jsonify({'success': False, 'message': 'Dictionary handler not loaded'}), 500
     return adapt_handler(dict_handler)()
 
+@app.route('/api/dictionary/search', methods=['GET', 'OPTIONS'])
+def dictionary_search():
+    if request.method == 'OPTIONS':
+        return '', 200
+    return adapt_handler(dict_search_handler)()
+
+@app.route('/api/dictionary/reverse', methods=['GET', 'OPTIONS'])
+def dictionary_reverse():
+    if request.method == 'OPTIONS':
+        return '', 200
+    return adapt_handler(dict_reverse_handler)()
+
 @app.route('/api/user/sync', methods=['GET', 'POST', 'OPTIONS'])
 def user_sync():
     if request.method == 'OPTIONS':
@@ -417,7 +393,17 @@ def serve_static(path):
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'message': 'French AI Learning Hub Backend'})
+    from lib.utils import db_pool_stats, token_cache_stats
+    from lib import http_client
+    from api.ai.deepseek import prompt_cache_stats as deepseek_cache_stats
+    return jsonify({
+        'status': 'ok',
+        'message': 'French AI Learning Hub Backend',
+        'db_pool': db_pool_stats(),
+        'upstreams': http_client.stats(),
+        'deepseek_cache': deepseek_cache_stats(),
+        'token_cache': token_cache_stats()
+    })
 
 # 后台任务：定期更新电影缓存
 def background_cache_update():
@@ -474,8 +460,45 @@ def background_cache_update():
     initial_thread = threading.Thread(target=initial_update, daemon=True)
     initial_thread.start()
 
+# 后台任务：定期清理聊天记录（同步接口只追加，不删除旧消息）
+def background_chat_trim():
+    from scripts.server.trim_chat_history import trim_chat_history, CHAT_TRIM_INTERVAL
+
+    def trim_task():
+        while True:
+            # 先等待一个周期：避免多个 worker 同时启动时一起执行
+            time.sleep(CHAT_TRIM_INTERVAL)
+            try:
+                trim_chat_history()
+            except Exception as e:
+                print(f"聊天记录清理任务出错: {e}")
+
+    threading.Thread(target=trim_task, daemon=True).start()
+    print(f"✓ 聊天记录清理任务已启动（每{CHAT_TRIM_INTERVAL}秒清理一次）")
+
 # 启动后台任务
-background_cache_update()
+# 以 python app.py 运行时，密码哈希进程池（spawn）的子进程会以 __mp_main__ 重新导入本模块，子进程中不启动
+if __name__ != '__mp_main__':
+    background_cache_update()
+    
+    # 新闻由后台线程刷新，/api/news/list 只读内存
+    try:
+        from api.news.list import start_news_poller
+        start_news_poller()
+    except Exception as e:
+        print(f"新闻后台刷新任务启动失败: {e}")
+
+    # 词典索引在后台构建，/api/dictionary/search 的第一次查询不必等待
+    try:
+        from lib.dictionary import warm_dictionary
+        warm_dictionary()
+    except Exception as e:
+        print(f"词典索引预热失败: {e}")
+
+    try:
+        background_chat_trim()
+    except Exception as e:
+        print(f"聊天记录清理任务启动失败: {e}")
 
 if __name__ == '__main__':
     # 开发环境：从环境变量读取端口，如果没有则使用8000（本地开发）
@@ -61,6 +61,7 @@ CREATE TABLE IF NOT EXISTS dict_favorites (
     phonetic TEXT,
     pos JSONB,  -- 词性信息（JSON格式）
     added_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- 最后修改时间（增量同步）
     CONSTRAINT unique_user_favorite_word UNIQUE(user_id, word)
 );
 
@@ -78,6 +79,7 @@ CREATE TABLE IF NOT EXISTS vocab_progress (
     quality INTEGER DEFAULT 0,  -- 0=生疏, 1=模糊, 2=熟练
     count INTEGER DEFAULT 0,    -- 复习次数
     last_review TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- 最后修改时间（增量同步）
     CONSTRAINT unique_user_vocab_word UNIQUE(user_id, word)
 );
 
@@ -114,6 +116,7 @@ CREATE TABLE IF NOT EXISTS expression_favorites (
     expression_data JSONB NOT NULL,  -- 存储完整的表达数据（场景、表达、翻译等）
     expression_id TEXT,  -- 从 expression_data 中提取的 id（用于唯一约束）
     favorited_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- 最后修改时间（增量同步）
     -- 唯一约束：同一用户不能重复收藏相同的表达
     CONSTRAINT unique_user_expression_favorite UNIQUE(user_id, expression_id)
 );
@@ -130,7 +133,9 @@ CREATE TABLE IF NOT EXISTS ai_chat_history (
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     role VARCHAR(20) NOT NULL,  -- 'user' 或 'assistant'
     content TEXT NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    client_id TEXT,  -- 客户端生成的消息 ID，用于去重（只追加未见过的消息）
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- 客户端创建消息的时间
+    synced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP  -- 写入服务器的时间（增量同步游标）
 );
 
 -- 索引：按用户查询聊天记录（按时间顺序）
@@ -210,6 +215,63 @@ CREATE INDEX IF NOT EXISTS idx_cached_movies_recent ON cached_movies(is_recent)
 CREATE INDEX IF NOT EXISTS idx_cached_movies_classic ON cached_movies(is_classic) WHERE is_classic = TRUE;
 CREATE INDEX IF NOT EXISTS idx_cached_movies_year ON cached_movies(year DESC);
 CREATE INDEX IF NOT EXISTS idx_cached_movies_updated ON cached_movies(updated_at DESC);
+-- 索引：游标分页（与 /api/movies/cached 的 ORDER BY rating DESC, COALESCE(year, 0) DESC, id DESC 一致）
+CREATE INDEX IF NOT EXISTS idx_cached_movies_keyset ON cached_movies(rating DESC, (COALESCE(year, 0)) DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_cached_movies_type_keyset ON cached_movies(type, rating DESC, (COALESCE(year, 0)) DESC, id DESC);
+
+-- ============================================
+-- 12. 增量同步 (/api/user/sync?since=...)
+-- ============================================
+-- 已有数据库补充 updated_at 列（新建的表已包含该列）
+ALTER TABLE dict_favorites ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE vocab_progress ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE expression_favorites ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+-- 索引：按用户查询某个时间点之后修改过的行（聊天记录使用 idx_ai_chat_user_synced）
+CREATE INDEX IF NOT EXISTS idx_dict_favorites_user_updated ON dict_favorites(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_vocab_progress_user_updated ON vocab_progress(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_expression_favorites_user_updated ON expression_favorites(user_id, updated_at);
+
+-- 删除记录（墓碑）：让其他设备在增量同步时得知哪些收藏/进度已被删除
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind VARCHAR(32) NOT NULL,  -- 'dict_favorites' / 'expression_favorites' / 'vocab_progress'
+    item_key TEXT NOT NULL,  -- 单词或 expression_id
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, kind, item_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_user_time ON sync_tombstones(user_id, deleted_at);
+
+-- ============================================
+-- 13. 聊天记录只追加
+-- ============================================
+-- 上传时按客户端消息 ID 插入未见过的消息（ON CONFLICT DO NOTHING），不再先删后插；
+-- 旧消息由后台任务按条数/天数清理（scripts/server/trim_chat_history.py）
+ALTER TABLE ai_chat_history ADD COLUMN IF NOT EXISTS client_id TEXT;
+
+-- 已有记录按角色和内容生成与服务器相同规则的 ID（legacy-md5(role:content)），重复内容追加序号
+UPDATE ai_chat_history h
+SET client_id = 'legacy-' || md5(h.role || ':' || h.content) || CASE WHEN d.rn > 1 THEN '-' || d.rn ELSE '' END
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY user_id, role, content ORDER BY created_at) AS rn
+    FROM ai_chat_history
+    WHERE client_id IS NULL
+) d
+WHERE h.id = d.id;
+
+-- 唯一索引：同一用户的同一条消息只保存一次
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_chat_user_client ON ai_chat_history(user_id, client_id);
+
+-- created_at 保存客户端的消息时间，增量同步改用写入服务器的时间
+ALTER TABLE ai_chat_history ADD COLUMN IF NOT EXISTS synced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX IF NOT EXISTS idx_ai_chat_user_synced ON ai_chat_history(user_id, synced_at);
+
+-- 清理水位线：trim_chat_history 删除过的最新消息时间，不晚于它的消息重新上传时不再插入
+CREATE TABLE IF NOT EXISTS chat_history_trims (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    trimmed_through TIMESTAMP WITH TIME ZONE NOT NULL
+);
 
 -- ============================================
 -- 10. 初始化数据
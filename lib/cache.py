@@ -0,0 +1,133 @@
+"""
+进程内缓存 - 线程安全的 TTL + LRU 缓存
+"""
+import time
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class _Flight:
+    """一次正在进行中的加载（供 singleflight 合并并发请求）"""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """线程安全的进程内缓存
+
+    - 每个条目有独立的过期时间（默认 ttl 秒）
+    - 超过 maxsize 时淘汰最久未使用的条目（LRU）
+    - get_or_load() 合并并发的相同请求（singleflight）：同一个 key 同时只加载一次
+    - stats() 返回命中、未命中、淘汰、合并次数等指标
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (过期时间, value)
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> _Flight
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'loads': 0, 'coalesced': 0}
+
+    def get(self, key, default=None):
+        """读取未过期的缓存值，不存在时返回 default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """写入缓存，ttl 为空时使用默认过期时间"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_load(self, key, loader, ttl=None, cache_if=None, with_source=False):
+        """读取缓存，未命中时调用 loader() 加载并写入缓存
+
+        并发请求同一个 key 时只有第一个调用方执行 loader，其余调用方等待并共享结果
+        （包括异常）。cache_if(value) 返回 False 时结果只共享给等待方，不写入缓存。
+        with_source 为 True 时返回 (value, 来源)，来源为 'cache'（缓存命中）、
+        'coalesced'（等待其他调用方的加载结果）或 'loaded'（本次调用执行了 loader）。
+        """
+        def result(value, source):
+            return (value, source) if with_source else value
+
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return result(value, 'cache')
+
+        with self._lock:
+            # 加锁后再检查一次：可能刚有其他线程加载完成
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return result(entry[1], 'cache')
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats['loads'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not is_leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return result(flight.value, 'coalesced')
+
+        try:
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(key, value, ttl)
+            flight.value = value
+            return result(value, 'loaded')
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """返回缓存指标"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+            stats['maxsize'] = self.maxsize
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
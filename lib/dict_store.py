@@ -0,0 +1,468 @@
+"""
+二进制词典文件 - 由 lib.dictionary.ensure_store 在部署或第一次加载时生成（也可以运行
+scripts/tools/convert_public_dict.py --binary-only），查询时通过 mmap 读取
+
+JSON 词典需要解析几兆字节的文本并创建大量小对象，每个 gunicorn worker 各持有一份；
+二进制文件只映射到内存，查询时二分查找排序好的键表，只解码需要返回的词条，
+各 worker 共享操作系统的同一份页缓存。
+
+文件格式（小端序）：
+    文件头    magic(8) version(u32) 段数(u32)，之后是段目录：名称(8) 偏移(u64) 长度(u64)
+    字符串池  n(u32) offsets(u32[n+1]) 数据
+    键表      n(u32) key_offsets(u32[n+1]) value_offsets(u32[n+1]) values(u32[]) 键数据
+              键为 UTF-8 字节并按字节序排序，每个键对应 values 中的一段 u32 列表
+    哈希表    n(u32) hashes(u32[n]) value_offsets(u32[n+1]) values(u32[])
+              不保存键本身，hashes 为键的 CRC32 并升序排列；冲突的键合并为同一个列表，由调用方验证
+    哈希索引  n(u32) slots(u32[n])，n 为 2 的幂；键表中编号为 i 的键放在 CRC32 & (n-1) 起线性探测的第一个空位，
+              空位为 0xffffffff；查找时比较键表中的键，平均 O(1) 次比较
+段：
+    META      元信息 JSON（含源文件指纹 fingerprint，与 lib.dictionary.source_fingerprint 不同时重新生成）
+    ENTRIES   字符串池：词条的紧凑 JSON，词条按 (折叠键, 小写单词) 排序，编号即排序位置
+    WORDS     键表：小写单词 -> [词条编号]；带复数说明的词条另以去掉说明的单词为键（同名的词条优先）
+    FOLDED    键表：折叠键（lib.dictionary.fold_key，忽略重音和大小写）-> 升序的词条编号列表；
+              各键的编号依次递增，前缀相同的键对应一段连续的编号
+    DELETES   哈希表：折叠键前缀删除至多 2 个字符的变体（lib.spelling.deletes）-> FOLDED 中的键编号，
+              删除次数和前缀长度记录在 META 中
+    POS       键表：词性分类或缩写 -> 升序的词条编号列表
+    TAGS      字符串池：变位标签（indicative present first-person singular ...）
+    INFLECT   键表：小写的变化形式 -> [原形词条编号, 标签编号, ...]（lib.dictionary.inflection_table）
+    INFLHASH  INFLECT 的哈希索引
+    RDOCS     n(u32) 之后每条释义 3 个 u32：词条编号、释义下标 * 2 + 是否例句、汉字数（lib.reverse_index）
+    RGRAMS    键表：汉字 n-gram -> [RPOSTS 中的偏移, 字节数]
+    RGRAMHSH  RGRAMS 的哈希索引
+    RPOSTS    倒排表：升序的 RDOCS 编号，差值 + varint 编码，文档数和平均汉字数记录在 META 中
+"""
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+from lib import spelling, reverse_index
+from lib.dictionary import (fold_key, inflection_table, load_inflections, merge_entries, pos_keys, sort_key,
+                            source_fingerprint)
+
+MAGIC = b'FRDICT\x00\x00'
+VERSION = 6
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<8sQQ')
+_U32 = struct.Struct('<I')
+_EMPTY_SLOT = 0xffffffff
+
+
+# ---------- 写入 ----------
+
+def _u32_bytes(values):
+    data = array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _pad(data):
+    """补齐到 4 字节，后续的 u32 数组保持对齐"""
+    return data + b'\x00' * (-len(data) % 4)
+
+
+def pack_string_pool(strings):
+    offsets = [0]
+    blob = bytearray()
+    for value in strings:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return _pad(_u32_bytes([len(strings)]) + _u32_bytes(offsets) + bytes(blob))
+
+
+def pack_key_table(items):
+    """items: {键: [u32, ...]}，按键的 UTF-8 字节排序写入"""
+    pairs = sorted((key.encode('utf-8'), values) for key, values in items.items())
+    key_offsets, value_offsets, values = [0], [0], []
+    blob = bytearray()
+    for key, key_values in pairs:
+        blob += key
+        key_offsets.append(len(blob))
+        values.extend(key_values)
+        value_offsets.append(len(values))
+    header = _u32_bytes([len(pairs)]) + _u32_bytes(key_offsets) + _u32_bytes(value_offsets)
+    return _pad(header + _u32_bytes(values) + bytes(blob))
+
+
+def hash_key(key):
+    return zlib.crc32(key.encode('utf-8'))
+
+
+def pack_hash_table(items):
+    """items: {键: [u32, ...]}，按键的 CRC32 排序写入"""
+    buckets = {}
+    for key, key_values in items.items():
+        buckets.setdefault(hash_key(key), set()).update(key_values)
+    hashes = sorted(buckets)
+    value_offsets, values = [0], []
+    for h in hashes:
+        values.extend(sorted(buckets[h]))
+        value_offsets.append(len(values))
+    return _u32_bytes([len(hashes)]) + _u32_bytes(hashes) + _u32_bytes(value_offsets) + _u32_bytes(values)
+
+
+def pack_hash_index(keys):
+    """键表的哈希索引，keys 为与 pack_key_table 相同的键集合；负载不超过 3/4"""
+    keys = sorted(key.encode('utf-8') for key in keys)
+    size = 1
+    while size * 3 < len(keys) * 4:
+        size *= 2
+    slots = [_EMPTY_SLOT] * size
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & (size - 1)
+        while slots[slot] != _EMPTY_SLOT:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = i
+    return _u32_bytes([size]) + _u32_bytes(slots)
+
+
+def write_store(path, sections):
+    """sections: [(名称, bytes)]，写入带段目录的二进制文件
+
+    先写临时文件再替换：多个 worker 同时生成时，读取方不会映射到写了一半的文件。
+    """
+    directory_size = _HEADER.size + _SECTION.size * len(sections)
+    offset = directory_size
+    directory = bytearray(_HEADER.pack(MAGIC, VERSION, len(sections)))
+    for name, data in sections:
+        directory += _SECTION.pack(name.encode('ascii').ljust(8, b'\x00'), offset, len(data))
+        offset += len(data)
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(directory)
+            for _, data in sections:
+                f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return offset
+
+
+def build_store(path, words_by_pos, source='', inflections=None, fingerprint=None):
+    """由 {词性分类: 词条列表} 生成二进制词典文件，返回 (词条数, 文件大小)
+
+    inflections 为变位表（见 lib.dictionary.load_inflections），默认读取 inflections.json，没有时按规则生成；
+    fingerprint 为源文件指纹，默认为 public/data/dicts 当前的指纹。
+    """
+    entries, categories = merge_entries(words_by_pos)
+    if inflections is None:
+        inflections = load_inflections()
+    # 词条编号 = 按 (折叠键, 小写单词) 的排序位置：折叠键前缀匹配的结果是一段连续的编号
+    # （str 按码位排序，与 UTF-8 字节序一致）
+    order = sorted(range(len(entries)), key=lambda i: sort_key(entries[i]['word']))
+    words = {}
+    folded = {}
+    pos_ids = {}
+    payloads = []
+    for entry_id, i in enumerate(order):
+        entry = entries[i]
+        words[entry['word'].lower()] = [entry_id]
+        folded.setdefault(sort_key(entry['word'])[0], []).append(entry_id)
+        for pos in pos_keys(entry, categories[i]):
+            pos_ids.setdefault(pos, []).append(entry_id)
+        payloads.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+    for entry_id, i in enumerate(order):
+        words.setdefault(sort_key(entries[i]['word'])[1], [entry_id])
+
+    entry_ids = {i: entry_id for entry_id, i in enumerate(order)}
+    tags = {}
+    inflect = {}
+    for form, analyses in inflection_table(entries, categories, inflections).items():
+        values = inflect[form] = []
+        for i, tag in analyses:
+            values += [entry_ids[i], tags.setdefault(tag, len(tags))]
+
+    documents, postings = reverse_index.build_documents([entries[i] for i in order])
+    doc_values = [len(documents)]
+    for entry_id, def_index, example, length in documents:
+        doc_values += [entry_id, def_index * 2 + example, length]
+    grams = {}
+    blob = bytearray()
+    for gram, doc_ids in postings.items():
+        data = reverse_index.encode_postings(doc_ids)
+        grams[gram] = [len(blob), len(data)]
+        blob += data
+
+    # 折叠键按编号顺序即为 FOLDED 键表中的顺序
+    deletes = {}
+    for key_id, key in enumerate(folded):
+        for variant in spelling.deletes(key):
+            deletes.setdefault(variant, []).append(key_id)
+
+    meta = {
+        'count': len(entries),
+        'source': source,
+        'generated_at': datetime.now().isoformat() + 'Z',
+        'fingerprint': fingerprint or source_fingerprint(),
+        'spelling': {
+            'max_distance': spelling.MAX_EDIT_DISTANCE,
+            'prefix_length': spelling.PREFIX_LENGTH,
+        },
+        'reverse': {
+            'documents': len(documents),
+            'average_length': sum(doc[3] for doc in documents) / len(documents) if documents else 1,
+        },
+    }
+    size = write_store(path, [
+        ('META', pack_string_pool([json.dumps(meta, ensure_ascii=False)])),
+        ('ENTRIES', pack_string_pool(payloads)),
+        ('WORDS', pack_key_table(words)),
+        ('FOLDED', pack_key_table(folded)),
+        ('DELETES', pack_hash_table(deletes)),
+        ('POS', pack_key_table(pos_ids)),
+        ('TAGS', pack_string_pool(list(tags))),
+        ('INFLECT', pack_key_table(inflect)),
+        ('INFLHASH', pack_hash_index(inflect)),
+        ('RDOCS', _u32_bytes(doc_values)),
+        ('RGRAMS', pack_key_table(grams)),
+        ('RGRAMHSH', pack_hash_index(grams)),
+        ('RPOSTS', _pad(bytes(blob))),
+    ])
+    return len(entries), size
+
+
+# ---------- 读取 ----------
+
+class StringPool:
+    def __init__(self, view, offset):
+        count = _U32.unpack_from(view, offset)[0]
+        start = offset + 4
+        self.offsets = view[start:start + 4 * (count + 1)].cast('I')
+        self.data_start = start + 4 * (count + 1)
+        self.view = view
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def get_bytes(self, i):
+        return self.view[self.data_start + self.offsets[i]:self.data_start + self.offsets[i + 1]]
+
+
+class KeyTable:
+    def __init__(self, view, offset):
+        count = _U32.unpack_from(view, offset)[0]
+        start = offset + 4
+        self.key_offsets = view[start:start + 4 * (count + 1)].cast('I')
+        start += 4 * (count + 1)
+        self.value_offsets = view[start:start + 4 * (count + 1)].cast('I')
+        start += 4 * (count + 1)
+        value_count = self.value_offsets[count]
+        self.all_values = view[start:start + 4 * value_count].cast('I')
+        self.keys_start = start + 4 * value_count
+        self.view = view
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def key(self, i):
+        return bytes(self.view[self.keys_start + self.key_offsets[i]:self.keys_start + self.key_offsets[i + 1]])
+
+    def values(self, i):
+        return self.all_values[self.value_offsets[i]:self.value_offsets[i + 1]]
+
+    def lower_bound(self, key):
+        """第一个 >= key 的位置（key 为 bytes）"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, key):
+        """精确查找，返回 u32 列表（memoryview）或 None"""
+        key = key.encode('utf-8')
+        i = self.lower_bound(key)
+        if i < self.count and self.key(i) == key:
+            return self.values(i)
+        return None
+
+
+class HashTable:
+    def __init__(self, view, offset):
+        count = _U32.unpack_from(view, offset)[0]
+        start = offset + 4
+        self.hashes = view[start:start + 4 * count].cast('I')
+        start += 4 * count
+        self.value_offsets = view[start:start + 4 * (count + 1)].cast('I')
+        start += 4 * (count + 1)
+        self.all_values = view[start:start + 4 * self.value_offsets[count]].cast('I')
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def get(self, key):
+        """返回 u32 列表（memoryview）或 None；哈希冲突时可能包含其他键的值"""
+        h = hash_key(key)
+        i = bisect_left(self.hashes, h)
+        if i < self.count and self.hashes[i] == h:
+            return self.all_values[self.value_offsets[i]:self.value_offsets[i + 1]]
+        return None
+
+
+class HashIndex:
+    """键表的哈希索引，get 与 KeyTable.get 相同"""
+
+    def __init__(self, view, offset, table):
+        size = _U32.unpack_from(view, offset)[0]
+        self.slots = view[offset + 4:offset + 4 + 4 * size].cast('I')
+        self.mask = size - 1
+        self.table = table
+
+    def get(self, key):
+        key = key.encode('utf-8')
+        slot = zlib.crc32(key) & self.mask
+        while True:
+            i = self.slots[slot]
+            if i == _EMPTY_SLOT:
+                return None
+            if self.table.key(i) == key:
+                return self.table.values(i)
+            slot = (slot + 1) & self.mask
+
+
+class DictionaryStore:
+    """通过 mmap 读取的只读词典，接口与 lib.dictionary.DictionaryIndex 相同"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if sys.byteorder != 'little':
+            raise ValueError('二进制词典只支持小端序平台')
+        magic, version, count = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'不支持的词典文件: {path}')
+        sections = {}
+        for n in range(count):
+            name, offset, _ = _SECTION.unpack_from(view, _HEADER.size + n * _SECTION.size)
+            sections[name.rstrip(b'\x00').decode('ascii')] = offset
+        self.meta = json.loads(bytes(StringPool(view, sections['META']).get_bytes(0)))
+        self.entries = StringPool(view, sections['ENTRIES'])
+        self.words = KeyTable(view, sections['WORDS'])
+        self.folded = KeyTable(view, sections['FOLDED'])
+        self.deletes = HashTable(view, sections['DELETES'])
+        self.pos = KeyTable(view, sections['POS'])
+        tags = StringPool(view, sections['TAGS'])
+        self.tags = [bytes(tags.get_bytes(i)).decode('utf-8') for i in range(len(tags))]
+        self.inflect = HashIndex(view, sections['INFLHASH'], KeyTable(view, sections['INFLECT']))
+        doc_count = _U32.unpack_from(view, sections['RDOCS'])[0]
+        self.documents = view[sections['RDOCS'] + 4:sections['RDOCS'] + 4 + 12 * doc_count].cast('I')
+        self.grams = HashIndex(view, sections['RGRAMHSH'], KeyTable(view, sections['RGRAMS']))
+        self.postings = view[sections['RPOSTS']:]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def entry(self, entry_id):
+        return json.loads(bytes(self.entries.get_bytes(entry_id)))
+
+    def _has_pos(self, entry_id, pos):
+        ids = self.pos.get(pos)
+        if ids is None:
+            return False
+        i = bisect_left(ids, entry_id)
+        return i < len(ids) and ids[i] == entry_id
+
+    def lookup(self, word, pos=None):
+        """精确匹配（不区分大小写），返回完整词条或 None；pos 为词性分类或缩写"""
+        ids = self.words.get(word.strip().lower())
+        if ids is None or (pos and not self._has_pos(ids[0], pos)):
+            return None
+        return self.entry(ids[0])
+
+    def lemmas(self, word):
+        """词形还原：返回 [(原形词条, [标签, ...])]，word 不是已知的变化形式时返回空列表"""
+        values = self.inflect.get(word.strip().lower())
+        if values is None:
+            return []
+        # 同一个原形通常有多个标签（allions：未完成过去时和虚拟式），合并为一项，每个词条只解码一次
+        groups = {}
+        for k in range(0, len(values), 2):
+            entry_id = values[k]
+            if entry_id not in groups:
+                groups[entry_id] = (self.entry(entry_id), [])
+            groups[entry_id][1].append(self.tags[values[k + 1]])
+        return list(groups.values())
+
+    def lookup_folded(self, word, pos=None):
+        """忽略重音和大小写匹配，返回折叠键相同的所有词条"""
+        ids = self.folded.get(fold_key(word))
+        if ids is None:
+            return []
+        return [self.entry(i) for i in ids if not pos or self._has_pos(i, pos)]
+
+    def suggest(self, word, pos=None, limit=5):
+        """拼写纠错：返回编辑距离不超过 2 的词条，距离近的在前"""
+        options = self.meta['spelling']
+        results = []
+        for _, key_id in spelling.suggest(
+                fold_key(word),
+                lambda variant: self.deletes.get(variant) or (),
+                lambda key_id: self.folded.key(key_id).decode('utf-8'),
+                limit=None if pos else limit,
+                max_distance=options['max_distance'],
+                prefix_length=options['prefix_length']):
+            results.extend(self.entry(i) for i in self.folded.values(key_id)
+                           if not pos or self._has_pos(i, pos))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def _postings(self, gram):
+        values = self.grams.get(gram)
+        if values is None:
+            return []
+        return reverse_index.decode_postings(self.postings[values[0]:values[0] + values[1]])
+
+    def _document(self, doc_id):
+        documents = self.documents
+        i = 3 * doc_id
+        return documents[i], documents[i + 1] >> 1, documents[i + 1] & 1, documents[i + 2]
+
+    def reverse(self, query, pos=None, limit=10, offset=0):
+        """汉法反查：返回 ([(词条, 匹配的释义)], 匹配的词条总数)，相关度高的在前"""
+        options = self.meta['reverse']
+        ranked = reverse_index.search(
+            query, self._postings, self._document, options['documents'], options['average_length'],
+            allowed=(lambda entry_id: self._has_pos(entry_id, pos)) if pos else None)
+        results = []
+        for entry_id, def_index in ranked[offset:offset + limit]:
+            entry = self.entry(entry_id)
+            results.append((entry, entry['definitions'][def_index].get('text') or ''))
+        return results, len(ranked)
+
+    def prefix(self, prefix, pos=None, limit=10, offset=0):
+        """按字母顺序返回以 prefix 开头的词条（忽略重音和大小写）；pos 为词性分类或缩写"""
+        key = fold_key(prefix).encode('utf-8')
+        # 以 key 开头的折叠键位于 [key, key + 0xff) 之间（UTF-8 中不会出现 0xff 字节），
+        # 对应的词条编号是连续的 [first, last)
+        lo = self.folded.lower_bound(key)
+        hi = self.folded.lower_bound(key + b'\xff')
+        first = self.folded.value_offsets[lo]
+        last = self.folded.value_offsets[hi]
+        if not pos:
+            ids = range(first + offset, min(last, first + offset + limit))
+        else:
+            allowed = self.pos.get(pos)
+            if allowed is None:
+                return []
+            j = bisect_left(allowed, first) + offset
+            ids = [allowed[k] for k in range(j, min(len(allowed), j + limit)) if allowed[k] < last]
+        return [self.entry(entry_id) for entry_id in ids]
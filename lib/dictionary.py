@@ -0,0 +1,344 @@
+"""
+词典索引 - 服务器端的法语词典查询（供 /api/dictionary/search 使用）
+
+优先使用二进制词典（lib/dict_store，mmap 读取，各 worker 共享页缓存）：文件不在版本库中，
+部署时或第一次加载时由 public/data/dicts/*.json 生成，源文件变化（指纹不同）时重新生成；
+无法生成时（只读文件系统），进程启动时从 JSON 文件构建一次内存索引：
+- 精确匹配：小写单词 -> 词条（同一个词的多个词性合并，与前端 buildIndexes 的规则一致）
+- 忽略重音匹配：折叠键（fold_key，如 élève -> eleve）-> 词条列表，精确匹配失败时使用
+- 前缀匹配：在按折叠键排序的键表上二分查找（输入 "ele" 也能找到 élève），不需要为每个前缀单独建表
+- 词形还原：变位和变格形式 -> 原形词条（lib/inflection，suis -> être、chevaux -> cheval）
+- 拼写纠错：折叠键的删除邻域索引（lib/spelling，SymSpell），返回编辑距离 2 以内的词条
+- 汉法反查：释义文本的汉字 n-gram 倒排索引（lib/reverse_index），丰富 -> abondance
+- 词性筛选：词性分类（noun、verb ...）或词性缩写（n. m.、v. t. ...）-> 词条编号集合
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+
+from lib import spelling, reverse_index
+from lib.inflection import base_form, generate_inflections, lemma_rank, strip_plural_note
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DICT_DIR = BASE_DIR / 'public' / 'data' / 'dicts'
+# 与前端 loadDictionary 加载的文件一致
+POS_FILES = ('noun', 'verb', 'adj', 'adv', 'conj', 'prep', 'pron', 'det')
+# 生成的二进制词典：不放在静态文件目录 public/ 中，也不提交到版本库
+STORE_PATH = Path(os.environ.get('DICT_STORE_PATH') or BASE_DIR / '.cache' / 'dictionary.bin')
+# import_french_dict 从 French-Dictionary 的 CSV 生成的变位表
+INFLECTIONS_PATH = DICT_DIR / 'inflections.json'
+SHORT_DEFINITION_LENGTH = 40
+# casefold 之后仍保留的连字
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+
+
+def fold_key(text):
+    """忽略重音和大小写的查询键：NFD 分解后去掉组合符号，casefold，展开 œ/æ 连字
+
+    eleve、Élève、ÉLÈVE 都折叠为 eleve；cœur 折叠为 coeur。
+    """
+    text = unicodedata.normalize('NFD', text.strip())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.casefold().translate(_LIGATURES)
+
+
+def sort_key(word):
+    """词条的排序键 (折叠键, 小写单词)，也用作折叠键和精确匹配的附加键
+
+    两者都不含名词词条末尾的复数说明：cheval (pl. ~ aux) -> ('cheval', 'cheval')。
+    """
+    word = strip_plural_note(word)
+    return fold_key(word), word.lower()
+
+
+def short_definition(entry):
+    """第一条释义的简短形式（与前端 getShortDefinition 一致）"""
+    definitions = entry.get('definitions') or []
+    if not definitions:
+        return ''
+    text = definitions[0].get('text') or ''
+    # 移除编号
+    text = re.sub(r'^\d+\s*', '', text)
+    text = re.sub(r'^[a-zA-Z]+\s*\([^)]*\)\s*', '', text)
+    if len(text) > SHORT_DEFINITION_LENGTH:
+        text = text[:SHORT_DEFINITION_LENGTH] + '...'
+    return text
+
+
+def compact_entry(entry):
+    """列表结果使用的紧凑格式：不含完整释义和例句"""
+    return {
+        'word': entry['word'],
+        'pos': [p.get('abbr') or p.get('full') for p in entry.get('pos') or []],
+        'gender': entry.get('gender'),
+        'definition': short_definition(entry),
+    }
+
+
+def _merge_entry(existing, entry):
+    """同一个词出现在多个词性文件中时合并词性和释义"""
+    pos_keys = {p.get('abbr') or p.get('full') for p in existing['pos']}
+    for p in entry.get('pos') or []:
+        if (p.get('abbr') or p.get('full')) not in pos_keys:
+            existing['pos'].append(p)
+    texts = {d.get('text') for d in existing['definitions']}
+    for d in entry.get('definitions') or []:
+        if d.get('text') not in texts:
+            existing['definitions'].append(d)
+
+
+def load_word_lists(dict_dir=DICT_DIR):
+    """读取各词性的 JSON 文件，返回 {词性分类: 词条列表}"""
+    words_by_pos = {}
+    for pos_key in POS_FILES:
+        path = Path(dict_dir) / f'{pos_key}.json'
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                words_by_pos[pos_key] = json.load(f).get('words') or []
+    return words_by_pos
+
+
+def merge_entries(words_by_pos):
+    """合并各词性文件中的同一个词，返回 (词条列表, 与词条对应的词性分类集合)"""
+    entries = []
+    categories = []
+    by_word = {}
+    for pos_key, words in words_by_pos.items():
+        for word in words:
+            if not word.get('word'):
+                continue
+            key = word['word'].lower()
+            i = by_word.get(key)
+            if i is None:
+                by_word[key] = len(entries)
+                entries.append({
+                    **word,
+                    'pos': list(word.get('pos') or []),
+                    'definitions': list(word.get('definitions') or []),
+                })
+                categories.append({pos_key})
+            else:
+                _merge_entry(entries[i], word)
+                categories[i].add(pos_key)
+    return entries, categories
+
+
+def load_inflections(path=INFLECTIONS_PATH):
+    """读取变位表 {小写词形: [(原形, 标签)]}，文件不存在时返回 None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        forms = json.load(f).get('forms') or {}
+    return {form: [tuple(analysis) for analysis in analyses] for form, analyses in forms.items()}
+
+
+def inflection_table(entries, categories, inflections=None):
+    """{小写词形: [(词条下标, 标签)]}；inflections 为 load_inflections 的结果，为 None 时按规则生成
+
+    原形按小写单词（含或不含复数说明）或 base_form 对应到词条（aller -> aller¹），与词条本身相同的词形不收录。
+    """
+    if inflections is None:
+        inflections = generate_inflections(entries, categories)
+    ids = {}
+    for i, entry in enumerate(entries):
+        ids.setdefault(entry['word'].lower(), i)
+        ids.setdefault(sort_key(entry['word'])[1], i)
+    for i, entry in enumerate(entries):
+        ids.setdefault(base_form(entry['word']), i)
+    table = {}
+    for form, analyses in inflections.items():
+        form = form.lower()
+        for lemma, tags in analyses:
+            i = ids.get(lemma.lower())
+            if i is None:
+                i = ids.get(base_form(lemma))
+            if i is None or form in (entries[i]['word'].lower(), base_form(entries[i]['word'])):
+                continue
+            if (i, tags) not in table.get(form, ()):
+                table.setdefault(form, []).append((i, tags))
+    for analyses in table.values():
+        analyses.sort(key=lambda analysis: lemma_rank(entries[analysis[0]]['word']))
+    return table
+
+
+def source_fingerprint(dict_dir=DICT_DIR):
+    """二进制词典输入的指纹：各词性 JSON、inflections.json 和变位规则（lib/inflection.py）的 SHA-256"""
+    digest = hashlib.sha256()
+    paths = [Path(dict_dir) / f'{pos_key}.json' for pos_key in POS_FILES]
+    paths += [Path(dict_dir) / INFLECTIONS_PATH.name, Path(__file__).with_name('inflection.py')]
+    for path in paths:
+        digest.update(path.name.encode('utf-8') + b'\x00')
+        if path.exists():
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def pos_keys(entry, categories):
+    """词条可用于筛选的词性：分类和缩写"""
+    keys = set(categories)
+    for p in entry['pos']:
+        abbr = p.get('abbr') or p.get('full')
+        if abbr:
+            keys.add(abbr)
+    return keys
+
+
+class DictionaryIndex:
+    """只读的词典内存索引（由 JSON 文件构建）"""
+
+    def __init__(self, entries, categories, inflections=None):
+        # entries: 合并后的词条列表；categories: 与 entries 对应的词性分类集合；inflections: 见 load_inflections
+        self.entries = entries
+        order = sorted(range(len(entries)), key=lambda i: sort_key(entries[i]['word']))
+        self.keys = [sort_key(entries[i]['word'])[0] for i in order]
+        self.key_ids = order
+        self.by_word = {entries[i]['word'].lower(): i for i in order}
+        for i in order:
+            # 带复数说明的词条也能用单词本身查到（cheval -> cheval (pl. ~ aux)），同名的词条优先
+            self.by_word.setdefault(sort_key(entries[i]['word'])[1], i)
+        self.by_folded = {}
+        for key, i in zip(self.keys, order):
+            self.by_folded.setdefault(key, []).append(i)
+        self.deletes = {}
+        for key in self.by_folded:
+            for variant in spelling.deletes(key):
+                self.deletes.setdefault(variant, []).append(key)
+        self.inflections = inflection_table(entries, categories, inflections)
+        # 文档按 (折叠键, 小写单词) 的词条顺序编号，与二进制词典一致，相关度相同时的顺序也相同
+        self.documents, self.postings = reverse_index.build_documents([entries[i] for i in order])
+        self.average_length = (sum(doc[3] for doc in self.documents) / len(self.documents)
+                               if self.documents else 1)
+        self.pos_ids = {}
+        for i, entry in enumerate(entries):
+            for pos in pos_keys(entry, categories[i]):
+                self.pos_ids.setdefault(pos, set()).add(i)
+
+    @classmethod
+    def from_json_files(cls, dict_dir=DICT_DIR):
+        entries, categories = merge_entries(load_word_lists(dict_dir))
+        return cls(entries, categories, load_inflections(Path(dict_dir) / INFLECTIONS_PATH.name))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, word, pos=None):
+        """精确匹配（不区分大小写），返回完整词条或 None；pos 为词性分类或缩写"""
+        i = self.by_word.get(word.strip().lower())
+        if i is None or (pos and i not in self.pos_ids.get(pos, ())):
+            return None
+        return self.entries[i]
+
+    def lemmas(self, word):
+        """词形还原：返回 [(原形词条, [标签, ...])]，word 不是已知的变化形式时返回空列表"""
+        groups = {}
+        for i, tags in self.inflections.get(word.strip().lower(), ()):
+            groups.setdefault(i, (self.entries[i], []))[1].append(tags)
+        return list(groups.values())
+
+    def lookup_folded(self, word, pos=None):
+        """忽略重音和大小写匹配，返回折叠键相同的所有词条"""
+        ids = self.by_folded.get(fold_key(word), ())
+        return [self.entries[i] for i in ids if not pos or i in self.pos_ids.get(pos, ())]
+
+    def suggest(self, word, pos=None, limit=5):
+        """拼写纠错：返回编辑距离不超过 2 的词条，距离近的在前"""
+        results = []
+        for _, key in spelling.suggest(fold_key(word), lambda variant: self.deletes.get(variant, ()),
+                                       lambda key: key, limit=None if pos else limit):
+            results.extend(self.entries[i] for i in self.by_folded[key]
+                           if not pos or i in self.pos_ids.get(pos, ()))
+        return results[:limit]
+
+    def reverse(self, query, pos=None, limit=10, offset=0):
+        """汉法反查：返回 ([(词条, 匹配的释义)], 匹配的词条总数)，相关度高的在前"""
+        allowed = self.pos_ids.get(pos, set()) if pos else None
+        ranked = reverse_index.search(
+            query, lambda gram: self.postings.get(gram, ()), self.documents.__getitem__,
+            len(self.documents), self.average_length,
+            allowed=None if allowed is None else lambda entry_id: self.key_ids[entry_id] in allowed)
+        results = []
+        for entry_id, def_index in ranked[offset:offset + limit]:
+            entry = self.entries[self.key_ids[entry_id]]
+            results.append((entry, entry['definitions'][def_index].get('text') or ''))
+        return results, len(ranked)
+
+    def prefix(self, prefix, pos=None, limit=10, offset=0):
+        """按字母顺序返回以 prefix 开头的词条（忽略重音和大小写）；pos 为词性分类或缩写"""
+        prefix = fold_key(prefix)
+        allowed = self.pos_ids.get(pos, set()) if pos else None
+        results = []
+        skipped = 0
+        for j in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[j].startswith(prefix):
+                break
+            i = self.key_ids[j]
+            if allowed is not None and i not in allowed:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            results.append(self.entries[i])
+            if len(results) >= limit:
+                break
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def ensure_store(path=STORE_PATH, dict_dir=DICT_DIR):
+    """打开二进制词典；文件不存在、格式版本不同或与 JSON 源文件不一致时重新生成，无法生成时返回 None"""
+    from lib.dict_store import DictionaryStore, build_store
+    fingerprint = source_fingerprint(dict_dir)
+    try:
+        if Path(path).exists():
+            try:
+                store = DictionaryStore(path)
+            except ValueError as e:
+                print(f"二进制词典需要重新生成: {e}")
+            else:
+                if store.meta.get('fingerprint') == fingerprint:
+                    return store
+                print("二进制词典与 JSON 源文件不一致，重新生成")
+        build_store(path, load_word_lists(dict_dir),
+                    inflections=load_inflections(Path(dict_dir) / INFLECTIONS_PATH.name),
+                    fingerprint=fingerprint)
+        return DictionaryStore(path)
+    except (OSError, ValueError) as e:
+        print(f"二进制词典不可用，改为读取 JSON: {e}")
+        return None
+
+
+def get_dictionary():
+    """返回进程内共享的词典索引（第一次调用时加载）"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                start = time.monotonic()
+                index = ensure_store()
+                if index is None:
+                    index = DictionaryIndex.from_json_files()
+                print(f"✓ 词典索引加载完成（{type(index).__name__}）: {len(index)} 个词条，"
+                      f"耗时 {time.monotonic() - start:.2f}s")
+                _index = index
+    return _index
+
+
+def warm_dictionary():
+    """在后台线程中加载词典索引，让第一次查询不必等待"""
+    def build():
+        try:
+            get_dictionary()
+        except Exception as e:
+            print(f"词典索引构建失败: {e}")
+
+    threading.Thread(target=build, daemon=True).start()
@@ -0,0 +1,165 @@
+"""
+共享 HTTP 客户端 - 所有上游（TMDB、RSS、DeepSeek、Coze）共用的连接池
+
+- 每个进程一个 requests.Session，按主机复用 keep-alive 连接，避免每次请求重新握手
+- 默认的连接 / 读取超时，调用方不传 timeout 也不会无限挂起
+- 幂等请求（GET / HEAD / OPTIONS）在连接错误、超时和 429 / 5xx 时按指数退避 + 随机抖动重试
+- 按上游统计请求数、错误数、重试数和延迟，供 /health 查看
+"""
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lib.rate_limit import parse_retry_after
+
+# 连接池大小：pool_connections 为缓存的主机数，pool_maxsize 为每个主机保留的连接数
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 16))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 32))
+# 默认超时（秒）：(连接超时, 读取超时)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 15))
+# 幂等请求的默认重试次数（不含首次请求）
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+BACKOFF_BASE = 0.3     # 第 n 次重试最多等待 BACKOFF_BASE * 2^n 秒
+BACKOFF_MAX = 5.0      # 单次退避的上限（也是 Retry-After 的上限）
+
+# 已知上游的主机名 -> 统计用名称；其他主机直接用主机名
+UPSTREAM_NAMES = {
+    'api.themoviedb.org': 'tmdb',
+    'api.deepseek.com': 'deepseek',
+    'api.coze.cn': 'coze',
+}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _new_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """获取当前进程共享的 Session（fork 后的子进程会重新创建，不共享父进程的连接）"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _new_session()
+                _session_pid = pid
+    return _session
+
+
+def upstream_name(url):
+    host = urlsplit(url).hostname or 'unknown'
+    return UPSTREAM_NAMES.get(host, host)
+
+
+def _record(upstream, elapsed, status_code=None, error=False, retried=False):
+    with _stats_lock:
+        entry = _stats.get(upstream)
+        if entry is None:
+            entry = {'requests': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'status': {}}
+            _stats[upstream] = entry
+        entry['requests'] += 1
+        if retried:
+            entry['retries'] += 1
+        ms = elapsed * 1000
+        entry['total_ms'] += ms
+        if ms > entry['max_ms']:
+            entry['max_ms'] = ms
+        if error or (status_code is not None and status_code >= 500):
+            entry['errors'] += 1
+        if status_code is not None:
+            key = str(status_code)
+            entry['status'][key] = entry['status'].get(key, 0) + 1
+
+
+def _backoff(attempt, response=None):
+    """第 attempt 次重试前的等待时间：优先遵守 Retry-After，否则使用 full jitter 指数退避"""
+    if response is not None and response.status_code in (429, 503):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            return min(parse_retry_after(retry_after, BACKOFF_BASE), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method, url, upstream=None, retries=None, retry_on_status=RETRY_STATUSES, **kwargs):
+    """通过共享连接池发送请求，返回 requests.Response
+
+    - 未传 timeout 时使用 DEFAULT_TIMEOUT
+    - 只有幂等方法会重试（POST 等非幂等请求 retries 固定为 0）；
+      重试用尽后返回最后一次响应，或抛出最后一次的 requests 异常
+    - retry_on_status 为需要重试的状态码，调用方自行处理 429 时可以传入不含 429 的集合
+    """
+    method = method.upper()
+    upstream = upstream or upstream_name(url)
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    if method not in IDEMPOTENT_METHODS:
+        retries = 0
+    elif retries is None:
+        retries = HTTP_MAX_RETRIES
+
+    session = get_session()
+    attempt = 0
+    while True:
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _record(upstream, time.monotonic() - start, error=True, retried=attempt > 0)
+            if attempt >= retries:
+                raise
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+        except requests.exceptions.RequestException:
+            _record(upstream, time.monotonic() - start, error=True, retried=attempt > 0)
+            raise
+
+        _record(upstream, time.monotonic() - start, status_code=response.status_code, retried=attempt > 0)
+        if response.status_code not in retry_on_status or attempt >= retries:
+            return response
+        wait = _backoff(attempt, response)
+        response.close()
+        time.sleep(wait)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def stats():
+    """返回按上游统计的请求指标"""
+    with _stats_lock:
+        result = {}
+        for upstream, entry in _stats.items():
+            item = dict(entry)
+            item['status'] = dict(entry['status'])
+            item['avg_ms'] = round(entry['total_ms'] / entry['requests'], 1) if entry['requests'] else 0.0
+            item['total_ms'] = round(entry['total_ms'], 1)
+            item['max_ms'] = round(entry['max_ms'], 1)
+            result[upstream] = item
+        return result
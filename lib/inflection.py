@@ -0,0 +1,451 @@
+"""
+词形还原 - 变位和变格形式 -> 原形（suis -> être，allions -> aller，chevaux -> cheval）
+
+import_french_dict 从 French-Dictionary 的 CSV 中保留全部变位形式，写入 inflections.json；
+没有这个文件时（如只由公共法语学习词典生成），按规则为词典中的动词、名词和形容词生成变化形式：
+- 动词：第一组（含 -cer/-ger/-yer、e/é 变 è、-eler/-eter 双写）、第二组、-dre 规则变位，
+  不规则动词按词尾匹配变位模型（取最长的词尾，devenir 使用 venir 的模型）
+- 名词：复数（-al -> -aux、-eau -> -eaux ...）；词条带复数说明时（cheval (pl. ~ aux)、œil (pl. yeux)）按说明生成
+- 形容词：阴性和复数
+
+标签用空格分隔的英文标记（与 French-Dictionary 的 tags 一致），describe_tags 转换为中文说明。
+"""
+import re
+
+PERSONS = (
+    'first-person singular', 'second-person singular', 'third-person singular',
+    'first-person plural', 'second-person plural', 'third-person plural',
+)
+IMPERFECT_ENDINGS = ('ais', 'ais', 'ait', 'ions', 'iez', 'aient')
+FUTURE_ENDINGS = ('ai', 'as', 'a', 'ons', 'ez', 'ont')
+
+TAG_LABELS = {
+    'indicative': '直陈式', 'subjunctive': '虚拟式', 'conditional': '条件式', 'imperative': '命令式',
+    'present': '现在时', 'imperfect': '未完成过去时', 'past-historic': '简单过去时', 'future': '简单将来时',
+    'past-participle': '过去分词', 'present-participle': '现在分词', 'infinitive': '不定式',
+    'participle': '分词', 'past': '过去时',
+    'first-person': '第一人称', 'second-person': '第二人称', 'third-person': '第三人称',
+    'singular': '单数', 'plural': '复数', 'masculine': '阳性', 'feminine': '阴性',
+}
+
+# 不规则动词的变位模型，按词尾匹配：变位形式都写成去掉词干后的部分（词干 = 原形去掉词尾）
+# present: 直陈式现在时 6 个人称（'-' 表示没有该形式）；past: 简单过去时第一人称单数（None 表示没有）；
+# future: 将来时词干；
+# participle: 过去分词（1 个或阳单、阴单、阳复、阴复 4 个）；
+# 可选 imperfect: 未完成过去时词干（默认取 nous 的现在时）；subjunctive: 虚拟式的两个词干或 6 个形式
+# （默认取 ils 和 nous 的现在时）；gerund: 现在分词（默认未完成过去时词干 + ant）
+VERB_MODELS = {
+    'être': {'present': 'suis es est sommes êtes sont', 'imperfect': 'ét', 'past': 'fus', 'future': 'ser',
+             'subjunctive': 'sois sois soit soyons soyez soient', 'participle': 'été', 'gerund': 'étant'},
+    'avoir': {'present': 'ai as a avons avez ont', 'past': 'eus', 'future': 'aur',
+              'subjunctive': 'aie aies ait ayons ayez aient', 'participle': 'eu', 'gerund': 'ayant'},
+    'aller': {'present': 'vais vas va allons allez vont', 'past': 'allai', 'future': 'ir',
+              'subjunctive': 'aill all', 'participle': 'allé'},
+    'faire': {'present': 'fais fais fait faisons faites font', 'past': 'fis', 'future': 'fer',
+              'subjunctive': 'fass fass', 'participle': 'fait'},
+    'dire': {'present': 'dis dis dit disons dites disent', 'past': 'dis', 'future': 'dir', 'participle': 'dit'},
+    'pouvoir': {'present': 'peux peux peut pouvons pouvez peuvent', 'past': 'pus', 'future': 'pourr',
+                'subjunctive': 'puiss puiss', 'participle': 'pu'},
+    'vouloir': {'present': 'veux veux veut voulons voulez veulent', 'past': 'voulus', 'future': 'voudr',
+                'subjunctive': 'veuill voul', 'participle': 'voulu'},
+    'savoir': {'present': 'sais sais sait savons savez savent', 'past': 'sus', 'future': 'saur',
+               'subjunctive': 'sach sach', 'participle': 'su', 'gerund': 'sachant'},
+    'mouvoir': {'present': 'meus meus meut mouvons mouvez meuvent', 'past': 'mus', 'future': 'mouvr',
+                'subjunctive': 'meuv mouv', 'participle': 'mu'},
+    'voir': {'present': 'vois vois voit voyons voyez voient', 'past': 'vis', 'future': 'verr',
+             'subjunctive': 'voi voy', 'participle': 'vu'},
+    'devoir': {'present': 'dois dois doit devons devez doivent', 'past': 'dus', 'future': 'devr',
+               'subjunctive': 'doiv dev', 'participle': 'dû due dus dues'},
+    'cevoir': {'present': 'çois çois çoit cevons cevez çoivent', 'past': 'çus', 'future': 'cevr',
+               'subjunctive': 'çoiv cev', 'participle': 'çu'},
+    'valoir': {'present': 'vaux vaux vaut valons valez valent', 'past': 'valus', 'future': 'vaudr',
+               'subjunctive': 'vaill val', 'participle': 'valu'},
+    'falloir': {'present': '- - faut - - -', 'imperfect': 'fall', 'past': 'fallus', 'future': 'faudr',
+                'subjunctive': 'faill faill', 'participle': 'fallu'},
+    'pleuvoir': {'present': '- - pleut - - pleuvent', 'imperfect': 'pleuv', 'past': 'plus', 'future': 'pleuvr',
+                 'participle': 'plu'},
+    'asseoir': {'present': 'assieds assieds assied asseyons asseyez asseyent', 'past': 'assis',
+                'future': 'assiér', 'participle': 'assis'},
+    'venir': {'present': 'viens viens vient venons venez viennent', 'past': 'vins', 'future': 'viendr',
+              'subjunctive': 'vienn ven', 'participle': 'venu'},
+    'tenir': {'present': 'tiens tiens tient tenons tenez tiennent', 'past': 'tins', 'future': 'tiendr',
+              'subjunctive': 'tienn ten', 'participle': 'tenu'},
+    'partir': {'present': 'pars pars part partons partez partent', 'past': 'partis', 'future': 'partir',
+               'participle': 'parti'},
+    'sortir': {'present': 'sors sors sort sortons sortez sortent', 'past': 'sortis', 'future': 'sortir',
+               'participle': 'sorti'},
+    'sentir': {'present': 'sens sens sent sentons sentez sentent', 'past': 'sentis', 'future': 'sentir',
+               'participle': 'senti'},
+    'mentir': {'present': 'mens mens ment mentons mentez mentent', 'past': 'mentis', 'future': 'mentir',
+               'participle': 'menti'},
+    'dormir': {'present': 'dors dors dort dormons dormez dorment', 'past': 'dormis', 'future': 'dormir',
+               'participle': 'dormi'},
+    'servir': {'present': 'sers sers sert servons servez servent', 'past': 'servis', 'future': 'servir',
+               'participle': 'servi'},
+    'courir': {'present': 'cours cours court courons courez courent', 'past': 'courus', 'future': 'courr',
+               'participle': 'couru'},
+    'mourir': {'present': 'meurs meurs meurt mourons mourez meurent', 'past': 'mourus', 'future': 'mourr',
+               'subjunctive': 'meur mour', 'participle': 'mort'},
+    'fuir': {'present': 'fuis fuis fuit fuyons fuyez fuient', 'past': 'fuis', 'future': 'fuir',
+             'subjunctive': 'fui fuy', 'participle': 'fui'},
+    'cueillir': {'present': 'cueille cueilles cueille cueillons cueillez cueillent', 'past': 'cueillis',
+                 'future': 'cueiller', 'participle': 'cueilli'},
+    'quérir': {'present': 'quiers quiers quiert quérons quérez quièrent', 'past': 'quis', 'future': 'querr',
+               'subjunctive': 'quièr quér', 'participle': 'quis'},
+    'vrir': {'present': 'vre vres vre vrons vrez vrent', 'past': 'vris', 'future': 'vrir', 'participle': 'vert'},
+    'frir': {'present': 'fre fres fre frons frez frent', 'past': 'fris', 'future': 'frir', 'participle': 'fert'},
+    'prendre': {'present': 'prends prends prend prenons prenez prennent', 'past': 'pris', 'future': 'prendr',
+                'subjunctive': 'prenn pren', 'participle': 'pris'},
+    'mettre': {'present': 'mets mets met mettons mettez mettent', 'past': 'mis', 'future': 'mettr',
+               'participle': 'mis'},
+    'battre': {'present': 'bats bats bat battons battez battent', 'past': 'battis', 'future': 'battr',
+               'participle': 'battu'},
+    'rompre': {'present': 'romps romps rompt rompons rompez rompent', 'past': 'rompis', 'future': 'rompr',
+               'participle': 'rompu'},
+    'indre': {'present': 'ins ins int ignons ignez ignent', 'past': 'ignis', 'future': 'indr', 'participle': 'int'},
+    'soudre': {'present': 'sous sous sout solvons solvez solvent', 'past': 'solus', 'future': 'soudr',
+               'participle': 'solu'},
+    'croire': {'present': 'crois crois croit croyons croyez croient', 'past': 'crus', 'future': 'croir',
+               'subjunctive': 'croi croy', 'participle': 'cru'},
+    'boire': {'present': 'bois bois boit buvons buvez boivent', 'past': 'bus', 'future': 'boir',
+              'subjunctive': 'boiv buv', 'participle': 'bu'},
+    'lire': {'present': 'lis lis lit lisons lisez lisent', 'past': 'lus', 'future': 'lir', 'participle': 'lu'},
+    'crire': {'present': 'cris cris crit crivons crivez crivent', 'past': 'crivis', 'future': 'crir',
+              'participle': 'crit'},
+    'rire': {'present': 'ris ris rit rions riez rient', 'past': 'ris', 'future': 'rir', 'participle': 'ri'},
+    'suffire': {'present': 'suffis suffis suffit suffisons suffisez suffisent', 'past': 'suffis',
+                'future': 'suffir', 'participle': 'suffi'},
+    'uire': {'present': 'uis uis uit uisons uisez uisent', 'past': 'uisis', 'future': 'uir', 'participle': 'uit'},
+    'taire': {'present': 'tais tais tait taisons taisez taisent', 'past': 'tus', 'future': 'tair', 'participle': 'tu'},
+    'traire': {'present': 'trais trais trait trayons trayez traient', 'past': None, 'future': 'trair',
+               'subjunctive': 'trai tray', 'participle': 'trait'},
+    'plaire': {'present': 'plais plais plaît plaisons plaisez plaisent', 'past': 'plus', 'future': 'plair',
+               'participle': 'plu'},
+    'aître': {'present': 'ais ais aît aissons aissez aissent', 'past': 'us', 'future': 'aîtr', 'participle': 'u'},
+    'naître': {'present': 'nais nais naît naissons naissez naissent', 'past': 'naquis', 'future': 'naîtr',
+               'participle': 'né'},
+    'vivre': {'present': 'vis vis vit vivons vivez vivent', 'past': 'vécus', 'future': 'vivr', 'participle': 'vécu'},
+    'suivre': {'present': 'suis suis suit suivons suivez suivent', 'past': 'suivis', 'future': 'suivr',
+               'participle': 'suivi'},
+    'clure': {'present': 'clus clus clut cluons cluez cluent', 'past': 'clus', 'future': 'clur', 'participle': 'clu'},
+    'vaincre': {'present': 'vaincs vaincs vainc vainquons vainquez vainquent', 'past': 'vainquis',
+                'future': 'vaincr', 'participle': 'vaincu'},
+    'envoyer': {'present': 'envoie envoies envoie envoyons envoyez envoient', 'past': 'envoyai',
+                'future': 'enverr', 'subjunctive': 'envoi envoy', 'participle': 'envoyé'},
+}
+# 只用于原形本身、不作为词尾匹配的模型（installer 不按 aller 变位，connaître 不按 naître 变位）
+EXACT_MODELS = {'aller', 'naître'}
+# 词尾与不规则模型相同、但按第二组变位的动词
+SECOND_GROUP_EXCEPTIONS = {'répartir', 'assortir', 'impartir', 'asservir', 'nourrir', 'pourrir', 'guérir'}
+# -eler/-eter 动词中不双写辅音、而是变为 è 的
+E_GRAVE_VERBS = {'acheter', 'racheter', 'geler', 'congeler', 'dégeler', 'modeler', 'peler', 'harceler',
+                 'ciseler', 'démanteler', 'marteler', 'crocheter', 'fureter', 'haleter'}
+
+IRREGULAR_PLURALS = {
+    'œil': 'yeux', 'ciel': 'cieux', 'aïeul': 'aïeux', 'monsieur': 'messieurs', 'madame': 'mesdames',
+    'mademoiselle': 'mesdemoiselles', 'bonhomme': 'bonshommes',
+}
+AIL_AUX = {'travail', 'bail', 'corail', 'émail', 'soupirail', 'vitrail', 'vantail'}
+AL_S = {'bal', 'carnaval', 'chacal', 'festival', 'récital', 'régal', 'cérémonial', 'naval', 'fatal', 'natal', 'final'}
+OU_X = {'bijou', 'caillou', 'chou', 'genou', 'hibou', 'joujou', 'pou'}
+EU_S = {'pneu', 'bleu', 'landau', 'sarrau', 'émeu'}
+# 形容词：阴性单数、阳性复数、阴性复数（beau、nouveau 等还有元音前的阳性单数形式）
+IRREGULAR_ADJECTIVES = {
+    'beau': ('belle', 'beaux', 'belles', 'bel'), 'nouveau': ('nouvelle', 'nouveaux', 'nouvelles', 'nouvel'),
+    'vieux': ('vieille', 'vieux', 'vieilles', 'vieil'), 'fou': ('folle', 'fous', 'folles', 'fol'),
+    'mou': ('molle', 'mous', 'molles', 'mol'), 'blanc': ('blanche', 'blancs', 'blanches'),
+    'franc': ('franche', 'francs', 'franches'), 'sec': ('sèche', 'secs', 'sèches'),
+    'frais': ('fraîche', 'frais', 'fraîches'), 'long': ('longue', 'longs', 'longues'),
+    'doux': ('douce', 'doux', 'douces'), 'faux': ('fausse', 'faux', 'fausses'),
+    'roux': ('rousse', 'roux', 'rousses'), 'gentil': ('gentille', 'gentils', 'gentilles'),
+    'public': ('publique', 'publics', 'publiques'), 'grec': ('grecque', 'grecs', 'grecques'),
+    'favori': ('favorite', 'favoris', 'favorites'),
+    'bas': ('basse', 'bas', 'basses'), 'gros': ('grosse', 'gros', 'grosses'), 'gras': ('grasse', 'gras', 'grasses'),
+    'épais': ('épaisse', 'épais', 'épaisses'), 'las': ('lasse', 'las', 'lasses'),
+    'malin': ('maligne', 'malins', 'malignes'), 'bénin': ('bénigne', 'bénins', 'bénignes'),
+    'complet': ('complète', 'complets', 'complètes'), 'concret': ('concrète', 'concrets', 'concrètes'),
+    'discret': ('discrète', 'discrets', 'discrètes'), 'inquiet': ('inquiète', 'inquiets', 'inquiètes'),
+    'secret': ('secrète', 'secrets', 'secrètes'), 'meilleur': ('meilleure', 'meilleurs', 'meilleures'),
+}
+# 高频动词：同一词形对应多个原形时排在前面（sommes -> être 而不是 somme 的复数，suis -> être 而不是 suivre）
+COMMON_VERBS = ('être', 'avoir', 'aller', 'faire', 'dire', 'pouvoir', 'vouloir', 'savoir', 'voir', 'devoir',
+                'venir', 'prendre')
+_VOWELS = 'aeiouyéèêëàâîïôûù'
+# 词条中的同形词编号（aller¹）和标注符号
+_HEADWORD_NOISE = re.compile(r'[¹²³⁴⁵⁶⁷⁸⁹⁰【】]')
+_REFLEXIVE = re.compile(r"\s*\((?:se|s'|s’)\)$")
+_FRENCH_WORD = re.compile(r'[a-zà-öø-ÿœæ]+(?:-[a-zà-öø-ÿœæ]+)*')
+# 名词词条末尾的复数说明：cheval (pl. ~ aux)、beau-père (pl. ~ - ~s)、match(pl. ~s或~es)
+_PLURAL_NOTE = re.compile(r'\s*\(pl\.(.*)\)\s*$')
+_PLURAL_PART = re.compile(r'~\s*([^~\s-]*)')
+
+
+def describe_tags(tags):
+    """把标签转换为中文说明：indicative present first-person singular -> 直陈式现在时 第一人称单数"""
+    labels = [TAG_LABELS.get(tag, tag) for tag in tags.split()]
+    text = ''
+    for i, label in enumerate(labels):
+        # 语式和时态连写，人称、数、性之间用空格分隔
+        text += label if i == 0 or labels[i - 1] in ('直陈式', '虚拟式', '条件式', '命令式') else ' ' + label
+    return text
+
+
+def _persons(mood, forms):
+    return [(form, f'{mood} {person}') for form, person in zip(forms, PERSONS) if form and form != '-']
+
+
+def _past_historic(first):
+    """由简单过去时第一人称单数推出 6 个人称：fus -> fus fus fut fûmes fûtes furent"""
+    if first.endswith('ai'):
+        stem = first[:-2]
+        return [first, stem + 'as', stem + 'a', stem + 'âmes', stem + 'âtes', stem + 'èrent']
+    base = first[:-1]
+    if base.endswith('in'):
+        # vins -> vînmes
+        circumflex = base[:-2] + 'în'
+    else:
+        circumflex = base[:-1] + {'u': 'û', 'i': 'î'}.get(base[-1], base[-1])
+    return [base + 's', base + 's', base + 't', circumflex + 'mes', circumflex + 'tes', base + 'rent']
+
+
+def _participles(masculine):
+    if masculine.endswith('s'):
+        return [masculine, masculine + 'e', masculine, masculine + 'es']
+    return [masculine, masculine + 'e', masculine + 's', masculine + 'es']
+
+
+def _paradigm(present, past, future, participle, imperfect=None, subjunctive=None, gerund=None):
+    """由各时态的词干和主要形式生成全部变位，返回 [(词形, 标签)]"""
+    present = present.split()
+    nous = present[3] if present[3] != '-' else None
+    if imperfect is None:
+        imperfect = nous[:-3] if nous else ''
+    if subjunctive is None:
+        subjunctive = [present[5][:-3] if present[5] != '-' else imperfect, imperfect]
+    else:
+        subjunctive = subjunctive.split()
+    if len(subjunctive) == 2:
+        first, second = subjunctive
+        subjunctive = [first + 'e', first + 'es', first + 'e', second + 'ions', second + 'iez', first + 'ent']
+    participle = participle.split()
+    if len(participle) == 1:
+        participle = _participles(participle[0])
+    forms = _persons('indicative present', present)
+    forms += _persons('indicative imperfect', [imperfect + e for e in IMPERFECT_ENDINGS])
+    if past:
+        forms += _persons('indicative past-historic', _past_historic(past))
+    forms += _persons('indicative future', [future + e for e in FUTURE_ENDINGS])
+    forms += _persons('conditional present', [future + e for e in IMPERFECT_ENDINGS])
+    forms += _persons('subjunctive present', subjunctive)
+    for form, tags in zip(participle, ('masculine singular', 'feminine singular', 'masculine plural', 'feminine plural')):
+        forms.append((form, f'past-participle {tags}'))
+    forms.append((gerund or imperfect + 'ant', 'present-participle'))
+    return forms
+
+
+def _first_group(verb):
+    """第一组动词（-er）"""
+    stem = verb[:-2]
+    soft = stem      # a、o 前的词干：mange-、commenç-
+    mute = stem      # 哑音 e 前的词干：achèt-、appell-、nettoi-
+    future = verb    # 将来时词干
+    if stem.endswith('g'):
+        soft = stem + 'e'
+    elif stem.endswith('c'):
+        soft = stem[:-1] + 'ç'
+    if stem.endswith(('oy', 'uy')):
+        mute = stem[:-1] + 'i'
+        future = mute + 'er'
+    else:
+        match = re.match(rf'^(.*)([eé])([^{_VOWELS}])$', stem)
+        if match:
+            head, vowel, consonant = match.groups()
+            if vowel == 'e' and consonant in 'lt' and verb not in E_GRAVE_VERBS:
+                mute = head + 'e' + consonant * 2
+            else:
+                mute = head + 'è' + consonant
+            if vowel == 'e':
+                future = mute + 'er'
+    forms = _persons('indicative present', [mute + 'e', mute + 'es', mute + 'e', soft + 'ons', stem + 'ez', mute + 'ent'])
+    forms += _persons('indicative imperfect', [soft + 'ais', soft + 'ais', soft + 'ait', stem + 'ions', stem + 'iez', soft + 'aient'])
+    forms += _persons('indicative past-historic', [soft + 'ai', soft + 'as', soft + 'a', soft + 'âmes', soft + 'âtes', stem + 'èrent'])
+    forms += _persons('indicative future', [future + e for e in FUTURE_ENDINGS])
+    forms += _persons('conditional present', [future + e for e in IMPERFECT_ENDINGS])
+    forms += _persons('subjunctive present', [mute + 'e', mute + 'es', mute + 'e', stem + 'ions', stem + 'iez', mute + 'ent'])
+    for form, tags in zip(_participles(stem + 'é'), ('masculine singular', 'feminine singular', 'masculine plural', 'feminine plural')):
+        forms.append((form, f'past-participle {tags}'))
+    forms.append((soft + 'ant', 'present-participle'))
+    return forms
+
+
+def conjugate(verb):
+    """动词原形的全部变位形式 [(词形, 标签)]；无法识别的动词返回空列表"""
+    suffixes = [suffix for suffix in VERB_MODELS
+                if verb.endswith(suffix) and (suffix not in EXACT_MODELS or verb == suffix)]
+    if suffixes and verb not in SECOND_GROUP_EXCEPTIONS:
+        suffix = max(suffixes, key=len)
+        stem = verb[:-len(suffix)]
+        return [(stem + form, tags) for form, tags in _paradigm(**VERB_MODELS[suffix])]
+    if verb.endswith('er'):
+        return _first_group(verb)
+    if verb.endswith('ir'):
+        stem = verb[:-2]
+        return [(stem + form, tags) for form, tags in _paradigm(
+            'is is it issons issez issent', 'is', 'ir', 'i')]
+    if verb.endswith('dre'):
+        stem = verb[:-3]
+        return [(stem + form, tags) for form, tags in _paradigm(
+            'ds ds d dons dez dent', 'dis', 'dr', 'du')]
+    return []
+
+
+def noun_forms(noun):
+    """名词的复数形式"""
+    if noun in IRREGULAR_PLURALS:
+        return [(IRREGULAR_PLURALS[noun], 'plural')]
+    if noun.endswith(('s', 'x', 'z')):
+        return []
+    if noun.endswith('al') and noun not in AL_S:
+        plural = noun[:-2] + 'aux'
+    elif noun in AIL_AUX:
+        plural = noun[:-3] + 'aux'
+    elif noun.endswith(('eau', 'au', 'eu')) and noun not in EU_S:
+        plural = noun + 'x'
+    elif noun in OU_X:
+        plural = noun + 'x'
+    else:
+        plural = noun + 's'
+    return [(plural, 'plural')]
+
+
+def adjective_forms(adjective):
+    """形容词的阴性和复数形式"""
+    if adjective in IRREGULAR_ADJECTIVES:
+        forms = IRREGULAR_ADJECTIVES[adjective]
+        result = [(forms[0], 'feminine singular'), (forms[1], 'masculine plural'), (forms[2], 'feminine plural')]
+        if len(forms) > 3:
+            result.append((forms[3], 'masculine singular'))
+        return result
+    if adjective.endswith('e'):
+        feminine = adjective
+    elif adjective.endswith('eux'):
+        feminine = adjective[:-1] + 'se'
+    elif adjective.endswith('érieur'):
+        feminine = adjective + 'e'
+    elif adjective.endswith('ateur'):
+        feminine = adjective[:-3] + 'rice'
+    elif adjective.endswith('eur'):
+        feminine = adjective[:-1] + 'se'
+    elif adjective.endswith('if'):
+        feminine = adjective[:-1] + 've'
+    elif adjective.endswith('er'):
+        feminine = adjective[:-2] + 'ère'
+    elif adjective.endswith(('el', 'eil', 'en', 'on', 'et')):
+        feminine = adjective + adjective[-1] + 'e'
+    else:
+        feminine = adjective + 'e'
+    if adjective.endswith(('s', 'x')):
+        masculine_plural = adjective
+    elif adjective.endswith('al') and adjective not in AL_S:
+        masculine_plural = adjective[:-2] + 'aux'
+    elif adjective.endswith('eau'):
+        masculine_plural = adjective + 'x'
+    else:
+        masculine_plural = adjective + 's'
+    forms = [(feminine + 's', 'feminine plural'), (masculine_plural, 'masculine plural')]
+    if feminine != adjective:
+        forms.insert(0, (feminine, 'feminine singular'))
+    return forms
+
+
+def strip_plural_note(word):
+    """去掉词条末尾的复数说明：cheval (pl. ~ aux) -> cheval"""
+    return _PLURAL_NOTE.sub('', word)
+
+
+def _plural_suffix(word, suffix):
+    # ~ aux 表示 -al/-ail 变为 -aux，其余说明直接加在词尾
+    if suffix == 'aux':
+        for ending in ('ail', 'al'):
+            if word.endswith(ending):
+                return word[:-len(ending)] + 'aux'
+    return word + suffix
+
+
+def plural_note_forms(word):
+    """按词条的复数说明生成复数形式 [(词形, 'plural')]；没有说明或无法解析时返回空列表
+
+    ~ 代表原词（或复合词中对应的部分）：cheval (pl. ~ aux) -> chevaux，beau-frère (pl. ~ x- ~s) -> beaux-frères，
+    sandwich (pl. ~(e)s) -> sandwichs、sandwiches；不含 ~ 的说明是完整的复数（œil (pl. yeux)）。
+    """
+    match = _PLURAL_NOTE.search(word)
+    if not match:
+        return []
+    singular = _HEADWORD_NOISE.sub('', word[:match.start()]).lower().strip()
+    forms = []
+    for note in match.group(1).lower().split('或'):
+        note = note.strip()
+        if not note:
+            continue
+        if '~' not in note:
+            candidates = [note]
+        else:
+            suffixes = _PLURAL_PART.findall(note)
+            # ~(e)s 表示 -s 和 -es 两种形式
+            variants = [[suffix] if '(' not in suffix else
+                        [re.sub(r'\(.*?\)', '', suffix), suffix.replace('(', '').replace(')', '')]
+                        for suffix in suffixes]
+            if len(suffixes) == 1:
+                candidates = [_plural_suffix(singular, suffix) for suffix in variants[0]]
+            else:
+                # 复合词：每个 ~ 对应一个用连字符或空格分隔的部分，数量不一致时无法解析
+                parts = re.split(r'([- ])', singular)
+                words = parts[::2]
+                if len(words) != len(suffixes):
+                    continue
+                plural = list(parts)
+                for k, (part, options) in enumerate(zip(words, variants)):
+                    plural[2 * k] = _plural_suffix(part, options[0])
+                candidates = [''.join(plural)]
+        for form in candidates:
+            if form != singular and (form, 'plural') not in forms:
+                forms.append((form, 'plural'))
+    return forms
+
+
+def base_form(word):
+    """词条中的原形：去掉同形词编号（aller¹）、复数说明（cheval (pl. ~ aux)）和代动词标记
+    （abonner (s')、se lever）；短语返回 None"""
+    form = _REFLEXIVE.sub('', _HEADWORD_NOISE.sub('', strip_plural_note(word)).lower().strip())
+    for prefix in ('se ', "s'", 's’'):
+        if form.startswith(prefix):
+            form = form[len(prefix):].strip()
+            break
+    return form if _FRENCH_WORD.fullmatch(form) else None
+
+
+def generate_inflections(entries, categories):
+    """按规则生成 {小写词形: [(原形, 标签)]}；entries/categories 为 lib.dictionary.merge_entries 的结果"""
+    table = {}
+    for entry, entry_categories in zip(entries, categories):
+        word = entry['word']
+        base = base_form(word)
+        forms = []
+        if base is not None and 'verb' in entry_categories:
+            forms += conjugate(base)
+        if 'noun' in entry_categories:
+            # 复数说明优先于规则；短语名词（chemin de fer (pl. ~s~ ~)）没有原形，只能从说明得到复数
+            forms += plural_note_forms(word) or (noun_forms(base) if base is not None else [])
+        if base is not None and 'adj' in entry_categories:
+            forms += adjective_forms(base)
+        for form, tags in forms:
+            analyses = table.setdefault(form, [])
+            if (word, tags) not in analyses:
+                analyses.append((word, tags))
+    return table
+
+
+def lemma_rank(lemma):
+    """原形的排序权重：高频动词在前，其余保持原顺序"""
+    base = base_form(lemma)
+    return COMMON_VERBS.index(base) if base in COMMON_VERBS else len(COMMON_VERBS)
@@ -0,0 +1,132 @@
+"""
+密码哈希 - 在独立的进程池中执行 bcrypt，避免登录高峰占满请求 worker
+
+- 每个 gunicorn worker 进程持有一个小的进程池（PASSWORD_WORKERS 个子进程）
+- 正在执行和排队的任务总数超过 PASSWORD_WORKERS + PASSWORD_QUEUE_DEPTH 时立即拒绝，
+  抛出 PasswordHasherBusy，由接口返回 429 + Retry-After
+- 无法创建子进程的环境（如 Serverless）退回到在当前线程中计算
+"""
+import os
+import math
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', 2))
+PASSWORD_QUEUE_DEPTH = int(os.environ.get('PASSWORD_QUEUE_DEPTH', 16))
+PASSWORD_TIMEOUT = float(os.environ.get('PASSWORD_TIMEOUT', 10))
+
+
+class PasswordHasherBusy(Exception):
+    """密码哈希进程池已满"""
+
+    def __init__(self, retry_after):
+        super().__init__('登录请求过多，请稍后重试')
+        self.retry_after = retry_after
+
+
+def _hashpw(password):
+    return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
+
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_QUEUE_DEPTH)
+_avg_seconds = 0.25  # 单次哈希耗时的滑动平均，用于估算 Retry-After
+
+
+def _get_executor():
+    """获取当前进程的进程池；fork 后的子进程重新创建，创建失败时返回 None"""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is not None and _executor_pid == pid:
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            try:
+                # spawn 启动的子进程不继承父进程的线程和数据库连接
+                context = multiprocessing.get_context('spawn')
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS, mp_context=context)
+            except (OSError, NotImplementedError) as e:
+                print(f"无法创建密码哈希进程池，改为在当前线程计算: {e}")
+                _executor = None
+            _executor_pid = pid
+    return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False)
+
+
+def _retry_after():
+    backlog = PASSWORD_WORKERS + PASSWORD_QUEUE_DEPTH
+    return max(1, math.ceil(backlog * _avg_seconds / PASSWORD_WORKERS))
+
+
+def _release_slot(_future):
+    _slots.release()
+
+
+def _submit(executor, func, *args):
+    """在进程池中提交任务；名额在任务结束（完成、失败或取消）时才释放，
+    超时返回的请求不会让仍在排队或执行的任务失去占用的名额"""
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy(_retry_after())
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(_release_slot)
+    return future
+
+
+def _run_inline(func, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy(_retry_after())
+    try:
+        return func(*args)
+    finally:
+        _slots.release()
+
+
+def _run(func, *args):
+    global _avg_seconds
+    started = time.monotonic()
+    executor = _get_executor()
+    if executor is None:
+        result = _run_inline(func, *args)
+    else:
+        try:
+            result = _submit(executor, func, *args).result(timeout=PASSWORD_TIMEOUT)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy(_retry_after())
+        except BrokenProcessPool:
+            # 子进程异常退出：丢弃进程池，下次调用时重新创建
+            _reset_executor(executor)
+            result = _run_inline(func, *args)
+    _avg_seconds = _avg_seconds * 0.9 + (time.monotonic() - started) * 0.1
+    return result
+
+
+def hash_password(password):
+    """计算密码的 bcrypt 哈希，返回字符串"""
+    return _run(_hashpw, password.encode('utf-8'))
+
+
+def check_password(password, password_hash):
+    """校验密码是否与 bcrypt 哈希匹配"""
+    return _run(_checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
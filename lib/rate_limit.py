@@ -0,0 +1,90 @@
+"""
+限流工具 - 线程安全的令牌桶，供调用第三方 API 的并发任务共享
+"""
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器
+
+    - 每秒补充 rate 个令牌，最多积累 capacity 个（允许的突发量）
+    - acquire() 在令牌不足时阻塞，所有线程共享同一个配额
+    - pause() 用于响应上游的 429 / Retry-After：暂停期间所有线程都会等待
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f'无效的限流速率: {rate}')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """获取令牌，成功返回 True；超过 timeout 秒仍未获取到返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """暂停发放令牌 seconds 秒（暂停结束后令牌从零开始积累）"""
+        with self._lock:
+            until = time.monotonic() + max(0.0, seconds)
+            if until > self._paused_until:
+                self._paused_until = until
+                self._tokens = 0.0
+                self._updated = until
+
+
+def parse_retry_after(value, default=1.0):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name, rate, capacity=None):
+    """获取按上游名称共享的限流器（同一进程内调用同一上游的代码共用一个配额）"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate, capacity)
+            _limiters[name] = limiter
+        return limiter
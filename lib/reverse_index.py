@@ -0,0 +1,124 @@
+"""
+汉法反查 - 释义文本的汉字 n-gram 倒排索引（供 /api/dictionary/reverse 使用）
+
+每条释义（definitions[].text）是一个文档，索引其中每个汉字（一元）和相邻两个汉字（二元）。
+查询"丰富"时取二元 丰富 的倒排表，单个汉字的查询取一元的倒排表，不需要逐条扫描释义。
+倒排表是升序的文档编号，写入二进制词典时按差值 + varint 编码（编号连续时每个只占 1 字节）。
+排序：先按覆盖的查询 n-gram 数，再把释义排在例句（◇ 开头）之前，最后按 BM25 得分（短释义优先）。
+"""
+import re
+import math
+
+# 基本汉字和扩展 A 区
+_HAN_RUN = re.compile(r'[㐀-鿿]+')
+EXAMPLE_MARK = '◇'
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def ngrams(text):
+    """文档的一元和二元汉字 n-gram 集合"""
+    grams = set()
+    for run in _HAN_RUN.findall(text):
+        grams.update(run)
+        grams.update(run[i:i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+def query_grams(query):
+    """查询的 n-gram：两个字以上的连续汉字取二元，单个汉字取一元；没有汉字时返回空列表"""
+    grams = []
+    for run in _HAN_RUN.findall(query):
+        for gram in (run[i:i + 2] for i in range(len(run) - 1)) if len(run) > 1 else (run,):
+            if gram not in grams:
+                grams.append(gram)
+    return grams
+
+
+def build_documents(entries):
+    """按词条顺序为每条释义编号，返回 (文档列表, {n-gram: 升序的文档编号列表})
+
+    文档为 (词条编号, 释义下标, 是否例句, 汉字数)，词条编号即 entries 中的下标。
+    """
+    documents = []
+    postings = {}
+    for entry_id, entry in enumerate(entries):
+        for def_index, definition in enumerate(entry.get('definitions') or []):
+            text = definition.get('text') or ''
+            grams = ngrams(text)
+            if not grams:
+                continue
+            doc_id = len(documents)
+            length = sum(len(run) for run in _HAN_RUN.findall(text))
+            documents.append((entry_id, def_index, text.lstrip().startswith(EXAMPLE_MARK), length))
+            for gram in grams:
+                postings.setdefault(gram, []).append(doc_id)
+    return documents, postings
+
+
+def encode_postings(doc_ids):
+    """升序的文档编号 -> 差值的 varint 字节（每字节低 7 位，最高位表示后面还有字节）"""
+    data = bytearray()
+    previous = 0
+    for doc_id in doc_ids:
+        delta = doc_id - previous
+        previous = doc_id
+        while delta >= 0x80:
+            data.append(delta & 0x7f | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+
+def decode_postings(data):
+    """encode_postings 的逆运算"""
+    doc_ids = []
+    doc_id = delta = shift = 0
+    for byte in data:
+        delta |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            doc_id += delta
+            doc_ids.append(doc_id)
+            delta = shift = 0
+    return doc_ids
+
+
+def search(query, postings_for, document, doc_count, average_length, allowed=None):
+    """按相关度返回 [(词条编号, 释义下标)]，每个词条只出现一次（取得分最高的释义）
+
+    postings_for(n-gram) 返回升序的文档编号列表（没有时返回空），document(文档编号) 返回 build_documents 中的文档，
+    allowed(词条编号) 用于词性筛选。
+    """
+    grams = query_grams(query)
+    coverage = {}
+    scores = {}
+    for gram in grams:
+        doc_ids = postings_for(gram)
+        if not doc_ids:
+            continue
+        idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+        for doc_id in doc_ids:
+            coverage[doc_id] = coverage.get(doc_id, 0) + 1
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf
+
+    # 每个词条只保留排序最靠前的释义，词性筛选对每个词条只做一次
+    best = {}
+    rejected = set()
+    k1, b = BM25_K1, BM25_B
+    for doc_id, covered in coverage.items():
+        entry_id, def_index, example, length = document(doc_id)
+        if entry_id in rejected:
+            continue
+        current = best.get(entry_id)
+        if current is None and allowed is not None and not allowed(entry_id):
+            rejected.add(entry_id)
+            continue
+        # 每个 n-gram 在一条释义中按出现一次计算，只保留 BM25 的长度归一化
+        score = scores[doc_id] * (k1 + 1) / (1 + k1 * (1 - b + b * length / average_length))
+        key = (-covered, example, -score, doc_id, def_index)
+        if current is None or key < current:
+            best[entry_id] = key
+    ranked = sorted(best.items(), key=lambda item: item[1])
+    return [(entry_id, key[4]) for entry_id, key in ranked]
@@ -0,0 +1,114 @@
+"""
+拼写纠错 - SymSpell 风格的删除邻域索引（供 /api/dictionary/search 的"你是不是要找"使用）
+
+词典中每个折叠键（lib.dictionary.fold_key）的前 PREFIX_LENGTH 个字符删除至多 MAX_EDIT_DISTANCE 个字符，
+得到的所有字符串都指向这个键。查询时对输入做同样的删除，命中的键即为候选，
+再用限定上限的 Damerau-Levenshtein 距离（OSA）验证。候选数量与词典大小无关，不需要遍历全部词条。
+安装了 rapidfuzz 时用它计算距离，否则使用下面的纯 Python 实现（结果相同）。
+"""
+
+try:
+    from rapidfuzz.distance import OSA
+except ImportError:
+    OSA = None
+
+MAX_EDIT_DISTANCE = 2
+# 只对前缀做删除：长单词的删除变体数量不再随长度增长，前缀之后的差异由距离验证
+PREFIX_LENGTH = 7
+
+
+def deletes(key, max_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """key 的前缀删除 0 到 max_distance 个字符得到的所有字符串"""
+    key = key[:prefix_length]
+    result = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        frontier = {s[:i] + s[i + 1:] for s in frontier for i in range(len(s))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a, b, max_distance=MAX_EDIT_DISTANCE):
+    """Damerau-Levenshtein 距离（相邻字符交换算一次编辑），超过 max_distance 时返回 max_distance + 1"""
+    if OSA is not None:
+        return OSA.distance(a, b, score_cutoff=max_distance)
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # 去掉相同的前缀和后缀，只比较中间不同的部分
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return len(a) + len(b) if len(a) + len(b) <= max_distance else max_distance + 1
+
+    # 距离不超过 max_distance 时，最优路径只经过 |i - j| <= max_distance 的对角带，带外的格子不必计算
+    too_far = max_distance + 1
+    previous2 = None
+    previous = [j if j <= max_distance else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        char = a[i - 1]
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            if char == b[j - 1]:
+                value = previous[j - 1]
+            else:
+                value = min(previous[j], current[j - 1], previous[j - 1]) + 1
+                if (previous2 is not None and j > 1
+                        and char == b[j - 2] and a[i - 2] == b[j - 1]):
+                    value = min(value, previous2[j - 2] + 1)
+            if value > too_far:
+                value = too_far
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        # 下一行只依赖本行和上一行（交换），两行都已超过上限时不可能再回到上限以内
+        if row_min > max_distance and min(previous) >= max_distance:
+            return too_far
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+
+def suggest(query, candidates_for, key_of, limit=5,
+            max_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """返回 [(距离, 候选)]，按距离、长度差、字母顺序排序；limit 为 None 时返回全部
+
+    candidates_for(删除变体) 返回索引中指向该变体的候选（键或键的编号），key_of(候选) 返回候选的折叠键。
+    """
+    # 距离为 d 的两个词，前缀各删除不超过 d 个字符就能得到相同的变体，
+    # 所以候选两侧删除次数的较大值（取所有变体中最小的）是距离的下界
+    query_prefix = len(query[:prefix_length])
+    keys = {}
+    bounds = {}
+    for variant in deletes(query, max_distance, prefix_length):
+        query_deletes = query_prefix - len(variant)
+        for candidate in candidates_for(variant):
+            key = keys.get(candidate)
+            if key is None:
+                key = keys[candidate] = key_of(candidate)
+            bound = max(query_deletes, len(key[:prefix_length]) - len(variant))
+            if bound < bounds.get(candidate, max_distance + 1):
+                bounds[candidate] = bound
+
+    by_bound = [[] for _ in range(max_distance + 1)]
+    for candidate, bound in bounds.items():
+        by_bound[bound].append(candidate)
+    found = []
+    for bound, candidates in enumerate(by_bound):
+        for candidate in candidates:
+            key = keys[candidate]
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                found.append((distance, abs(len(key) - len(query)), key, candidate))
+        # 剩下的候选距离都大于 bound，已找到 limit 个不超过 bound 的结果时不必再验证
+        if limit is not None and sum(1 for item in found if item[0] <= bound) >= limit:
+            break
+    found.sort(key=lambda item: item[:3])
+    return [(distance, candidate) for distance, _, _, candidate in found[:limit]]
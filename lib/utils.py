@@ -3,68 +3,297 @@ API工具函数
 """
 import os
 import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
 import jwt
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 from urllib.parse import urlparse
+from lib.cache import TTLCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
+JWT_EXPIRES_IN = int(os.environ.get('JWT_EXPIRES_DAYS', 30)) * 24 * 60 * 60  # Token 有效期（秒）
 
-# PostgreSQL 连接池（简单实现）
-_db_connection = None
+# 已验证 Token 的缓存：SHA-256 摘要 -> user_id，条目在 Token 过期时同时过期
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=JWT_EXPIRES_IN)
 
-def get_db_connection():
-    """获取 PostgreSQL 数据库连接"""
-    global _db_connection
-    
-    if _db_connection and not _db_connection.closed:
-        return _db_connection
-    
+# 连接池配置（可通过环境变量调整）
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # 等待空闲连接的最长秒数
+DB_POOL_IDLE_TIMEOUT = float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300))  # 空闲连接回收时间（秒）
+
+def _get_connect_kwargs():
+    """从环境变量解析数据库连接参数"""
     # 从环境变量获取数据库 URL
     database_url = os.environ.get('DATABASE_URL')
     
     if not database_url:
         raise ValueError('DATABASE_URL 环境变量未设置。请在 Railway Dashboard 中配置数据库连接。')
     
+    # Railway PostgreSQL URL 格式可能是 postgres:// 或 postgresql://
+    # 统一转换为 postgresql://
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
+    
+    # 解析数据库 URL
+    parsed = urlparse(database_url)
+    
+    # 如果 hostname 是内部网络地址，尝试使用外部连接
+    # Railway 内部网络地址格式：postgres.railway.internal
+    hostname = parsed.hostname
+    if hostname and 'railway.internal' in hostname:
+        # 尝试从环境变量获取外部连接 URL
+        external_url = os.environ.get('DATABASE_EXTERNAL_URL') or os.environ.get('RAILWAY_DATABASE_URL')
+        if external_url:
+            if external_url.startswith('postgres://'):
+                external_url = external_url.replace('postgres://', 'postgresql://', 1)
+            parsed = urlparse(external_url)
+            hostname = parsed.hostname
+    
+    return {
+        'host': hostname,
+        'port': parsed.port or 5432,
+        'database': parsed.path[1:] if parsed.path else '',  # 移除前导斜杠
+        'user': parsed.username,
+        'password': parsed.password,
+        'sslmode': os.environ.get('DATABASE_SSLMODE', 'require')  # Railway PostgreSQL 需要 SSL
+    }
+
+def get_db_connection():
+    """新建一个独立的 PostgreSQL 连接（不经过连接池，调用方负责关闭）
+    
+    请求处理代码请使用 db_connection() / db_cursor()，只有一次性脚本才需要独立连接。
+    """
     try:
-        # Railway PostgreSQL URL 格式可能是 postgres:// 或 postgresql://
-        # 统一转换为 postgresql://
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        
-        # 解析数据库 URL
-        parsed = urlparse(database_url)
-        
-        # 如果 hostname 是内部网络地址，尝试使用外部连接
-        # Railway 内部网络地址格式：postgres.railway.internal
-        hostname = parsed.hostname
-        if hostname and 'railway.internal' in hostname:
-            # 尝试从环境变量获取外部连接 URL
-            external_url = os.environ.get('DATABASE_EXTERNAL_URL') or os.environ.get('RAILWAY_DATABASE_URL')
-            if external_url:
-                if external_url.startswith('postgres://'):
-                    external_url = external_url.replace('postgres://', 'postgresql://', 1)
-                parsed = urlparse(external_url)
-                hostname = parsed.hostname
-        
-        # 建立连接
-        _db_connection = psycopg2.connect(
-            host=hostname,
-            port=parsed.port or 5432,
-            database=parsed.path[1:] if parsed.path else '',  # 移除前导斜杠
-            user=parsed.username,
-            password=parsed.password,
-            sslmode='require'  # Railway PostgreSQL 需要 SSL
-        )
-        
-        return _db_connection
+        return psycopg2.connect(**_get_connect_kwargs())
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f'无法连接到数据库: {str(e)}')
 
-def get_db_cursor():
-    """获取数据库游标（返回字典格式）"""
-    conn = get_db_connection()
-    return conn.cursor(cursor_factory=RealDictCursor)
+class PoolTimeout(Exception):
+    """等待空闲连接超时"""
+
+class ConnectionPool:
+    """线程安全的有界 PostgreSQL 连接池
+    
+    - 最多同时打开 maxconn 个连接，连接用尽时借出方会阻塞等待（最多 timeout 秒）
+    - 归还时回滚未提交的事务，保证下一个借用方拿到干净的连接
+    - 空闲超过 idle_timeout 的连接会被回收，但始终保留 minconn 个
+    - stats() 返回借出次数、等待次数和等待耗时等指标
+    """
+    
+    def __init__(self, minconn=1, maxconn=10, timeout=10, idle_timeout=300, connect=None):
+        if maxconn < 1 or minconn < 0 or minconn > maxconn:
+            raise ValueError(f'无效的连接池大小: min={minconn}, max={maxconn}')
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._connect = connect or get_db_connection
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, 归还时间)]，末尾是最近归还的
+        self._in_use = set()
+        self._opening = 0  # 正在建立中的连接数（计入容量）
+        self._closed = False
+        self._last_reap = time.monotonic()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'connections_reaped': 0
+        }
+    
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+    
+    def getconn(self, timeout=None):
+        """借出一个连接，连接用尽时最多等待 timeout 秒"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout('连接池已关闭')
+                # 优先复用最近归还的连接（LIFO，让多余的连接自然变老被回收）
+                while self._idle:
+                    conn, _ = self._idle.pop()
+                    if conn.closed or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+                        self._discard(conn)
+                        continue
+                    self._checked_out(conn, start, waited)
+                    return conn
+                if self._size() < self.maxconn:
+                    self._opening += 1
+                    break
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'等待数据库连接超时（{timeout}秒，连接池上限 {self.maxconn}）')
+                waited = True
+                self._cond.wait(remaining)
+        
+        # 在锁外建立新连接，避免握手阻塞其他线程
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opening -= 1
+            self._stats['connections_created'] += 1
+            self._checked_out(conn, start, waited)
+        return conn
+    
+    def _checked_out(self, conn, start, waited):
+        self._in_use.add(conn)
+        self._stats['checkouts'] += 1
+        if waited:
+            elapsed = time.monotonic() - start
+            self._stats['waits'] += 1
+            self._stats['wait_time_total'] += elapsed
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], elapsed)
+    
+    def putconn(self, conn, discard=False):
+        """归还连接；discard=True 或连接已损坏时直接关闭"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use.discard(conn)
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._reap_idle_locked()
+            self._cond.notify()
+    
+    def _discard(self, conn):
+        self._stats['connections_closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _reap_idle_locked(self):
+        now = time.monotonic()
+        # 最多每隔 idle_timeout/4 扫描一次
+        if now - self._last_reap < self.idle_timeout / 4:
+            return
+        self._last_reap = now
+        # _idle 按归还时间排序，最旧的在前面
+        while self._idle and self._size() > self.minconn and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            self._stats['connections_reaped'] += 1
+            self._discard(conn)
+    
+    def reap_idle(self):
+        """立即回收超时的空闲连接"""
+        with self._cond:
+            self._last_reap = 0
+            self._reap_idle_locked()
+    
+    @contextmanager
+    def connection(self, timeout=None):
+        """借出连接的上下文管理器，退出时自动归还（异常时回滚）"""
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+    
+    def closeall(self):
+        """关闭所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+    
+    def stats(self):
+        """返回连接池指标"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size(),
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'min': self.minconn,
+                'max': self.maxconn
+            })
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        stats['wait_ratio'] = stats['waits'] / checkouts if checkouts else 0.0
+        return stats
+
+_db_pool = None
+_db_pool_pid = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """获取当前进程的连接池（懒加载；gunicorn fork 后每个 worker 各自建池）"""
+    global _db_pool, _db_pool_pid
+    pid = os.getpid()
+    if _db_pool is not None and _db_pool_pid == pid:
+        return _db_pool
+    with _db_pool_lock:
+        if _db_pool is None or _db_pool_pid != pid:
+            _db_pool = ConnectionPool(
+                minconn=DB_POOL_MIN,
+                maxconn=DB_POOL_MAX,
+                timeout=DB_POOL_TIMEOUT,
+                idle_timeout=DB_POOL_IDLE_TIMEOUT
+            )
+            _db_pool_pid = pid
+    return _db_pool
+
+def db_connection(timeout=None):
+    """从连接池借出连接：with db_connection() as conn: ..."""
+    return get_db_pool().connection(timeout)
+
+@contextmanager
+def db_cursor(dict_cursor=True, timeout=None):
+    """从连接池借出连接并打开游标（默认字典格式），conn 可通过 cursor.connection 获取"""
+    with db_connection(timeout) as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor) if dict_cursor else conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+def db_pool_stats():
+    """返回连接池指标（尚未建池时返回 None）"""
+    if _db_pool is None or _db_pool_pid != os.getpid():
+        return None
+    return _db_pool.stats()
 
 def verify_token(request):
     """验证JWT Token并返回user_id"""
@@ -86,23 +315,117 @@ def verify_token(request):
         return None
     
     token = auth_header.replace('Bearer ', '')
+    # 缓存命中时不再解析和校验签名
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    user_id = _token_cache.get(digest)
+    if user_id is not None:
+        return user_id
+    
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        return payload.get('user_id')
+        # 旧版不带 exp 的 Token 不再接受，前端收到 401 后重新登录
+        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'], options={'require': ['exp']})
     except:
         return None
+    user_id = payload.get('user_id')
+    if user_id:
+        ttl = payload['exp'] - time.time()
+        if ttl > 0:
+            _token_cache.set(digest, user_id, ttl)
+    return user_id
+
+def issue_token(user_id):
+    """签发带 iat / exp 的 JWT Token"""
+    now = int(time.time())
+    return jwt.encode(
+        {'user_id': str(user_id), 'iat': now, 'exp': now + JWT_EXPIRES_IN},
+        JWT_SECRET,
+        algorithm='HS256'
+    )
+
+def token_cache_stats():
+    return _token_cache.stats()
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization'
+}
+
+def _json_default(obj):
+    """序列化标准 JSON 不支持的类型（数据库返回的 Decimal、时间、UUID 等）"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def dumps_json(data):
+    """序列化为 UTF-8 编码的 JSON 字节（安装了 orjson 时使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+class ApiResponse:
+    """处理函数返回的原生响应对象
+    
+    data 为待序列化的数据；也可以直接给出已序列化好的 body（bytes/str）。
+    Flask 适配层只序列化一次并直接写入 Response。
+    """
+    __slots__ = ('data', 'body', 'status_code', 'headers')
+    
+    def __init__(self, data=None, status_code=200, headers=None, body=None):
+        self.data = data
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'application/json; charset=utf-8'}
+        if headers:
+            self.headers.update(headers)
+    
+    def get_body(self):
+        """返回响应体字节"""
+        if self.body is None:
+            self.body = dumps_json(self.data)
+        elif isinstance(self.body, str):
+            self.body = self.body.encode('utf-8')
+        return self.body
+
+class StreamingResponse:
+    """流式响应（Server-Sent Events）
+    
+    chunks 为逐块产生 bytes/str 的迭代器，Flask 适配层边产生边发送，不缓冲整个响应。
+    """
+    __slots__ = ('chunks', 'status_code', 'headers')
+    
+    def __init__(self, chunks, status_code=200, headers=None):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.headers = {
+            'Content-Type': 'text/event-stream; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # 关闭 Nginx 反向代理的缓冲
+        }
+        if headers:
+            self.headers.update(headers)
+
+def sse_event(data, event=None):
+    """编码一条 SSE 事件；data 不是字符串时序列化为 JSON"""
+    if not isinstance(data, (str, bytes)):
+        data = dumps_json(data)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    prefix = f'event: {event}\n'.encode('utf-8') if event else b''
+    return prefix + b'data: ' + data + b'\n\n'
 
 def json_response(data, status_code=200):
     """返回JSON响应"""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization'
-        },
-        'body': json.dumps(data, ensure_ascii=False)
-    }
-
+    return ApiResponse(data, status_code)
 
+def int_arg(args, name, default, minimum, maximum):
+    """读取整数查询参数并限制在 [minimum, maximum] 内；缺失或无效时使用 default"""
+    try:
+        value = int(args.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(minimum, min(maximum, value))
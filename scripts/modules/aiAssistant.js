@@ -13,6 +13,20 @@ const MAX_HISTORY_LENGTH = 50;
 
 let chatHistory = [];
 
+/**
+ * 生成消息 ID：服务器按 ID 去重，只追加未见过的消息
+ */
+function createMessageId() {
+    if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+        return window.crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
+function createMessage(role, content) {
+    return { id: createMessageId(), role, content, createdAt: new Date().toISOString() };
+}
+
 /**
  * 初始化AI助手模块
  */
@@ -117,7 +131,7 @@ async function sendMessage() {
     addMessageToUI('user', message);
     inputEl.value = '';
     
-    chatHistory.push({ role: 'user', content: message });
+    chatHistory.push(createMessage('user', message));
     saveChatHistory();
 
     const loadingId = addMessageToUI('assistant', '正在思考...', true);
@@ -129,7 +143,7 @@ async function sendMessage() {
             if (done) {
                 updateMessage(loadingId, fullResponse || '（无响应）');
                 if (fullResponse) {
-                    chatHistory.push({ role: 'assistant', content: fullResponse });
+                    chatHistory.push(createMessage('assistant', fullResponse));
                     saveChatHistory();
                 }
             } else if (chunk) {
@@ -240,33 +254,35 @@ window.syncAIChatHistory = function(serverChatHistory) {
         return;
     }
     
-    // 合并服务器和本地聊天记录
-    const localHistory = chatHistory;
-    const mergedHistory = [];
-    const seenMessages = new Set();
+    // 合并服务器和本地聊天记录：按消息 ID 去重；
+    // 本地没有 ID 的旧消息按角色和内容匹配，并采用服务器生成的 ID
+    const localIds = new Set(chatHistory.filter(msg => msg.id).map(msg => msg.id));
+    const legacyMessages = new Map();
+    chatHistory.forEach(msg => {
+        if (!msg.id) legacyMessages.set(`${msg.role}:${msg.content}`, msg);
+    });
     
-    // 先添加服务器记录
+    const mergedHistory = chatHistory.slice();
     serverChatHistory.forEach(msg => {
-        if (msg.role && msg.content) {
-            const msgKey = `${msg.role}:${msg.content.substring(0, 50)}`;
-            if (!seenMessages.has(msgKey)) {
-                mergedHistory.push({
-                    role: msg.role,
-                    content: msg.content
-                });
-                seenMessages.add(msgKey);
-            }
+        if (!msg.role || !msg.content || localIds.has(msg.id)) return;
+        const legacyKey = `${msg.role}:${msg.content}`;
+        const legacy = legacyMessages.get(legacyKey);
+        if (legacy) {
+            legacy.id = msg.id;
+            legacyMessages.delete(legacyKey);
+        } else {
+            mergedHistory.push({
+                id: msg.id,
+                role: msg.role,
+                content: msg.content,
+                createdAt: msg.created_at
+            });
         }
+        localIds.add(msg.id);
     });
     
-    // 再添加本地记录（避免重复）
-    localHistory.forEach(msg => {
-        const msgKey = `${msg.role}:${msg.content.substring(0, 50)}`;
-        if (!seenMessages.has(msgKey)) {
-            mergedHistory.push(msg);
-            seenMessages.add(msgKey);
-        }
-    });
+    // 按时间排序（没有时间的旧消息排在最前，保持原有顺序）
+    mergedHistory.sort((a, b) => (Date.parse(a.createdAt) || 0) - (Date.parse(b.createdAt) || 0));
     
     // 限制长度并保存
     chatHistory = mergedHistory.slice(-MAX_HISTORY_LENGTH);
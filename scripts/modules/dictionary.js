@@ -23,7 +23,9 @@ let currentPanel = null; // 'history' | 'favorites' | 'vocab' | null
 // 索引系统
 let wordIndex = new Map();        // word.toLowerCase() -> wordObj
 let prefixIndex = new Map();      // prefix -> [wordObj, ...]
+let foldedIndex = new Map();      // foldKey(word) -> wordObj（忽略重音，eleve -> élève）
 let posIndex = new Map();         // pos -> [wordObj, ...]
+let remoteEntries = new Map();    // 服务器端查询返回的完整词条（词典文件下载完成前使用）
 let dictMetadata = {              // 词典元数据
     totalCount: 0,
     posCounts: {},
@@ -35,15 +37,14 @@ export async function initDictionary() {
     // 加载本地存储
     loadLocalStorage();
     
-    // 加载词典数据
-    await loadDictionary();
-    
-    // 绑定事件
+    // 绑定事件：词典文件下载完成前，查询由服务器端索引（/api/dictionary/search）处理
     bindEvents();
     
     // 更新UI
     updateFavoritesCount();
-    updateTotalCount();
+    
+    // 在后台下载完整词典（随机单词、背单词等功能需要）
+    loadDictionary().then(updateTotalCount);
     
     // 暴露获取数据的函数，供登录模块使用
     window.getDictFavorites = function() {
@@ -73,7 +74,8 @@ function loadLocalStorage() {
 }
 
 // 同步词典收藏夹（从服务器）
-window.syncDictFavorites = function(serverFavorites) {
+// deletedWords 为在其他设备上删除的单词（服务器墓碑）
+window.syncDictFavorites = function(serverFavorites, deletedWords = []) {
     if (!Array.isArray(serverFavorites)) return;
     
     const favoritesMap = new Map();
@@ -85,6 +87,9 @@ window.syncDictFavorites = function(serverFavorites) {
         }
     });
     
+    // 移除已在其他设备上删除的收藏
+    deletedWords.forEach(word => favoritesMap.delete(String(word).toLowerCase()));
+    
     // 再添加服务器收藏（如果服务器有更新，覆盖本地）
     if (serverFavorites.length > 0) {
         serverFavorites.forEach(serverFav => {
@@ -143,11 +148,13 @@ window.syncDictFavorites = function(serverFavorites) {
 };
 
 // 同步背单词进度（从服务器）
-window.syncVocabProgress = function(serverProgress) {
+// deletedWords 为在其他设备上删除的单词（服务器墓碑）
+window.syncVocabProgress = function(serverProgress, deletedWords = []) {
     if (!Array.isArray(serverProgress)) return;
     
     // 先保留本地进度
     const mergedProgress = { ...vocabProgress };
+    deletedWords.forEach(word => delete mergedProgress[word]);
     
     // 合并服务器进度（如果服务器数据更新，使用服务器数据）
     serverProgress.forEach(item => {
@@ -255,6 +262,18 @@ async function uploadDictFavoritesToServer() {
     }
 }
 
+// 通知服务器删除收藏（其他设备增量同步时会收到删除记录）
+async function uploadDictFavoriteDeletion(word) {
+    try {
+        if (!APIService.getToken()) return;
+        await APIService.uploadUserData({
+            deleted: { dict_favorites: [word] }
+        });
+    } catch (e) {
+        console.warn('上传收藏删除失败:', e);
+    }
+}
+
 // 保存学习进度（带自动同步）
 let vocabProgressUploadTimer = null;
 function saveVocabProgress() {
@@ -288,10 +307,17 @@ async function uploadVocabProgressToServer() {
 // 词典加载状态
 let dictionaryLoadPromise = null;
 
+// 忽略重音和大小写的查询键（与服务器端 lib/dictionary.fold_key 一致）
+function foldKey(text) {
+    return text.trim().normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+        .replace(/œ/g, 'oe').replace(/æ/g, 'ae');
+}
+
 // 构建索引系统
 function buildIndexes(words) {
     wordIndex.clear();
     prefixIndex.clear();
+    foldedIndex.clear();
     posIndex.clear();
     
     words.forEach(word => {
@@ -316,6 +342,10 @@ function buildIndexes(words) {
         } else {
             wordIndex.set(wordLower, word);
         }
+        const folded = foldKey(word.word);
+        if (!foldedIndex.has(folded)) {
+            foldedIndex.set(folded, word);
+        }
         
         // 前缀索引（1-5个字符，用于自动补全）
         const maxPrefixLen = Math.min(5, word.word.length);
@@ -506,7 +536,11 @@ async function loadDictionary() {
             }
         } finally {
             if (loadingEl) loadingEl.classList.add('hidden');
-            if (welcomeEl) welcomeEl.classList.remove('hidden');
+            // 下载期间已经通过服务器端索引显示了查询结果时，不再显示欢迎页
+            const resultsEl = document.getElementById('dict-results');
+            if (welcomeEl && (!resultsEl || resultsEl.classList.contains('hidden'))) {
+                welcomeEl.classList.remove('hidden');
+            }
             dictionaryLoadPromise = null; // 加载完成后清除Promise
         }
     })();
@@ -648,7 +682,7 @@ function resetAllButtons() {
 
 // 使用索引优化的搜索函数
 function findExactMatch(query) {
-    return wordIndex.get(query.toLowerCase()) || null;
+    return wordIndex.get(query.toLowerCase()) || foldedIndex.get(foldKey(query)) || null;
 }
 
 function findPrefixMatches(query) {
@@ -690,6 +724,30 @@ function findFuzzyMatches(query) {
     return results.slice(0, 10);
 }
 
+// 使用服务器端索引查询，返回 { exact, matches }；请求失败时返回 null
+async function searchDictionaryRemote(query, mode, limit) {
+    try {
+        const result = await APIService.searchDictionary(query, { mode, limit });
+        const data = result.data || { exact: null, matches: [] };
+        if (data.exact) {
+            remoteEntries.set(data.exact.word, data.exact);
+        }
+        return data;
+    } catch (e) {
+        return null;
+    }
+}
+
+// 把服务器返回的紧凑词条转换为本地词条格式（只有第一条释义的摘要）
+function fromCompactEntry(entry) {
+    return {
+        word: entry.word,
+        pos: (entry.pos || []).map(abbr => ({ abbr })),
+        gender: entry.gender,
+        definitions: entry.definition ? [{ text: entry.definition }] : []
+    };
+}
+
 // 处理搜索输入（使用索引优化）
 function handleSearchInput(e) {
     const query = e.target.value.trim();
@@ -699,6 +757,17 @@ function handleSearchInput(e) {
         return;
     }
     
+    // 词典文件还没下载完成：使用服务器端的前缀索引
+    if (dictWords.length === 0) {
+        searchDictionaryRemote(query, 'prefix', 15).then(data => {
+            const input = document.getElementById('dict-search-input');
+            if (data && input && input.value.trim() === query) {
+                showSuggestions(data.matches.map(fromCompactEntry));
+            }
+        });
+        return;
+    }
+    
     // 使用前缀索引快速查找
     const prefixMatches = findPrefixMatches(query);
     
@@ -773,8 +842,58 @@ function getShortDefinition(wordObj) {
 function performSearch(query) {
     if (!query) return;
     
-    // 检查词典是否已加载
+    // 输入中文：在服务器端的释义倒排索引中反查法语单词
+    if (/[\u3400-\u9fff]/.test(query)) {
+        reverseSearch(query);
+        return;
+    }
+    
+    // 词典文件还没下载完成：使用服务器端索引
     if (!dictWords || dictWords.length === 0) {
+        searchDictionaryRemote(query, 'all', 10).then(data => {
+            if (!data) {
+                showSearchResults(query, null, null);
+                return;
+            }
+            const q = query.toLowerCase();
+            const related = data.matches
+                .filter(w => w.word.toLowerCase() !== q)
+                .map(fromCompactEntry);
+            showSearchResults(query, data.exact, related, data);
+        });
+        return;
+    }
+    
+    // 使用索引进行精确匹配（O(1)）和模糊匹配
+    const exactMatch = findExactMatch(query);
+    if (exactMatch) {
+        showSearchResults(query, exactMatch, findFuzzyMatches(query));
+        return;
+    }
+    // 本地没有这个词：可能是变位或复数形式（suis、chevaux），由服务器还原为原形
+    searchDictionaryRemote(query, 'exact', 5).then(data => {
+        const lemma = data?.lemmatized && data.exact
+            ? wordIndex.get(data.exact.word.toLowerCase()) || data.exact
+            : null;
+        showSearchResults(query, lemma, findFuzzyMatches(query), data);
+    });
+}
+
+// 汉法反查：结果卡片显示命中的那条释义，本地词典已加载时使用完整词条
+function reverseSearch(query) {
+    APIService.reverseSearchDictionary(query, { limit: 20 })
+        .then(result => {
+            const matches = (result.data?.matches || []).map(entry =>
+                wordIndex.get(entry.word.toLowerCase()) || { ...fromCompactEntry(entry), definitions: [{ text: entry.match }] }
+            );
+            showSearchResults(query, null, matches, result.data);
+        })
+        .catch(() => showSearchResults(query, null, null));
+}
+
+// 渲染查询结果；fuzzyMatches 为 null 表示词典不可用；remote 为服务器返回的 data（变化形式、拼写纠错）
+function showSearchResults(query, exactMatch, fuzzyMatches, remote = null) {
+    if (fuzzyMatches === null) {
         const resultsEl = document.getElementById('dict-results');
         const welcomeEl = document.getElementById('dict-welcome');
         if (welcomeEl) welcomeEl.classList.add('hidden');
@@ -801,12 +920,6 @@ function performSearch(query) {
     
     if (welcomeEl) welcomeEl.classList.add('hidden');
     
-    // 使用索引进行精确匹配（O(1)）
-    const exactMatch = findExactMatch(query);
-    
-    // 使用索引进行模糊匹配
-    const fuzzyMatches = findFuzzyMatches(query);
-    
     if (!exactMatch && fuzzyMatches.length === 0) {
         if (resultsEl) {
             resultsEl.innerHTML = `
@@ -814,9 +927,11 @@ function performSearch(query) {
                     <div class="text-6xl mb-4">🔍</div>
                     <h3 class="text-xl font-bold text-slate-700 mb-2">未找到「${query}」</h3>
                     <p class="text-slate-500">试试其他关键词，或点击"随机"探索词典</p>
+                    <div id="dict-did-you-mean" class="mt-6 hidden"></div>
                 </div>
             `;
             resultsEl.classList.remove('hidden');
+            showSpellingSuggestions(query, remote);
         }
         return;
     }
@@ -828,6 +943,7 @@ function performSearch(query) {
     let html = '';
     
     if (exactMatch) {
+        html += renderInflections(query, remote?.inflections);
         html += renderWordCard(exactMatch, true);
     }
     
@@ -849,6 +965,48 @@ function performSearch(query) {
     }
 }
 
+// 查询词是变化形式时的说明：「suis」是 être 的变化形式：直陈式现在时 第一人称 单数
+function renderInflections(query, inflections) {
+    if (!inflections || inflections.length === 0) return '';
+    return `
+        <div class="mb-4 px-4 py-3 rounded-xl bg-indigo-50 text-slate-600 text-sm space-y-1">
+            ${inflections.map(group => `
+                <p>「${escapeHtml(query)}」是 <span class="font-semibold text-indigo-700">${escapeHtml(group.lemma)}</span>
+                的变化形式：${group.labels.map(escapeHtml).join('；')}</p>
+            `).join('')}
+        </div>
+    `;
+}
+
+// 没有查到时向服务器请求拼写纠错候选，显示"你是不是要找"；data 为已经请求过的结果
+function showSpellingSuggestions(query, data = null) {
+    (data ? Promise.resolve(data) : searchDictionaryRemote(query, 'exact', 5)).then(data => {
+        const el = document.getElementById('dict-did-you-mean');
+        const input = document.getElementById('dict-search-input');
+        const suggestions = data?.suggestions || [];
+        if (!el || suggestions.length === 0 || (input && input.value.trim() !== query)) return;
+        el.innerHTML = `
+            <p class="text-slate-500 mb-3">你是不是要找：</p>
+            <div class="flex flex-wrap justify-center gap-2">
+                ${suggestions.map(w => {
+                    // 词条可能含引号和括号：escapeHtml 不转义引号，属性值中另外转义
+                    const word = escapeHtml(w.word).replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+                    return `
+                    <button class="did-you-mean-item px-3 py-1 rounded-full border border-slate-200 hover:bg-indigo-50 text-slate-700" data-word="${word}">${word}</button>
+                `;
+                }).join('')}
+            </div>
+        `;
+        el.classList.remove('hidden');
+        el.querySelectorAll('.did-you-mean-item').forEach(item => {
+            item.addEventListener('click', () => {
+                if (input) input.value = item.dataset.word;
+                performSearch(item.dataset.word);
+            });
+        });
+    });
+}
+
 // 渲染单词卡片
 function renderWordCard(wordObj, isMain = false) {
     const isFavorite = favorites.some(f => f.word === wordObj.word);
@@ -1122,13 +1280,14 @@ function bindCardEvents() {
 
 // 切换收藏
 function toggleFavorite(word) {
-    const wordObj = dictWords.find(w => w.word === word);
+    const wordObj = dictWords.find(w => w.word === word) || remoteEntries.get(word);
     if (!wordObj) return;
     
     const existingIndex = favorites.findIndex(f => f.word === word);
     
     if (existingIndex !== -1) {
         favorites.splice(existingIndex, 1);
+        uploadDictFavoriteDeletion(word);
     } else {
         favorites.unshift({
             word: wordObj.word,
@@ -299,15 +299,17 @@ function loadFavorites() {
 }
 
 // 同步语用收藏夹（从服务器）
-window.syncExpressionFavorites = function(serverFavorites) {
-    if (!Array.isArray(serverFavorites) || serverFavorites.length === 0) return;
+// deletedIds 为在其他设备上删除的表达 id（服务器墓碑，字符串形式）
+window.syncExpressionFavorites = function(serverFavorites, deletedIds = []) {
+    if (!Array.isArray(serverFavorites) || (serverFavorites.length === 0 && deletedIds.length === 0)) return;
     
     const localFavorites = getAllFavorites();
     const favoritesMap = new Map();
+    const deletedSet = new Set(deletedIds.map(String));
     
-    // 先添加本地收藏
+    // 先添加本地收藏（跳过已在其他设备上删除的）
     localFavorites.forEach(fav => {
-        if (fav.id) {
+        if (fav.id && !deletedSet.has(String(fav.id))) {
             favoritesMap.set(fav.id, fav);
         }
     });
@@ -7,6 +7,8 @@ import { APIService } from '../services/apiService.js';
 let isLoginMode = true; // true=登录, false=注册
 let currentUser = null; // 当前登录用户
 
+const SYNC_CURSOR_KEY = 'user_sync_cursor'; // 上次同步的服务器游标（增量同步）
+
 export function initLogin() {
     // 初始化移动端"我的"页面
     initMyPage();
@@ -337,7 +339,8 @@ async function handleLogin() {
         const user = await AuthService.login(username, password);
         currentUser = user;
         
-        // 登录成功，加载用户数据并更新UI
+        // 登录成功，加载用户数据并更新UI（重新登录时做一次全量同步）
+        localStorage.removeItem(SYNC_CURSOR_KEY);
         await loadUserData();
         updateUserStatus();
         
@@ -469,6 +472,7 @@ async function handleRegister() {
         currentUser = user;
         
         // 注册成功，加载用户数据并更新UI
+        localStorage.removeItem(SYNC_CURSOR_KEY);
         await loadUserData();
         updateUserStatus();
         
@@ -495,6 +499,7 @@ async function handleLogout() {
         
         // 清空用户数据
         localStorage.removeItem('user_data');
+        localStorage.removeItem(SYNC_CURSOR_KEY);
         
         // 移动端刷新"我的"页面
         if (window.innerWidth < 768) {
@@ -602,6 +607,10 @@ function showError(element, message) {
     }
 }
 
+function hasChanges(items, deletedKeys) {
+    return (items && items.length > 0) || (deletedKeys && deletedKeys.length > 0);
+}
+
 async function loadUserData() {
     // 加载用户数据并同步跨设备数据
     console.log('加载用户数据...');
@@ -609,10 +618,11 @@ async function loadUserData() {
         // 先上传本地数据到服务器
         await uploadLocalDataToServer();
         
-        // 然后从服务器下载数据
-        const syncData = await APIService.syncUserData();
+        // 然后从服务器下载数据（增量：只获取上次同步之后变化的数据）
+        const syncData = await APIService.syncUserData(localStorage.getItem(SYNC_CURSOR_KEY) || '');
         if (syncData && syncData.success) {
             const { chat_history, expression_favorites, dict_favorites } = syncData.data;
+            const deleted = syncData.data.deleted || {};
             
             // 同步AI聊天记录
             if (chat_history && chat_history.length > 0) {
@@ -623,29 +633,34 @@ async function loadUserData() {
             }
             
             // 同步语用收藏夹
-            if (expression_favorites && expression_favorites.length > 0) {
+            if (hasChanges(expression_favorites, deleted.expression_favorites)) {
                 // 触发语用模块的同步函数
                 if (window.syncExpressionFavorites) {
-                    window.syncExpressionFavorites(expression_favorites);
+                    window.syncExpressionFavorites(expression_favorites || [], deleted.expression_favorites || []);
                 }
             }
             
             // 同步词典收藏夹
-            if (dict_favorites && dict_favorites.length > 0) {
+            if (hasChanges(dict_favorites, deleted.dict_favorites)) {
                 // 触发词典模块的同步函数
                 if (window.syncDictFavorites) {
-                    window.syncDictFavorites(dict_favorites);
+                    window.syncDictFavorites(dict_favorites || [], deleted.dict_favorites || []);
                 }
             }
             
             // 同步背单词进度
-            if (syncData.data.vocab_progress && syncData.data.vocab_progress.length > 0) {
+            if (hasChanges(syncData.data.vocab_progress, deleted.vocab_progress)) {
                 // 触发词典模块的同步函数
                 if (window.syncVocabProgress) {
-                    window.syncVocabProgress(syncData.data.vocab_progress);
+                    window.syncVocabProgress(syncData.data.vocab_progress || [], deleted.vocab_progress || []);
                 }
             }
             
+            // 保存游标，下次只获取之后的变化
+            if (syncData.cursor) {
+                localStorage.setItem(SYNC_CURSOR_KEY, syncData.cursor);
+            }
+            
             console.log('用户数据同步完成');
         }
     } catch (error) {
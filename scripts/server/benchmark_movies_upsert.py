@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cached_movies 写入基准测试 - 对比逐行 UPSERT 与批量 UPSERT
+
+在本地 PostgreSQL 上运行（需先执行 database/init.sql 建表）：
+    DATABASE_URL=postgresql://postgres@localhost:5432/french_ai DATABASE_SSLMODE=disable \\
+        python scripts/server/benchmark_movies_upsert.py --rows 200 --repeat 5
+
+测试在同名临时表上进行（LIKE cached_movies INCLUDING ALL），不会修改真实数据。
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from psycopg2.extras import execute_values
+from lib.utils import get_db_connection
+from scripts.server.update_movies_cache import (
+    UPSERT_SQL, movie_row, upsert_cached_movies, delete_expired_movies
+)
+
+def make_items(count):
+    """生成与 process_movie_item 输出格式一致的模拟数据"""
+    items = []
+    for i in range(count):
+        plot = f"Un film français numéro {i}, avec une intrigue très détaillée. " * 4
+        items.append({
+            'tmdb_id': 100000 + i,
+            'type': 'movie' if i % 3 else 'tv',
+            'title': f'Film {i}',
+            'original_title': f'Film original {i}',
+            'year': 1990 + i % 35,
+            'release_date': f'{1990 + i % 35}-01-01',
+            'rating': 7.5 + (i % 25) / 10,
+            'vote_count': 100 + i,
+            'poster_path': f'/poster{i}.jpg',
+            'backdrop_path': f'/backdrop{i}.jpg',
+            'plot': plot,
+            'plot_truncated': plot[:150] + '...',
+            'tagline': f'Tagline {i}',
+            'tagline_truncated': f'Tagline {i}',
+            'director': f'Réalisateur {i}',
+            'genres': ['剧情', '喜剧'],
+            'runtime': 90 + i % 60,
+            'seasons': 0,
+            'episodes': 0,
+            'media_info': f'{90 + i % 60}分钟',
+            'is_recent': i % 2 == 0,
+            'is_classic': i % 2 == 1
+        })
+    return items
+
+def write_per_row(cur, items):
+    """旧方式：每条记录一次往返"""
+    for item in items:
+        execute_values(cur, UPSERT_SQL, [movie_row(item)])
+    delete_expired_movies(cur)
+
+def write_bulk(cur, items):
+    """新方式：一条多行 UPSERT，清理过期数据在同一事务中"""
+    upsert_cached_movies(cur, items)
+    delete_expired_movies(cur)
+
+def run(conn, writer, items, repeat):
+    timings = []
+    cur = conn.cursor()
+    for _ in range(repeat):
+        cur.execute("TRUNCATE cached_movies")
+        conn.commit()
+        start = time.perf_counter()
+        writer(cur, items)
+        conn.commit()
+        timings.append(time.perf_counter() - start)
+    cur.close()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='cached_movies 逐行/批量写入基准测试')
+    parser.add_argument('--rows', type=int, default=200, help='每轮写入的记录数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数')
+    args = parser.parse_args()
+    
+    items = make_items(args.rows)
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        # 临时表在 search_path 中优先于同名正式表，写入函数无需修改
+        cur.execute("CREATE TEMP TABLE cached_movies (LIKE public.cached_movies INCLUDING ALL)")
+        conn.commit()
+        cur.close()
+        
+        results = {}
+        for name, writer in (('逐行写入', write_per_row), ('批量写入', write_bulk)):
+            timings = run(conn, writer, items, args.repeat)
+            results[name] = statistics.median(timings)
+            print(f"{name}: 中位数 {results[name] * 1000:.1f} ms "
+                  f"（最快 {min(timings) * 1000:.1f} ms，{args.rows} 行 × {args.repeat} 轮）")
+        
+        print(f"加速比: {results['逐行写入'] / results['批量写入']:.1f}x")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
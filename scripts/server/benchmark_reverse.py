@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+汉法反查基准测试 - 释义的 n-gram 倒排索引（lib/reverse_index）与逐条扫描释义的对比
+
+从 public/data/dicts 的释义中随机截取 1~4 个连续汉字作为查询，测量每次查询的耗时，
+并检查倒排索引是否找到了逐条扫描（子串匹配）找到的全部词条：
+    python scripts/server/benchmark_reverse.py --queries 1000
+
+二进制词典写入临时文件，不会修改 lib.dictionary.STORE_PATH。
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.dictionary import DictionaryIndex, load_word_lists, merge_entries
+from lib.dict_store import DictionaryStore, build_store
+from benchmark_spelling import timed, report
+
+HAN_RUN = re.compile(r'[㐀-鿿]+')
+
+
+def linear_scan(index, query):
+    """逐条检查释义是否包含 query，返回词条单词集合"""
+    return {entry['word'] for entry in index.entries
+            if any(query in (d.get('text') or '') for d in entry['definitions'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='汉法反查基准测试')
+    parser.add_argument('--queries', type=int, default=1000, help='查询次数')
+    parser.add_argument('--limit', type=int, default=10, help='每次返回的词条数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    words_by_pos = load_word_lists()
+    start = time.perf_counter()
+    index = DictionaryIndex(*merge_entries(words_by_pos))
+    print(f"内存索引: {len(index)} 个词条，{len(index.documents)} 条释义，{len(index.postings)} 个 n-gram，"
+          f"构建耗时 {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dictionary.bin')
+        _, size = build_store(path, words_by_pos)
+        store = DictionaryStore(path)
+        print(f"二进制词典: {size / 1024:.0f} KB（倒排表 {len(store.postings) / 1024:.0f} KB）")
+
+        rng = random.Random(args.seed)
+        runs = [run for entry in index.entries for d in entry['definitions']
+                for run in HAN_RUN.findall(d.get('text') or '')]
+        queries = []
+        for _ in range(args.queries):
+            run = rng.choice(runs)
+            length = min(len(run), rng.randint(1, 4))
+            i = rng.randrange(len(run) - length + 1)
+            queries.append(run[i:i + length])
+
+        # 召回率检查需要全部结果，计时只取前 limit 个（与 API 相同）
+        store_results, store_timings = timed(lambda q: store.reverse(q, limit=args.limit), queries)
+        _, index_timings = timed(lambda q: index.reverse(q, limit=args.limit), queries)
+        expected, scan_timings = timed(lambda q: linear_scan(index, q), queries)
+
+        print(f"\n{args.queries} 次查询，top-{args.limit}：")
+        report('二进制词典 reverse', store_timings)
+        report('内存索引 reverse', index_timings)
+        report('逐条扫描释义', scan_timings)
+
+        missed = 0
+        for query, want in zip(queries, expected):
+            found, _ = store.reverse(query, limit=len(index))
+            missed += not want <= {entry['word'] for entry, _ in found}
+        totals = [total for _, total in store_results]
+        print(f"\n逐条扫描找到的词条未全部出现在结果中的查询: {missed}/{args.queries}，"
+              f"平均匹配 {sum(totals) / len(totals):.1f} 个词条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼写纠错基准测试 - 删除邻域索引（lib/spelling）与逐个比较全部词条的对比
+
+使用 public/data/dicts 中全部词性的 JSON 文件，把随机词条做 1~2 次编辑（删除、插入、替换、相邻交换）
+作为输入，测量每次查询的耗时，并与逐个计算编辑距离的结果比较召回率：
+    python scripts/server/benchmark_spelling.py --queries 1000
+
+二进制词典写入临时文件，不会修改 lib.dictionary.STORE_PATH。
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib import spelling
+from lib.dictionary import DictionaryIndex, fold_key, load_word_lists, merge_entries
+from lib.dict_store import DictionaryStore, build_store
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyzéèêàâçîôûù'
+
+
+def misspell(word, edits, rng):
+    """对 word 随机做 edits 次编辑"""
+    for _ in range(edits):
+        i = rng.randrange(len(word))
+        op = rng.choice(('delete', 'insert', 'replace', 'transpose'))
+        if op == 'delete' and len(word) > 1:
+            word = word[:i] + word[i + 1:]
+        elif op == 'insert':
+            word = word[:i] + rng.choice(ALPHABET) + word[i:]
+        elif op == 'transpose' and i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        else:
+            word = word[:i] + rng.choice(ALPHABET) + word[i + 1:]
+    return word
+
+
+def brute_force(index, query, limit):
+    """逐个计算与全部折叠键的距离，排序规则与 lib.spelling.suggest 相同"""
+    query = fold_key(query)
+    found = []
+    for key in index.by_folded:
+        distance = spelling.edit_distance(query, key)
+        if distance <= spelling.MAX_EDIT_DISTANCE:
+            found.append((distance, abs(len(key) - len(query)), key))
+    found.sort()
+    words = []
+    for _, _, key in found[:limit]:
+        words.extend(index.entries[i]['word'] for i in index.by_folded[key])
+    return words[:limit]
+
+
+def timed(func, queries):
+    """返回 (结果列表, 每次查询耗时列表)"""
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(func(query))
+        timings.append(time.perf_counter() - start)
+    return results, timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{name}: 中位数 {statistics.median(timings) * 1e6:.0f} µs，p95 {p95 * 1e6:.0f} µs，"
+          f"p99 {p99 * 1e6:.0f} µs，最大 {timings[-1] * 1e6:.0f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='拼写纠错基准测试')
+    parser.add_argument('--queries', type=int, default=1000, help='查询次数')
+    parser.add_argument('--limit', type=int, default=5, help='每次返回的候选数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    print(f"编辑距离: {'rapidfuzz' if spelling.OSA is not None else '纯 Python 实现'}")
+    words_by_pos = load_word_lists()
+    start = time.perf_counter()
+    index = DictionaryIndex(*merge_entries(words_by_pos))
+    print(f"内存索引: {len(index)} 个词条，{len(index.deletes)} 个删除变体，"
+          f"构建耗时 {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dictionary.bin')
+        start = time.perf_counter()
+        _, size = build_store(path, words_by_pos)
+        store = DictionaryStore(path)
+        print(f"二进制词典: {size / 1024:.0f} KB（DELETES {len(store.deletes)} 个哈希），"
+              f"构建耗时 {time.perf_counter() - start:.2f}s")
+
+        rng = random.Random(args.seed)
+        sources = [key for key in index.by_folded if len(key) >= 3]
+        queries = [misspell(rng.choice(sources), rng.randint(1, 2), rng) for _ in range(args.queries)]
+
+        def words(entries):
+            return [entry['word'] for entry in entries]
+
+        store_results, store_timings = timed(lambda q: words(store.suggest(q, limit=args.limit)), queries)
+        index_results, index_timings = timed(lambda q: words(index.suggest(q, limit=args.limit)), queries)
+        expected, brute_timings = timed(lambda q: brute_force(index, q, args.limit), queries)
+
+        print(f"\n{args.queries} 次查询，编辑距离 ≤ {spelling.MAX_EDIT_DISTANCE}，top-{args.limit}：")
+        report('二进制词典 suggest', store_timings)
+        report('内存索引 suggest', index_timings)
+        report('逐个比较全部词条', brute_timings)
+
+        same = sum(got == want for got, want in zip(store_results, expected))
+        mismatched = sum(a != b for a, b in zip(store_results, index_results))
+        print(f"\n与逐个比较结果一致: {same}/{args.queries}，二进制词典与内存索引不一致: {mismatched}")
+
+
+if __name__ == '__main__':
+    main()
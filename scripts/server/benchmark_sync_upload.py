@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/api/user/sync 上传基准测试 - 对比逐行 UPSERT 与批量 UPSERT
+
+模拟一个数据量很大的用户（默认 3000 条背单词进度、500 条词典收藏、200 条语用收藏），
+在本地 PostgreSQL 上运行（需先执行 database/init.sql 建表）：
+    DATABASE_URL=postgresql://postgres@localhost:5432/french_ai DATABASE_SSLMODE=disable \\
+        python scripts/server/benchmark_sync_upload.py --vocab 3000 --repeat 5
+
+测试在同名临时表上进行（LIKE ... INCLUDING ALL），不会修改真实数据。
+每轮先清空表（全部为新插入），再用同样的数据写一次（全部命中 ON CONFLICT 且内容未变）。
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import statistics
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from psycopg2.extras import execute_values
+from lib.utils import get_db_connection
+from api.user.sync import (
+    EXPRESSION_UPSERT_SQL, DICT_UPSERT_SQL, VOCAB_UPSERT_SQL,
+    normalize_expression_favorites, normalize_dict_favorites, normalize_vocab_progress,
+    filter_tombstoned, upsert_expression_favorites, upsert_dict_favorites, upsert_vocab_progress
+)
+
+TABLES = ('expression_favorites', 'dict_favorites', 'vocab_progress', 'sync_tombstones')
+
+
+def make_body(vocab, dict_favorites, expressions):
+    """生成与前端上传格式一致的模拟数据"""
+    now_ms = int(time.time() * 1000)
+    return {
+        'vocab_progress': {
+            f'mot{i}': {'quality': i % 3, 'count': i % 7, 'lastReview': now_ms - i * 60000}
+            for i in range(vocab)
+        },
+        'dict_favorites': [
+            {'word': f'favori{i}', 'phonetic': f'/fa.vɔ.ʁi{i}/', 'pos': {'n.m.': [f'收藏 {i}']},
+             'addedAt': '2024-01-01T00:00:00Z'}
+            for i in range(dict_favorites)
+        ],
+        'expression_favorites': [
+            {'id': f'expr-{i}', 'scene': '餐厅', 'french': f'Je voudrais {i}', 'chinese': f'我想要 {i}',
+             'favoritedAt': '2024-01-01T00:00:00Z'}
+            for i in range(expressions)
+        ],
+    }
+
+
+def write_per_row(cur, user_id, body):
+    """旧方式：每个条目一次往返"""
+    for kind, sql, normalize, template in (
+        ('expression_favorites', EXPRESSION_UPSERT_SQL, normalize_expression_favorites, '(%s, %s, %s::jsonb)'),
+        ('dict_favorites', DICT_UPSERT_SQL, normalize_dict_favorites, '(%s, %s, %s, %s::jsonb)'),
+        ('vocab_progress', VOCAB_UPSERT_SQL, normalize_vocab_progress, '(%s, %s, %s, %s, %s)'),
+    ):
+        for row in filter_tombstoned(cur, user_id, kind, normalize(body[kind])):
+            execute_values(cur, sql, [(user_id,) + row], template=template)
+
+
+def write_bulk(cur, user_id, body):
+    """新方式：每张表一条多行 UPSERT"""
+    upsert_expression_favorites(cur, user_id, body['expression_favorites'])
+    upsert_dict_favorites(cur, user_id, body['dict_favorites'])
+    upsert_vocab_progress(cur, user_id, body['vocab_progress'])
+
+
+def run(conn, writer, user_id, body, repeat):
+    """返回 (首次写入耗时列表, 重复写入耗时列表)"""
+    inserts, updates = [], []
+    cur = conn.cursor()
+    for _ in range(repeat):
+        cur.execute(f"TRUNCATE {', '.join(TABLES)}")
+        conn.commit()
+        for timings in (inserts, updates):
+            start = time.perf_counter()
+            writer(cur, user_id, body)
+            conn.commit()
+            timings.append(time.perf_counter() - start)
+    cur.close()
+    return inserts, updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/api/user/sync 逐行/批量写入基准测试')
+    parser.add_argument('--vocab', type=int, default=3000, help='背单词进度条数')
+    parser.add_argument('--dict', type=int, default=500, help='词典收藏条数')
+    parser.add_argument('--expressions', type=int, default=200, help='语用收藏条数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数')
+    args = parser.parse_args()
+
+    body = make_body(args.vocab, args.dict, args.expressions)
+    total = args.vocab + args.dict + args.expressions
+    user_id = str(uuid.uuid4())
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        # 临时表在 search_path 中优先于同名正式表，写入函数无需修改（LIKE 不复制外键，user_id 无需存在）
+        for table in TABLES:
+            cur.execute(f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING ALL)")
+        conn.commit()
+        cur.close()
+
+        results = {}
+        for name, writer in (('逐行写入', write_per_row), ('批量写入', write_bulk)):
+            inserts, updates = run(conn, writer, user_id, body, args.repeat)
+            results[name] = statistics.median(inserts)
+            print(f"{name}: 首次写入中位数 {statistics.median(inserts) * 1000:.1f} ms，"
+                  f"重复写入中位数 {statistics.median(updates) * 1000:.1f} ms"
+                  f"（{total} 条 × {args.repeat} 轮）")
+
+        print(f"加速比: {results['逐行写入'] / results['批量写入']:.1f}x")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词典检查 - 确认常见的变化形式能还原到原形词条（内存索引和二进制词典分别检查）
+
+部署时在生成二进制词典之后运行（见 Dockerfile），有失败的检查时以非零状态退出：
+    python scripts/server/check_dictionary.py
+
+二进制词典写入临时文件，不会修改 lib.dictionary.STORE_PATH。
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.dictionary import DictionaryIndex, load_inflections, load_word_lists, merge_entries
+from lib.dict_store import DictionaryStore, build_store
+from lib.inflection import base_form
+
+# (变化形式, 原形)：原形按 base_form 比较，词条中的同形词编号和复数说明（cheval (pl. ~ aux)）不影响结果
+LEMMA_CASES = (
+    ('chevaux', 'cheval'), ('animaux', 'animal'), ('journaux', 'journal'), ('bijoux', 'bijou'),
+    ('cadeaux', 'cadeau'), ('yeux', 'œil'), ('suis', 'être'), ('allions', 'aller'), ('belles', 'beau'),
+)
+# 带复数说明的词条也能用单词本身精确查到
+LOOKUP_CASES = ('cheval', 'animal', 'bijou')
+
+
+def check(name, index):
+    failures = []
+    for form, lemma in LEMMA_CASES:
+        found = [base_form(entry['word']) for entry, _ in index.lemmas(form)]
+        if lemma not in found:
+            failures.append(f'{form} -> {lemma}（实际: {found}）')
+    for word in LOOKUP_CASES:
+        entry = index.lookup(word)
+        if entry is None or base_form(entry['word']) != word:
+            failures.append(f'精确匹配 {word}（实际: {entry and entry["word"]}）')
+    for failure in failures:
+        print(f'  [FAIL] {name}: {failure}')
+    print(f'  {name}: {len(LEMMA_CASES) + len(LOOKUP_CASES) - len(failures)}/{len(LEMMA_CASES) + len(LOOKUP_CASES)} 通过')
+    return not failures
+
+
+def main():
+    words_by_pos = load_word_lists()
+    inflections = load_inflections()
+    ok = check('内存索引', DictionaryIndex(*merge_entries(words_by_pos), inflections))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dictionary.bin')
+        build_store(path, words_by_pos, inflections=inflections)
+        store = DictionaryStore(path)
+        ok = check('二进制词典', store) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+聊天记录清理脚本 - 删除超出保留范围的 AI 聊天记录
+
+/api/user/sync 上传聊天记录时只追加新消息，不再删除旧消息，由此脚本定期清理：
+- 每个用户只保留最近 CHAT_HISTORY_KEEP 条
+- 删除早于 CHAT_HISTORY_DAYS 天的消息
+每批最多删除 CHAT_TRIM_BATCH 行并单独提交，避免长时间持有行锁。
+删除的同时更新每个用户的清理水位线（chat_history_trims），客户端重新上传已删除的消息时不会再插入。
+app.py 的后台线程每 CHAT_TRIM_INTERVAL 秒运行一次，也可以单独用 cron 运行。
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.utils import db_connection
+
+CHAT_HISTORY_KEEP = int(os.environ.get('CHAT_HISTORY_KEEP', 200))
+CHAT_HISTORY_DAYS = int(os.environ.get('CHAT_HISTORY_DAYS', 180))
+CHAT_TRIM_BATCH = int(os.environ.get('CHAT_TRIM_BATCH', 5000))
+CHAT_TRIM_INTERVAL = int(os.environ.get('CHAT_TRIM_INTERVAL', 24 * 60 * 60))
+
+
+# 删除 ids_sql 选出的消息，把每个用户删除的最新消息时间记入水位线，返回删除条数
+TRIM_SQL = """
+    WITH deleted AS (
+        DELETE FROM ai_chat_history
+        WHERE id IN ({ids_sql})
+        RETURNING user_id, created_at
+    ), marks AS (
+        INSERT INTO chat_history_trims (user_id, trimmed_through)
+        SELECT user_id, max(created_at) FROM deleted GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET trimmed_through = GREATEST(chat_history_trims.trimmed_through, EXCLUDED.trimmed_through)
+    )
+    SELECT count(*) FROM deleted
+"""
+
+
+def _delete_batches(cur, conn, ids_sql, params):
+    """重复执行删除语句直到没有可删的行，返回删除总数"""
+    sql = TRIM_SQL.format(ids_sql=ids_sql)
+    total = 0
+    while True:
+        cur.execute(sql, params)
+        deleted = cur.fetchone()[0]
+        conn.commit()
+        total += deleted
+        if deleted < CHAT_TRIM_BATCH:
+            return total
+
+
+def trim_chat_history(keep=CHAT_HISTORY_KEEP, days=CHAT_HISTORY_DAYS):
+    """清理超出保留范围的聊天记录，返回 (按天数删除数, 按条数删除数)"""
+    start = time.monotonic()
+    with db_connection() as conn:
+        cur = conn.cursor()
+        try:
+            expired = _delete_batches(cur, conn, """
+                SELECT id FROM ai_chat_history
+                WHERE created_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+                LIMIT %s
+            """, (days, CHAT_TRIM_BATCH))
+            # 每个用户按时间倒序编号，删除第 keep 条之后的消息
+            overflow = _delete_batches(cur, conn, """
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY created_at DESC) AS rn
+                    FROM ai_chat_history
+                ) ranked
+                WHERE rn > %s
+                LIMIT %s
+            """, (keep, CHAT_TRIM_BATCH))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    print(f"聊天记录清理完成：过期 {expired} 条，超出条数 {overflow} 条，"
+          f"耗时 {time.monotonic() - start:.2f}s")
+    return expired, overflow
+
+
+if __name__ == '__main__':
+    trim_chat_history()
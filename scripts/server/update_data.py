@@ -8,12 +8,17 @@
 import json
 import os
 import re
+import sys
 import time
-import requests
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib import http_client
+
 try:
     from dateutil import parser as date_parser
 except ImportError:
@@ -59,7 +64,7 @@ def parse_rss(url, source_name):
         list: 新闻条目列表，每个条目包含title, link, description等字段
     """
     try:
-        response = requests.get(url, timeout=10, headers={
+        response = http_client.get(url, timeout=10, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         response.raise_for_status()
@@ -181,7 +186,7 @@ def fetch_movies():
                 'primary_release_date.gte': f'{current_year - 2}-01-01',
                 'page': page
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             results = data.get('results', [])
@@ -204,7 +209,7 @@ def fetch_movies():
                 'primary_release_date.lte': f'{current_year - 5}-12-31',
                 'page': page
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             results = data.get('results', [])
@@ -227,7 +232,7 @@ def fetch_movies():
                 'first_air_date.gte': f'{current_year - 2}-01-01',
                 'page': page
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             results = data.get('results', [])
@@ -250,7 +255,7 @@ def fetch_movies():
                 'first_air_date.lte': f'{current_year - 5}-12-31',
                 'page': page
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             results = data.get('results', [])
@@ -284,7 +289,7 @@ def fetch_movies():
                     'language': 'fr-FR',
                     'append_to_response': 'credits'
                 }
-                detail_response = requests.get(detail_url, params=detail_params, timeout=10)
+                detail_response = http_client.get(detail_url, params=detail_params, timeout=10)
                 
                 if detail_response.ok:
                     detail_data = detail_response.json()
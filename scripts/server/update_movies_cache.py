@@ -8,14 +8,18 @@
 import os
 import sys
 import time
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from lib.utils import get_db_connection
+from psycopg2.extras import Json, execute_values
+from lib import http_client
+from lib.utils import db_connection
+from lib.rate_limit import get_limiter, parse_retry_after
 
 # 配置参数
 MIN_RATING = 7.5
@@ -23,6 +27,11 @@ TARGET_COUNT = 200
 MAX_PAGES_PER_CATEGORY = 20
 CACHE_EXPIRY_DAYS = 7
 
+# 并发与限流（TMDB 对单个 IP 约限制 40~50 请求/秒，这里留出余量）
+TMDB_WORKERS = int(os.environ.get('TMDB_WORKERS', 8))
+TMDB_RATE_LIMIT = float(os.environ.get('TMDB_RATE_LIMIT', 20))  # 每秒请求数
+TMDB_MAX_RETRIES = 3
+
 TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
 TMDB_BASE_URL = 'https://api.themoviedb.org/3'
 
@@ -44,21 +53,40 @@ def is_french_text(text):
     import re
     return bool(re.search(french_chars, text, re.IGNORECASE))
 
+# 所有工作线程（以及同进程内的 /api/movies/list）共享同一个 TMDB 限流器
+_tmdb_limiter = get_limiter('tmdb', TMDB_RATE_LIMIT)
+_request_count = 0
+_request_count_lock = threading.Lock()
+
 def fetch_from_tmdb(endpoint, params=None):
-    """从TMDB API获取数据"""
+    """从TMDB API获取数据（经过共享限流器，429 时按 Retry-After 退避后重试）"""
+    global _request_count
     if params is None:
         params = {}
     params['api_key'] = TMDB_API_KEY
     params['language'] = 'fr-FR'
     
     url = f'{TMDB_BASE_URL}{endpoint}'
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"TMDB API调用失败: {endpoint}, 错误: {e}")
-        return None
+    for attempt in range(TMDB_MAX_RETRIES + 1):
+        _tmdb_limiter.acquire()
+        with _request_count_lock:
+            _request_count += 1
+        try:
+            # 429 由这里暂停共享限流器处理，连接错误和 5xx 交给 http_client 重试
+            response = http_client.get(url, params=params, timeout=10, upstream='tmdb',
+                                       retry_on_status=http_client.RETRY_STATUSES - {429})
+            if response.status_code == 429 and attempt < TMDB_MAX_RETRIES:
+                # 被限流：暂停所有线程，等待 Retry-After 后重试
+                wait = parse_retry_after(response.headers.get('Retry-After'), default=2 ** attempt)
+                print(f"TMDB限流，{wait:.1f}秒后重试: {endpoint}")
+                _tmdb_limiter.pause(wait)
+                continue
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"TMDB API调用失败: {endpoint}, 错误: {e}")
+            return None
+    return None
 
 def get_movie_details(movie_id, movie_type='movie'):
     """获取电影/剧集的详细信息"""
@@ -159,6 +187,52 @@ def process_movie_item(item, movie_type='movie'):
         'is_classic': is_classic
     }
 
+# cached_movies 写入列（顺序与 UPSERT_SQL 的 VALUES 模板一致）
+CACHED_MOVIE_COLUMNS = [
+    'tmdb_id', 'type', 'title', 'original_title', 'year', 'release_date',
+    'rating', 'vote_count', 'poster_path', 'backdrop_path',
+    'plot', 'plot_truncated', 'tagline', 'tagline_truncated',
+    'director', 'genres', 'runtime', 'seasons', 'episodes', 'media_info',
+    'is_recent', 'is_classic'
+]
+
+UPSERT_SQL = f"""
+INSERT INTO cached_movies ({', '.join(CACHED_MOVIE_COLUMNS)})
+VALUES %s
+ON CONFLICT (tmdb_id, type) 
+DO UPDATE SET
+    {', '.join(f'{col} = EXCLUDED.{col}' for col in CACHED_MOVIE_COLUMNS[2:])},
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+def movie_row(item):
+    """将 process_movie_item 的结果转换为 UPSERT_SQL 需要的元组"""
+    row = [item[col] for col in CACHED_MOVIE_COLUMNS]
+    row[CACHED_MOVIE_COLUMNS.index('genres')] = Json(item['genres'])
+    row[CACHED_MOVIE_COLUMNS.index('release_date')] = item['release_date'] or None
+    return tuple(row)
+
+def upsert_cached_movies(cur, items, page_size=500):
+    """批量写入 cached_movies：一条多行 INSERT ... ON CONFLICT 代替逐行写入
+    
+    同一条语句不能两次更新同一行，因此先按 (tmdb_id, type) 去重（保留最后一条）。
+    """
+    unique = {}
+    for item in items:
+        unique[(item['tmdb_id'], item['type'])] = item
+    rows = [movie_row(item) for item in unique.values()]
+    if rows:
+        execute_values(cur, UPSERT_SQL, rows, page_size=page_size)
+    return len(rows)
+
+def delete_expired_movies(cur):
+    """删除超过 CACHE_EXPIRY_DAYS 天未更新的记录，返回删除条数"""
+    cur.execute(
+        "DELETE FROM cached_movies WHERE updated_at < NOW() - make_interval(days => %s)",
+        (CACHE_EXPIRY_DAYS,)
+    )
+    return cur.rowcount
+
 def update_cache():
     """更新电影缓存"""
     if not TMDB_API_KEY:
@@ -169,149 +243,118 @@ def update_cache():
     print("开始更新电影缓存...")
     print("=" * 50)
     
+    global _request_count
+    with _request_count_lock:
+        _request_count = 0
+    started_at = time.monotonic()
+    
     current_year = datetime.now().year
-    all_items = []
-    seen_ids = set()
     
     # 定义获取数据的函数
-    def fetch_category(category_type, is_recent, movie_type='movie'):
-        """获取指定类别的数据"""
+    def fetch_category(category_type, movie_type='movie'):
+        """获取指定类别的数据（同一类别的分页依次获取，遇到不足一页即停止）"""
         items = []
-        for page in range(1, MAX_PAGES_PER_CATEGORY + 1):
+        max_pages = 5 if category_type == 'other' else MAX_PAGES_PER_CATEGORY
+        for page in range(1, max_pages + 1):
+            endpoint = f'/discover/{movie_type}'
+            params = {
+                'with_original_language': 'fr',
+                'vote_average.gte': MIN_RATING,
+                'page': page
+            }
             if movie_type == 'movie':
-                if is_recent:
-                    endpoint = '/discover/movie'
-                    params = {
-                        'with_original_language': 'fr',
+                if category_type == 'recent':
+                    params.update({
                         'sort_by': 'popularity.desc',
                         'vote_count.gte': 30,
-                        'vote_average.gte': MIN_RATING,
-                        'primary_release_date.gte': f'{current_year - 2}-01-01',
-                        'page': page
-                    }
-                else:
-                    endpoint = '/discover/movie'
-                    params = {
-                        'with_original_language': 'fr',
+                        'primary_release_date.gte': f'{current_year - 2}-01-01'
+                    })
+                elif category_type == 'classic':
+                    params.update({
                         'sort_by': 'vote_average.desc',
                         'vote_count.gte': 300,
-                        'vote_average.gte': MIN_RATING,
-                        'primary_release_date.lte': f'{current_year - 5}-12-31',
-                        'page': page
-                    }
+                        'primary_release_date.lte': f'{current_year - 5}-12-31'
+                    })
+                else:
+                    params.update({'sort_by': 'popularity.desc', 'vote_count.gte': 50})
             else:  # tv
-                if is_recent:
-                    endpoint = '/discover/tv'
-                    params = {
-                        'with_original_language': 'fr',
+                if category_type == 'recent':
+                    params.update({
                         'sort_by': 'popularity.desc',
                         'vote_count.gte': 20,
-                        'vote_average.gte': MIN_RATING,
-                        'first_air_date.gte': f'{current_year - 2}-01-01',
-                        'page': page
-                    }
-                else:
-                    endpoint = '/discover/tv'
-                    params = {
-                        'with_original_language': 'fr',
+                        'first_air_date.gte': f'{current_year - 2}-01-01'
+                    })
+                elif category_type == 'classic':
+                    params.update({
                         'sort_by': 'vote_average.desc',
                         'vote_count.gte': 100,
-                        'vote_average.gte': MIN_RATING,
-                        'first_air_date.lte': f'{current_year - 5}-12-31',
-                        'page': page
-                    }
+                        'first_air_date.lte': f'{current_year - 5}-12-31'
+                    })
+                else:
+                    params.update({'sort_by': 'popularity.desc', 'vote_count.gte': 30})
             
             data = fetch_from_tmdb(endpoint, params)
             if not data or not data.get('results'):
                 break
             
             results = data['results']
-            for item in results:
-                item_id = f"{movie_type}_{item['id']}"
-                if item_id not in seen_ids:
-                    seen_ids.add(item_id)
-                    items.append((item, movie_type))
+            items.extend((item, movie_type) for item in results)
             
             if len(results) < 20:
                 break
-            
-            time.sleep(0.3)  # 避免API限流
         
         return items
     
-    # 获取所有类别的数据
-    print("获取近两年电影...")
-    all_items.extend(fetch_category('recent', True, 'movie'))
-    
-    print("获取经典电影...")
-    all_items.extend(fetch_category('classic', False, 'movie'))
-    
-    print("获取其他电影...")
-    for page in range(1, 6):  # 其他电影少获取几页
-        endpoint = '/discover/movie'
-        params = {
-            'with_original_language': 'fr',
-            'sort_by': 'popularity.desc',
-            'vote_count.gte': 50,
-            'vote_average.gte': MIN_RATING,
-            'page': page
-        }
-        data = fetch_from_tmdb(endpoint, params)
-        if data and data.get('results'):
-            for item in data['results']:
-                item_id = f"movie_{item['id']}"
-                if item_id not in seen_ids:
-                    seen_ids.add(item_id)
-                    all_items.append((item, 'movie'))
-            if len(data['results']) < 20:
-                break
-        time.sleep(0.3)
-    
-    print("获取近两年剧集...")
-    all_items.extend(fetch_category('recent', True, 'tv'))
+    # 获取所有类别的数据（各类别并发获取，按固定顺序合并以保证优先级稳定）
+    categories = [
+        ('recent', 'movie', '近两年电影'),
+        ('classic', 'movie', '经典电影'),
+        ('other', 'movie', '其他电影'),
+        ('recent', 'tv', '近两年剧集'),
+        ('classic', 'tv', '经典剧集'),
+        ('other', 'tv', '其他剧集')
+    ]
+    print("获取" + "、".join(label for _, _, label in categories) + "...")
+    with ThreadPoolExecutor(max_workers=min(TMDB_WORKERS, len(categories))) as executor:
+        category_results = list(executor.map(lambda c: fetch_category(c[0], c[1]), categories))
     
-    print("获取经典剧集...")
-    all_items.extend(fetch_category('classic', False, 'tv'))
-    
-    print("获取其他剧集...")
-    for page in range(1, 6):
-        endpoint = '/discover/tv'
-        params = {
-            'with_original_language': 'fr',
-            'sort_by': 'popularity.desc',
-            'vote_count.gte': 30,
-            'vote_average.gte': MIN_RATING,
-            'page': page
-        }
-        data = fetch_from_tmdb(endpoint, params)
-        if data and data.get('results'):
-            for item in data['results']:
-                item_id = f"tv_{item['id']}"
-                if item_id not in seen_ids:
-                    seen_ids.add(item_id)
-                    all_items.append((item, 'tv'))
-            if len(data['results']) < 20:
-                break
-        time.sleep(0.3)
+    all_items = []
+    seen_ids = set()
+    for items in category_results:
+        for item, movie_type in items:
+            item_id = f"{movie_type}_{item['id']}"
+            if item_id not in seen_ids:
+                seen_ids.add(item_id)
+                all_items.append((item, movie_type))
     
-    print(f"共获取 {len(all_items)} 个唯一项目，开始处理详细信息...")
+    print(f"共获取 {len(all_items)} 个唯一项目，开始并发处理详细信息（{TMDB_WORKERS} 线程，限速 {TMDB_RATE_LIMIT:g} 请求/秒）...")
     
-    # 处理每个项目
-    processed_items = []
-    for idx, (item, movie_type) in enumerate(all_items):
-        if len(processed_items) >= TARGET_COUNT:
-            break
-        
+    def safe_process(entry):
+        item, movie_type = entry
         try:
-            processed = process_movie_item(item, movie_type)
-            if processed:
-                processed_items.append(processed)
-                print(f"处理进度: {len(processed_items)}/{TARGET_COUNT} - {processed['title']}")
+            return process_movie_item(item, movie_type)
         except Exception as e:
             print(f"处理项目失败: {item.get('id')}, 错误: {e}")
-        
-        time.sleep(0.2)  # 避免API限流
+            return None
     
+    # 分批并发处理：每批按原顺序收集结果，达到目标数量后不再提交新批次
+    processed_items = []
+    position = 0
+    with ThreadPoolExecutor(max_workers=TMDB_WORKERS) as executor:
+        while position < len(all_items) and len(processed_items) < TARGET_COUNT:
+            remaining = TARGET_COUNT - len(processed_items)
+            batch_size = max(TMDB_WORKERS * 2, remaining * 2)
+            batch = all_items[position:position + batch_size]
+            position += len(batch)
+            for processed in executor.map(safe_process, batch):
+                if processed and len(processed_items) < TARGET_COUNT:
+                    processed_items.append(processed)
+                    print(f"处理进度: {len(processed_items)}/{TARGET_COUNT} - {processed['title']}")
+    
+    elapsed = time.monotonic() - started_at
+    print(f"TMDB请求 {_request_count} 次，耗时 {elapsed:.1f} 秒，"
+          f"吞吐 {_request_count / elapsed if elapsed else 0:.1f} 请求/秒，"
+          f"{len(processed_items) / elapsed if elapsed else 0:.1f} 条/秒")
     print(f"处理完成，共 {len(processed_items)} 个有效项目")
     
     # 插入/更新数据库
@@ -319,73 +362,23 @@ def update_cache():
         print("没有有效数据，跳过数据库更新")
         return False
     
-    conn = get_db_connection()
-    if not conn:
-        print("错误: 无法连接数据库")
-        return False
-    
     try:
-        cur = conn.cursor()
-        
-        # 使用UPSERT更新数据
-        insert_sql = """
-        INSERT INTO cached_movies (
-            tmdb_id, type, title, original_title, year, release_date,
-            rating, vote_count, poster_path, backdrop_path,
-            plot, plot_truncated, tagline, tagline_truncated,
-            director, genres, runtime, seasons, episodes, media_info,
-            is_recent, is_classic
-        ) VALUES (
-            %(tmdb_id)s, %(type)s, %(title)s, %(original_title)s, %(year)s, %(release_date)s,
-            %(rating)s, %(vote_count)s, %(poster_path)s, %(backdrop_path)s,
-            %(plot)s, %(plot_truncated)s, %(tagline)s, %(tagline_truncated)s,
-            %(director)s, %(genres)s::jsonb, %(runtime)s, %(seasons)s, %(episodes)s, %(media_info)s,
-            %(is_recent)s, %(is_classic)s
-        )
-        ON CONFLICT (tmdb_id, type) 
-        DO UPDATE SET
-            title = EXCLUDED.title,
-            original_title = EXCLUDED.original_title,
-            year = EXCLUDED.year,
-            release_date = EXCLUDED.release_date,
-            rating = EXCLUDED.rating,
-            vote_count = EXCLUDED.vote_count,
-            poster_path = EXCLUDED.poster_path,
-            backdrop_path = EXCLUDED.backdrop_path,
-            plot = EXCLUDED.plot,
-            plot_truncated = EXCLUDED.plot_truncated,
-            tagline = EXCLUDED.tagline,
-            tagline_truncated = EXCLUDED.tagline_truncated,
-            director = EXCLUDED.director,
-            genres = EXCLUDED.genres,
-            runtime = EXCLUDED.runtime,
-            seasons = EXCLUDED.seasons,
-            episodes = EXCLUDED.episodes,
-            media_info = EXCLUDED.media_info,
-            is_recent = EXCLUDED.is_recent,
-            is_classic = EXCLUDED.is_classic,
-            updated_at = CURRENT_TIMESTAMP
-        """
-        
-        for item in processed_items:
-            cur.execute(insert_sql, item)
-        
-        conn.commit()
-        print(f"✓ 成功更新 {len(processed_items)} 条记录到数据库")
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # 批量UPSERT和清理过期数据在同一个事务中完成
+            written = upsert_cached_movies(cur, processed_items)
+            deleted_count = delete_expired_movies(cur)
+            conn.commit()
+            cur.close()
         
-        # 清理过期数据（可选）
-        delete_sql = """
-        DELETE FROM cached_movies 
-        WHERE updated_at < NOW() - INTERVAL '%s days'
-        """ % CACHE_EXPIRY_DAYS
-        cur.execute(delete_sql)
-        deleted_count = cur.rowcount
+        print(f"✓ 成功更新 {written} 条记录到数据库")
         if deleted_count > 0:
             print(f"✓ 清理了 {deleted_count} 条过期记录")
         
-        conn.commit()
-        cur.close()
-        conn.close()
+        # 缓存表已重写，清空本进程的总数缓存（其他进程通过 max(updated_at) 变化感知）
+        from api.movies.cached import invalidate_totals_cache
+        invalidate_totals_cache()
         
         print("=" * 50)
         print("电影缓存更新完成！")
@@ -394,11 +387,9 @@ def update_cache():
         
     except Exception as e:
         import traceback
+        # 未提交的事务在连接归还连接池时自动回滚
         print(f"数据库操作失败: {e}")
         traceback.print_exc()
-        if conn:
-            conn.rollback()
-            conn.close()
         return False
 
 if __name__ == '__main__':
@@ -3,7 +3,7 @@
  */
 
 import { localStorageService } from './storage.js';
-import { simulateStream, handleAPIError, Logger } from '../utils/helpers.js';
+import { simulateStream, readEventStream, handleAPIError, Logger } from '../utils/helpers.js';
 
 const USER_ID_KEY = 'coze_user_id';
 const CONVERSATION_ID_KEY = 'coze_conversation_id';
@@ -31,8 +31,41 @@ export function clearChatContext() {
     localStorageService.remove(CONVERSATION_ID_KEY);
 }
 
+/**
+ * 读取后端转发的扣子SSE流：delta 事件逐块回调，done 事件携带 conversation_id
+ * @param {Response} response - Fetch响应对象
+ * @param {Function} onStream - 流式回调函数 (chunk, isDone) => void
+ * @returns {Promise<string>} 完整回复
+ */
+async function readCozeStream(response, onStream) {
+    let content = '';
+    let streamError = null;
+    
+    await readEventStream(response, (event, data) => {
+        const payload = JSON.parse(data);
+        if (event === 'delta') {
+            content += payload.content || '';
+            if (payload.content) {
+                onStream(payload.content, false);
+            }
+        } else if (event === 'done') {
+            saveConversationId(payload.conversation_id);
+        } else if (event === 'error') {
+            streamError = new Error(payload.message || 'Coze API调用失败');
+        }
+    });
+    
+    if (streamError) {
+        throw streamError;
+    }
+    onStream('', true);
+    return content;
+}
+
 /**
  * 调用扣子API进行对话 - 通过后端代理
+ * @param {string} prompt - 用户消息
+ * @param {Function} onStream - 流式响应回调（可选），传入时后端以 SSE 逐块返回
  */
 export async function callCozeAPI(prompt, onStream = null) {
     const userId = getUserId();
@@ -47,13 +80,19 @@ export async function callCozeAPI(prompt, onStream = null) {
             body: JSON.stringify({
                 prompt,
                 user_id: userId,
-                conversation_id: conversationId || undefined
+                conversation_id: conversationId || undefined,
+                stream: Boolean(onStream)
             })
         });
 
         if (!response.ok) {
             throw await handleAPIError(response, 'Coze API错误');
         }
+        
+        const contentType = response.headers.get('content-type') || '';
+        if (onStream && contentType.includes('text/event-stream')) {
+            return await readCozeStream(response, onStream);
+        }
 
         const result = await response.json();
         
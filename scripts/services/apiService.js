@@ -128,9 +128,11 @@ export class APIService {
         return this.request(url);
     }
     
-    static async getCachedMovies(page = 1, limit = 25, category = 'all', type = 'mixed', minRating = 7.0) {
+    static async getCachedMovies(page = 1, limit = 25, category = 'all', type = 'mixed', minRating = 7.0, cursor = '') {
         const params = [];
         params.push(`page=${page}`);
+        // 传入上一页返回的 nextCursor 时使用游标分页
+        if (cursor) params.push(`cursor=${encodeURIComponent(cursor)}`);
         params.push(`limit=${limit}`);
         params.push(`category=${category}`);
         params.push(`type=${type}`);
@@ -146,6 +148,21 @@ export class APIService {
     }
     
     // ========== 词典相关 ==========
+    static async searchDictionary(query, { pos = '', mode = '', limit = 10 } = {}) {
+        // 服务器端词典索引：mode 为 exact / prefix，默认两者都返回
+        const params = [`q=${encodeURIComponent(query)}`, `limit=${limit}`];
+        if (pos) params.push(`pos=${encodeURIComponent(pos)}`);
+        if (mode) params.push(`mode=${mode}`);
+        return this.request(`/dictionary/search?${params.join('&')}`);
+    }
+    
+    static async reverseSearchDictionary(query, { pos = '', limit = 10, offset = 0 } = {}) {
+        // 汉法反查：在释义中查找中文词语
+        const params = [`q=${encodeURIComponent(query)}`, `limit=${limit}`, `offset=${offset}`];
+        if (pos) params.push(`pos=${encodeURIComponent(pos)}`);
+        return this.request(`/dictionary/reverse?${params.join('&')}`);
+    }
+    
     static async getDictHistory(limit = 50) {
         return this.request(`/dictionary/history?limit=${limit}`);
     }
@@ -208,8 +225,10 @@ export class APIService {
     }
     
     // ========== 用户数据同步 ==========
-    static async syncUserData() {
-        return this.request('/user/sync');
+    static async syncUserData(since = '') {
+        // since 为上次同步返回的 cursor，只获取之后变化的数据
+        const query = since ? `?since=${encodeURIComponent(since)}` : '';
+        return this.request(`/user/sync${query}`);
     }
     
     static async uploadUserData(data) {
@@ -4,12 +4,12 @@
  * 现在通过后端API代理调用，不直接使用API密钥
  */
 
-import { simulateStream, handleAPIError, Logger } from '../utils/helpers.js';
+import { simulateStream, readEventStream, handleAPIError, Logger } from '../utils/helpers.js';
 
 /**
  * 调用DeepSeek API - 通过后端代理
  * @param {string} prompt - 提示词
- * @param {Function} onStream - 流式响应回调（可选）
+ * @param {Function} onStream - 流式响应回调（可选），传入时后端以 SSE 逐块返回
  * @returns {Promise<string>} AI回复
  */
 export async function callDeepSeek(prompt, onStream = null) {
@@ -23,13 +23,19 @@ export async function callDeepSeek(prompt, onStream = null) {
             },
             body: JSON.stringify({
                 prompt,
-                model: 'deepseek-chat'
+                model: 'deepseek-chat',
+                stream: Boolean(onStream)
             })
         });
 
         if (!response.ok) {
             throw await handleAPIError(response, 'DeepSeek API错误');
         }
+        
+        const contentType = response.headers.get('content-type') || '';
+        if (onStream && contentType.includes('text/event-stream')) {
+            return await readDeepSeekStream(response, onStream);
+        }
 
         const result = await response.json();
         
@@ -52,6 +58,40 @@ export async function callDeepSeek(prompt, onStream = null) {
     }
 }
 
+/**
+ * 读取后端转发的DeepSeek SSE流，边收到边回调
+ * @param {Response} response - Fetch响应对象
+ * @param {Function} onStream - 流式回调函数 (chunk, isDone) => void
+ * @returns {Promise<string>} 完整回复
+ */
+async function readDeepSeekStream(response, onStream) {
+    let content = '';
+    let streamError = null;
+    
+    await readEventStream(response, (event, data) => {
+        if (event === 'error') {
+            streamError = new Error(JSON.parse(data).message || 'DeepSeek API调用失败');
+            return;
+        }
+        if (data === '[DONE]') return;
+        try {
+            const chunk = JSON.parse(data).choices?.[0]?.delta?.content || '';
+            if (chunk) {
+                content += chunk;
+                onStream(chunk, false);
+            }
+        } catch (e) {
+            Logger.warn('无法解析DeepSeek流数据:', data);
+        }
+    });
+    
+    if (streamError) {
+        throw streamError;
+    }
+    onStream('', true);
+    return content;
+}
+
 /**
  * 调用DeepSeek生成内容（非流式）
  * @param {string} prompt - 提示词
@@ -96,6 +96,19 @@ export function removeFavorite(id) {
     const favorites = getAllFavorites();
     const filtered = favorites.filter(fav => fav.id !== id);
     saveAllFavorites(filtered);
+    uploadFavoriteDeletion(id);
+}
+
+// 通知服务器删除收藏（其他设备增量同步时会收到删除记录）
+async function uploadFavoriteDeletion(id) {
+    try {
+        if (!APIService.getToken()) return;
+        await APIService.uploadUserData({
+            deleted: { expression_favorites: [String(id)] }
+        });
+    } catch (e) {
+        console.warn('上传收藏删除失败:', e);
+    }
 }
 
 /**
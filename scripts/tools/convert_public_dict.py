@@ -8,11 +8,18 @@
 import json
 import re
 import os
+import sys
+import argparse
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+
+from lib.dictionary import STORE_PATH, load_word_lists
+from lib.dict_store import build_store
+
 # 尝试多个可能的位置
 TXT_FILE = None
 possible_paths = [
@@ -489,14 +496,34 @@ def generate_json_files(words_by_pos):
     
     return generated_files, total_count
 
+def generate_binary_file(words_by_pos):
+    """生成 mmap 读取的二进制词典（lib/dict_store），供 /api/dictionary/search 使用"""
+    count, size = build_store(STORE_PATH, words_by_pos, source='公共法语学习词典')
+    print(f"  [OK] 二进制词典: {count} 个词条, {size / 1024:.0f} KB -> {STORE_PATH.name}")
+    return count
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='公共法语学习词典转换工具')
+    parser.add_argument('--binary-only', action='store_true',
+                        help='不解析txt，只根据已有的各词性JSON文件重新生成二进制词典')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("公共法语学习词典转换工具")
     print("=" * 60)
     print()
     
-    if not TXT_FILE.exists():
+    if args.binary_only:
+        words_by_pos = load_word_lists(DICT_DIR)
+        if not words_by_pos:
+            print(f"错误: {DICT_DIR} 中没有词性JSON文件")
+            return
+        print("正在生成二进制词典...")
+        generate_binary_file(words_by_pos)
+        return
+    
+    if TXT_FILE is None or not TXT_FILE.exists():
         print(f"错误: 找不到文件 {TXT_FILE}")
         print("请确保文件在项目根目录下")
         return
@@ -524,6 +551,7 @@ def main():
         # 生成JSON文件
         print("正在生成JSON文件...")
         generated_files, total_count = generate_json_files(words_by_pos)
+        generate_binary_file(words_by_pos)
         
         print()
         print("=" * 60)
@@ -8,17 +8,24 @@
 - verb.csv: 动词，包含form和tags（tags中有变位、时态、人称等信息）
 - adj.csv: 形容词，包含form和tags
 - 其他词性类似
+变化形式（复数、阴性、变位）另外写入 inflections.json：{词形: [[原形, 标签]]}，供服务器端词形还原使用
 """
 
 import json
 import csv
 import ast
 import os
+import sys
 from pathlib import Path
 from collections import defaultdict
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DICT_DIR = BASE_DIR / 'public' / 'data' / 'dicts'
+sys.path.insert(0, str(BASE_DIR))
+
+from lib.dictionary import STORE_PATH, INFLECTIONS_PATH, load_word_lists
+from lib.dict_store import build_store
+from lib.inflection import TAG_LABELS
 
 # 词性映射
 POS_INFO = {
@@ -54,9 +61,22 @@ def is_base_form(tags):
                 'reflexive', 'participle', 'infinitive', 'masculine', 'feminine']
     return not any(tag in excluded for tag in tags)
 
-def process_noun_csv(csv_path):
-    """处理名词CSV - 理解结构：form是词形，tags包含gender等信息"""
+def add_inflection(inflections, form, lemma, tags):
+    """记录 form 是 lemma 的变化形式；只保留语式、时态、人称、数、性标签（与 lib.inflection 一致）"""
+    if inflections is None or not lemma or form.lower() == lemma.lower():
+        return
+    tags = ' '.join(tag for tag in tags if tag in TAG_LABELS)
+    analyses = inflections.setdefault(form.lower(), [])
+    if [lemma, tags] not in analyses:
+        analyses.append([lemma, tags])
+
+def process_noun_csv(csv_path, inflections=None):
+    """处理名词CSV - 理解结构：form是词形，tags包含gender等信息
+
+    inflections 不为 None 时收集复数形式：CSV 中变化形式跟在原形之后，原形取最近一个单数行
+    """
     words = {}
+    lemma = None
     with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -66,6 +86,8 @@ def process_noun_csv(csv_path):
                 continue
             
             tags = parse_tags(tags_str)
+            lemma = row.get('lemma') or (form if 'plural' not in tags else lemma)
+            add_inflection(inflections, form, lemma, tags)
             gender = None
             for tag in tags:
                 if tag == 'masculine':
@@ -89,15 +111,17 @@ def process_noun_csv(csv_path):
     
     return list(words.values())
 
-def process_verb_csv(csv_path):
+def process_verb_csv(csv_path, inflections=None):
     """
     处理动词CSV - 理解结构：form是词形，tags包含变位、时态、人称等信息
     动词CSV的特殊性：
     - 同一个动词可能有多个变位形式（je suis, tu es, il est等）
     - 需要识别原形（infinitive）作为主词条
     - 变位信息存储在tags中，包括时态、人称、数等
+    - inflections 不为 None 时收集变位形式 -> 原形（最近一个 infinitive 行）
     """
     words = {}
+    lemma = None
     with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -144,6 +168,8 @@ def process_verb_csv(csv_path):
             
             # 判断是否是原形（infinitive）
             is_infinitive = 'infinitive' in tags
+            lemma = row.get('lemma') or row.get('infinitive') or (form if is_infinitive else lemma)
+            add_inflection(inflections, form, lemma, tags)
             
             # 使用原形作为key，如果不是原形则尝试找到对应的原形
             # 注意：这里简化处理，实际可能需要更复杂的词形还原
@@ -186,10 +212,11 @@ def process_verb_csv(csv_path):
     
     return list(words.values())
 
-def process_other_pos_csv(csv_path, pos_name):
-    """处理其他词性CSV"""
+def process_other_pos_csv(csv_path, pos_name, inflections=None):
+    """处理其他词性CSV；inflections 不为 None 时收集变化形式（形容词的阴性、复数）"""
     pos_info = POS_INFO.get(pos_name, {'abbr': pos_name, 'full': pos_name})
     words = {}
+    lemma = None
     
     with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
@@ -200,6 +227,9 @@ def process_other_pos_csv(csv_path, pos_name):
                 continue
             
             tags = parse_tags(tags_str)
+            # 阳性单数是原形
+            lemma = row.get('lemma') or (form if not {'plural', 'feminine'} & set(tags) else lemma)
+            add_inflection(inflections, form, lemma, tags)
             key = form.lower()
             
             if key not in words or (is_base_form(tags) and not is_base_form(parse_tags(words[key].get('raw_tags', '')))):
@@ -310,10 +340,11 @@ def main():
     DICT_DIR.mkdir(parents=True, exist_ok=True)
     
     # 处理每个CSV文件
+    inflections = {}
     files_to_process = {
-        'noun.csv': ('noun', process_noun_csv),
-        'verb.csv': ('verb', process_verb_csv),
-        'adj.csv': ('adj', lambda p: process_other_pos_csv(p, 'adj')),
+        'noun.csv': ('noun', lambda p: process_noun_csv(p, inflections)),
+        'verb.csv': ('verb', lambda p: process_verb_csv(p, inflections)),
+        'adj.csv': ('adj', lambda p: process_other_pos_csv(p, 'adj', inflections)),
         'adv.csv': ('adv', lambda p: process_other_pos_csv(p, 'adv')),
         'conj.csv': ('conj', lambda p: process_other_pos_csv(p, 'conj')),
         'prep.csv': ('prep', lambda p: process_other_pos_csv(p, 'prep')),
@@ -380,6 +411,24 @@ def main():
             print()
             continue
     
+    if generated_files:
+        # 变位表：build_store 读取它生成词形还原索引（文件不存在时按规则生成）
+        with open(INFLECTIONS_PATH, 'w', encoding='utf-8') as f:
+            json.dump({
+                'name': 'French Dictionary - 变化形式',
+                'source': 'https://github.com/hbenbel/French-Dictionary',
+                'count': len(inflections),
+                'generated_at': datetime.datetime.now().isoformat() + 'Z',
+                'forms': inflections,
+            }, f, ensure_ascii=False)
+        print(f"[OK] 变位表: {len(inflections)} 个变化形式 -> {INFLECTIONS_PATH.name}")
+
+        # 服务器端查询使用的二进制词典，由目录中全部 JSON 文件重新生成
+        count, size = build_store(STORE_PATH, load_word_lists(DICT_DIR),
+                                  source='https://github.com/hbenbel/French-Dictionary')
+        print(f"[OK] 二进制词典: {count} 个词条, {size / 1024:.0f} KB -> {STORE_PATH.name}")
+        print()
+    
     elapsed_time = (datetime.datetime.now() - start_time).total_seconds()
     
     print("=" * 60)
@@ -132,6 +132,41 @@ export async function simulateStream(content, onStream, chunkSize = 5, delay = 2
     onStream('', true);
 }
 
+/**
+ * 读取 Server-Sent Events 响应流
+ * @param {Response} response - Fetch响应对象（Content-Type: text/event-stream）
+ * @param {Function} onEvent - 事件回调 (event, data) => void，event 默认为 'message'
+ */
+export async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder('utf-8');
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // 事件之间以空行分隔，最后一段可能不完整，留到下次处理
+        const blocks = buffer.split('\n\n');
+        buffer = blocks.pop();
+        for (const block of blocks) {
+            let event = 'message';
+            const dataLines = [];
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            }
+            if (dataLines.length > 0) {
+                onEvent(event, dataLines.join('\n'));
+            }
+        }
+    }
+}
+
 /**
  * 统一处理API错误响应
  * @param {Response} response - Fetch响应对象
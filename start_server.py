@@ -16,6 +16,9 @@ os.execvp('gunicorn', [
     'app:app',
     '--bind', f'0.0.0.0:{port}',
     '--workers', '2',
+    # 线程 worker：AI 流式响应等长连接只占一个线程，不会占满整个 worker
+    '--worker-class', 'gthread',
+    '--threads', '8',
     '--timeout', '120'
 ])
 